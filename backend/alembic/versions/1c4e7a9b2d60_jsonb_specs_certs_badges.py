@@ -0,0 +1,64 @@
+"""JSONB + GIN for specs, certifications and badges
+
+Revision ID: 1c4e7a9b2d60
+Revises: c8f1d4a2e367
+Create Date: 2026-10-18 19:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c4e7a9b2d60'
+down_revision: Union[str, None] = 'c8f1d4a2e367'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+JSONB_COLUMNS = [
+    ('sourcing_requests', 'specs_json'),
+    ('sourcing_requests', 'required_certs'),
+    ('sourcing_offers', 'cert_proofs_urls'),
+    ('producer_profiles', 'badges'),
+]
+
+SPEC_INDEX_KEYS = ['vanillin_content_min', 'moisture_max']
+
+
+def spec_number(key: str) -> str:
+    return f"(CASE WHEN jsonb_typeof(specs_json -> '{key}') = 'number' THEN (specs_json ->> '{key}')::float END)"
+
+
+def upgrade() -> None:
+    for table, column in JSONB_COLUMNS:
+        op.alter_column(table, column, type_=postgresql.JSONB(), postgresql_using=f'{column}::jsonb')
+
+    # Contenance (@>): "exige toutes ces certifications", "a tous ces badges"
+    op.create_index(
+        'ix_sourcing_requests_required_certs_gin', 'sourcing_requests', ['required_certs'],
+        postgresql_using='gin', postgresql_ops={'required_certs': 'jsonb_path_ops'}
+    )
+    op.create_index(
+        'ix_producer_profiles_badges_gin', 'producer_profiles', ['badges'],
+        postgresql_using='gin', postgresql_ops={'badges': 'jsonb_path_ops'}
+    )
+    # Présence d'une clé de specs (?) pour les bornes sur des clés non indexées
+    op.create_index('ix_sourcing_requests_specs_gin', 'sourcing_requests', ['specs_json'], postgresql_using='gin')
+    # Bornes sur les specs usuelles (valeur non numérique -> NULL, sans erreur de cast)
+    for key in SPEC_INDEX_KEYS:
+        op.create_index(f'ix_sourcing_requests_spec_{key}', 'sourcing_requests', [sa.text(spec_number(key))])
+    # cert_proofs_urls: JSONB sans index (URLs de preuves, jamais filtrées par contenu)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sourcing_requests_spec_moisture_max', table_name='sourcing_requests')
+    op.drop_index('ix_sourcing_requests_spec_vanillin_content_min', table_name='sourcing_requests')
+    op.drop_index('ix_sourcing_requests_specs_gin', table_name='sourcing_requests')
+    op.drop_index('ix_producer_profiles_badges_gin', table_name='producer_profiles')
+    op.drop_index('ix_sourcing_requests_required_certs_gin', table_name='sourcing_requests')
+    for table, column in JSONB_COLUMNS:
+        op.alter_column(table, column, type_=sa.JSON(), postgresql_using=f'{column}::json')
@@ -0,0 +1,42 @@
+"""Type-checked spec expression indexes
+
+Revision ID: 2f6b8d4e1a75
+Revises: 9d1b4e7a2c63
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b8d4e1a75'
+down_revision: Union[str, None] = '9d1b4e7a2c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SPEC_INDEX_KEYS = ['vanillin_content_min', 'moisture_max']
+
+
+def spec_number(key: str) -> str:
+    return f"(CASE WHEN jsonb_typeof(specs_json -> '{key}') = 'number' THEN (specs_json ->> '{key}')::float END)"
+
+
+def upgrade() -> None:
+    # ((specs_json ->> 'clé')::float) échouait sur une valeur non numérique ("25%"):
+    # insertion refusée. La valeur non numérique vaut maintenant NULL.
+    for key in SPEC_INDEX_KEYS:
+        op.drop_index(f'ix_sourcing_requests_spec_{key}', table_name='sourcing_requests')
+        op.create_index(f'ix_sourcing_requests_spec_{key}', 'sourcing_requests', [sa.text(spec_number(key))])
+
+
+def downgrade() -> None:
+    for key in SPEC_INDEX_KEYS:
+        op.drop_index(f'ix_sourcing_requests_spec_{key}', table_name='sourcing_requests')
+        op.create_index(
+            f'ix_sourcing_requests_spec_{key}', 'sourcing_requests',
+            [sa.text(f"((specs_json ->> '{key}')::float)")]
+        )
@@ -0,0 +1,33 @@
+"""Add orders.reserved_units (stock units taken at creation)
+
+Revision ID: 3b7e1f5c9d24
+Revises: 6c1d9e3a7f52
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e1f5c9d24'
+down_revision: Union[str, None] = '6c1d9e3a7f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('reserved_units', sa.Integer(), nullable=True))
+    # Commandes existantes: la création retirait int(quantity_kg) du stock (10 sans quantité),
+    # le rejet doit rendre la même chose (TRUNC: int() Python, pas l'arrondi du CAST)
+    op.execute(
+        "UPDATE orders SET reserved_units = CASE WHEN quantity_kg IS NULL OR quantity_kg = 0 THEN 10 "
+        "ELSE CAST(TRUNC(quantity_kg) AS INTEGER) END "
+        "WHERE reserved_units IS NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'reserved_units')
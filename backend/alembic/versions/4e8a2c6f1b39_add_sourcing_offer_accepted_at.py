@@ -0,0 +1,27 @@
+"""Add sourcing_offers.accepted_at
+
+Revision ID: 4e8a2c6f1b39
+Revises: 2f6b8d4e1a75
+Create Date: 2026-10-19 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a2c6f1b39'
+down_revision: Union[str, None] = '2f6b8d4e1a75'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Offres déjà acceptées: NULL, les statistiques de marché prennent la date de la demande
+    op.add_column('sourcing_offers', sa.Column('accepted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sourcing_offers', 'accepted_at')
@@ -0,0 +1,34 @@
+"""Add orders.producer_id snapshot and index
+
+Revision ID: 6c1d9e3a7f52
+Revises: 4e8a2c6f1b39
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c1d9e3a7f52'
+down_revision: Union[str, None] = '4e8a2c6f1b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('producer_id', sa.Integer(), nullable=True))
+    # Producteur des commandes existantes: celui de leur produit (les commandes déjà
+    # détachées d'un produit supprimé restent sans producteur)
+    op.execute(
+        "UPDATE orders SET producer_id = product.producer_id FROM product "
+        "WHERE product.id = orders.product_id AND orders.producer_id IS NULL"
+    )
+    op.create_index('ix_orders_producer_created', 'orders', ['producer_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_producer_created', table_name='orders')
+    op.drop_column('orders', 'producer_id')
@@ -0,0 +1,28 @@
+"""Add keyset indexes for order listing and export
+
+Revision ID: 7c3f9a1e5b28
+Revises: 5a2d8c6e4f13
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f9a1e5b28'
+down_revision: Union[str, None] = '5a2d8c6e4f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /orders et /producers/me/sales: ORDER BY created_at DESC, id DESC (+ status)
+    op.create_index('ix_orders_created_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created', 'orders', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_created', table_name='orders')
+    op.drop_index('ix_orders_created_id', table_name='orders')
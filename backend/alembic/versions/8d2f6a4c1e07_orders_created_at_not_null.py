@@ -0,0 +1,29 @@
+"""orders.created_at NOT NULL (keyset cursor of order listings)
+
+Revision ID: 8d2f6a4c1e07
+Revises: 3b7e1f5c9d24
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f6a4c1e07'
+down_revision: Union[str, None] = '3b7e1f5c9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Commandes sans date (insérées hors ORM): datées de la migration, UTC sans fuseau
+    # comme datetime.utcnow
+    op.execute("UPDATE orders SET created_at = timezone('utc', now()) WHERE created_at IS NULL")
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('orders', 'created_at', existing_type=sa.DateTime(), nullable=True)
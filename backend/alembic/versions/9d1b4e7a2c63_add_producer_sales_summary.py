@@ -0,0 +1,58 @@
+"""Add orders.product_id FK and index, producer sales summary
+
+Revision ID: 9d1b4e7a2c63
+Revises: 7c3f9a1e5b28
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1b4e7a2c63'
+down_revision: Union[str, None] = '7c3f9a1e5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Commandes de produits déjà supprimés: détachées, comme le fera ON DELETE SET NULL
+    op.execute(
+        "UPDATE orders SET product_id = NULL WHERE product_id IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM product WHERE product.id = orders.product_id)"
+    )
+    op.create_foreign_key(
+        'orders_product_id_fkey', 'orders', 'product', ['product_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_orders_product_created', 'orders', ['product_id', 'created_at', 'id'], unique=False)
+
+    op.create_table(
+        'producer_sales_summary',
+        sa.Column('producer_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('quantity_kg', sa.Float(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('producer_id', 'product_id', 'month', 'status')
+    )
+    # Synthèse initiale depuis les commandes existantes
+    op.execute(
+        "INSERT INTO producer_sales_summary "
+        "(producer_id, product_id, month, status, order_count, quantity_kg, amount) "
+        "SELECT p.producer_id, o.product_id, to_char(o.created_at, 'YYYY-MM'), COALESCE(o.status, 'PENDING'), "
+        "count(o.id), COALESCE(sum(o.quantity_kg), 0), COALESCE(sum(o.amount), 0) "
+        "FROM orders o JOIN product p ON p.id = o.product_id "
+        "WHERE p.producer_id IS NOT NULL AND o.created_at IS NOT NULL "
+        "GROUP BY 1, 2, 3, 4"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('producer_sales_summary')
+    op.drop_index('ix_orders_product_created', table_name='orders')
+    op.drop_constraint('orders_product_id_fkey', 'orders', type_='foreignkey')
@@ -0,0 +1,32 @@
+"""Add sourcing offer rank index
+
+Revision ID: a7d3e9f1c582
+Revises: f3c9d1a7b264
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9f1c582'
+down_revision: Union[str, None] = 'f3c9d1a7b264'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Classement des offres d'une demande: trust score DESC (absent = 0), prix ASC, id (keyset)
+    op.create_index(
+        'ix_sourcing_offers_request_rank',
+        'sourcing_offers',
+        ['request_id', sa.text('coalesce(trust_score_snapshot, 0) DESC'), 'price_offered_usd', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sourcing_offers_request_rank', table_name='sourcing_offers')
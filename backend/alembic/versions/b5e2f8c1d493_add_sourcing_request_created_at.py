@@ -0,0 +1,36 @@
+"""Add sourcing request created_at
+
+Revision ID: b5e2f8c1d493
+Revises: a7d3e9f1c582
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e2f8c1d493'
+down_revision: Union[str, None] = 'a7d3e9f1c582'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Les demandes existantes reçoivent la date de la migration (ordre conservé par l'id)
+    op.add_column('sourcing_requests', sa.Column(
+        'created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')
+    ))
+    op.create_index(
+        'ix_sourcing_requests_status_created',
+        'sourcing_requests',
+        ['status', 'created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sourcing_requests_status_created', table_name='sourcing_requests')
+    op.drop_column('sourcing_requests', 'created_at')
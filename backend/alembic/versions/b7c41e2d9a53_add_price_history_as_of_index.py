@@ -0,0 +1,34 @@
+"""Add price history as-of index
+
+Revision ID: b7c41e2d9a53
+Revises: a1b3eb4d1133
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e2d9a53'
+down_revision: Union[str, None] = 'a1b3eb4d1133'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (product_id, changed_at DESC) INCLUDE (base_price_fob):
+    # "dernier snapshot <= date" en index-only scan
+    op.create_index(
+        'ix_price_tier_history_product_changed_at',
+        'price_tier_history',
+        ['product_id', sa.text('changed_at DESC')],
+        unique=False,
+        postgresql_include=['base_price_fob']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_price_tier_history_product_changed_at', table_name='price_tier_history')
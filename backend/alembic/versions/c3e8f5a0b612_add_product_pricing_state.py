@@ -0,0 +1,89 @@
+"""Add product pricing state
+
+Revision ID: c3e8f5a0b612
+Revises: b7c41e2d9a53
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8f5a0b612'
+down_revision: Union[str, None] = 'b7c41e2d9a53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('product', sa.Column('last_base_price', sa.Float(), nullable=True))
+    op.add_column('product', sa.Column('price_changed_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('product', sa.Column('price_trend_direction', sa.String(), nullable=True))
+    op.add_column('product', sa.Column('price_trend_percent', sa.Float(), nullable=True))
+    op.add_column('product', sa.Column('effective_tier_count', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('product', sa.Column('min_price_per_kg', sa.Float(), nullable=True))
+    op.add_column('product', sa.Column('max_price_per_kg', sa.Float(), nullable=True))
+
+    # === BACKFILL ===
+    # Dernier snapshot historique
+    op.execute("""
+        UPDATE product p
+        SET last_base_price = h.base_price_fob, price_changed_at = h.changed_at
+        FROM (
+            SELECT DISTINCT ON (product_id) product_id, base_price_fob, changed_at
+            FROM price_tier_history
+            ORDER BY product_id, changed_at DESC
+        ) h
+        WHERE h.product_id = p.id
+    """)
+    op.execute("""
+        UPDATE product
+        SET price_trend_percent = round(abs((price_fob - last_base_price) / last_base_price * 100)::numeric, 2),
+            price_trend_direction = CASE
+                WHEN round(((price_fob - last_base_price) / last_base_price * 100)::numeric, 2) < 0 THEN 'down'
+                WHEN round(((price_fob - last_base_price) / last_base_price * 100)::numeric, 2) > 0 THEN 'up'
+                ELSE 'stable' END
+        WHERE last_base_price IS NOT NULL AND last_base_price <> 0
+          AND price_fob IS NOT NULL AND price_fob <> last_base_price
+    """)
+
+    # Paliers effectifs
+    op.execute("""
+        UPDATE product
+        SET effective_tier_count = 1, min_price_per_kg = price_fob, max_price_per_kg = price_fob
+        WHERE pricing_mode = 'SINGLE' OR pricing_mode IS NULL
+    """)
+    op.execute("""
+        UPDATE product p
+        SET effective_tier_count = t.n, min_price_per_kg = t.lo, max_price_per_kg = t.hi
+        FROM (
+            SELECT product_id, count(*) AS n, min(price_per_kg) AS lo, max(price_per_kg) AS hi
+            FROM price_tiers GROUP BY product_id
+        ) t
+        WHERE t.product_id = p.id AND p.pricing_mode = 'TIERED'
+    """)
+    op.execute("""
+        UPDATE product p
+        SET effective_tier_count = t.n,
+            min_price_per_kg = round((p.price_fob * (1 - t.max_discount / 100))::numeric, 2),
+            max_price_per_kg = round((p.price_fob * (1 - t.min_discount / 100))::numeric, 2)
+        FROM (
+            SELECT template_id, count(*) AS n,
+                   min(discount_percent) AS min_discount, max(discount_percent) AS max_discount
+            FROM template_tiers GROUP BY template_id
+        ) t
+        WHERE t.template_id = p.template_id AND p.pricing_mode = 'TEMPLATE'
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('product', 'max_price_per_kg')
+    op.drop_column('product', 'min_price_per_kg')
+    op.drop_column('product', 'effective_tier_count')
+    op.drop_column('product', 'price_trend_percent')
+    op.drop_column('product', 'price_trend_direction')
+    op.drop_column('product', 'price_changed_at')
+    op.drop_column('product', 'last_base_price')
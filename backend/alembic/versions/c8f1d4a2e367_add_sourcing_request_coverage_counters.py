@@ -0,0 +1,65 @@
+"""Add sourcing request coverage counters
+
+Revision ID: c8f1d4a2e367
+Revises: b5e2f8c1d493
+Create Date: 2026-10-18 18:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f1d4a2e367'
+down_revision: Union[str, None] = 'b5e2f8c1d493'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sourcing_requests', sa.Column('offer_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('sourcing_requests', sa.Column('covered_kg_pending', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('sourcing_requests', sa.Column('covered_kg_accepted', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('sourcing_requests', sa.Column('covered_value_usd', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('sourcing_requests', sa.Column('best_price', sa.Float(), nullable=True))
+    op.add_column('sourcing_requests', sa.Column('weighted_avg_price', sa.Float(), nullable=True))
+
+    # Backfill depuis les offres existantes (REJECTED exclues de la couverture)
+    op.execute("""
+        UPDATE sourcing_requests SET
+            offer_count = agg.offer_count,
+            covered_kg_pending = agg.covered_kg_pending,
+            covered_kg_accepted = agg.covered_kg_accepted,
+            covered_value_usd = agg.covered_value_usd,
+            best_price = agg.best_price
+        FROM (
+            SELECT
+                request_id,
+                COUNT(id) AS offer_count,
+                COALESCE(SUM(CASE WHEN status IS NULL OR status NOT IN ('ACCEPTED', 'REJECTED')
+                                  THEN volume_offered_kg ELSE 0 END), 0) AS covered_kg_pending,
+                COALESCE(SUM(CASE WHEN status = 'ACCEPTED' THEN volume_offered_kg ELSE 0 END), 0) AS covered_kg_accepted,
+                COALESCE(SUM(CASE WHEN status IS NULL OR status != 'REJECTED'
+                                  THEN volume_offered_kg * price_offered_usd ELSE 0 END), 0) AS covered_value_usd,
+                MIN(CASE WHEN status IS NULL OR status != 'REJECTED' THEN price_offered_usd END) AS best_price
+            FROM sourcing_offers
+            GROUP BY request_id
+        ) AS agg
+        WHERE sourcing_requests.id = agg.request_id
+    """)
+    op.execute("""
+        UPDATE sourcing_requests
+        SET weighted_avg_price = covered_value_usd / (covered_kg_pending + covered_kg_accepted)
+        WHERE covered_kg_pending + covered_kg_accepted > 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('sourcing_requests', 'weighted_avg_price')
+    op.drop_column('sourcing_requests', 'best_price')
+    op.drop_column('sourcing_requests', 'covered_value_usd')
+    op.drop_column('sourcing_requests', 'covered_kg_accepted')
+    op.drop_column('sourcing_requests', 'covered_kg_pending')
+    op.drop_column('sourcing_requests', 'offer_count')
@@ -0,0 +1,26 @@
+"""Add product pricing version
+
+Revision ID: d9f2a6c4e817
+Revises: c3e8f5a0b612
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f2a6c4e817'
+down_revision: Union[str, None] = 'c3e8f5a0b612'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('product', sa.Column('pricing_version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('product', 'pricing_version')
@@ -0,0 +1,36 @@
+"""Add product name trigram index
+
+Revision ID: e4b1c7d2f905
+Revises: d9f2a6c4e817
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b1c7d2f905'
+down_revision: Union[str, None] = 'd9f2a6c4e817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # name ILIKE '%type%' sur les produits publiés: index GIN trigramme partiel
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_product_name_trgm',
+        'product',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+        postgresql_where=sa.text("status = 'PUBLISHED'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_name_trgm', table_name='product')
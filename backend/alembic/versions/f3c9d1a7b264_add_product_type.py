@@ -0,0 +1,54 @@
+"""Add normalized product type
+
+Revision ID: f3c9d1a7b264
+Revises: e4b1c7d2f905
+Create Date: 2026-10-18 15:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d1a7b264'
+down_revision: Union[str, None] = 'e4b1c7d2f905'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Copie figée de PRODUCT_TYPE_KEYWORDS (app/services/product_types.py) au moment de la migration
+PRODUCT_TYPE_KEYWORDS = [
+    ("Vanilla", ("vanilla", "vanille", "bourbon")),
+    ("Clove", ("clove", "girofle")),
+    ("Lychee", ("lychee", "litchi")),
+    ("Pepper", ("pepper", "poivre")),
+    ("Cinnamon", ("cinnamon", "cannelle")),
+    ("Cocoa", ("cocoa", "cacao")),
+    ("Coffee", ("coffee", "cafe", "café")),
+    ("Ginger", ("ginger", "gingembre")),
+]
+
+
+def upgrade() -> None:
+    op.add_column('product', sa.Column('product_type', sa.String(), nullable=True))
+
+    # === BACKFILL ===
+    # Même règle que normalize_product_type: le premier type dont un mot-clé apparaît dans le nom
+    cases = "\n".join(
+        "WHEN " + " OR ".join(f"lower(name) LIKE '%{keyword}%'" for keyword in keywords) + f" THEN '{product_type}'"
+        for product_type, keywords in PRODUCT_TYPE_KEYWORDS
+    )
+    op.execute(f"UPDATE product SET product_type = CASE\n{cases}\nEND WHERE name IS NOT NULL")
+
+    op.create_index(
+        'ix_product_producer_type_status',
+        'product',
+        ['producer_id', 'product_type', 'status'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_producer_type_status', table_name='product')
+    op.drop_column('product', 'product_type')
@@ -0,0 +1,280 @@
+"""
+En-tête Idempotency-Key des créations (commandes, offres).
+
+L'app mobile rejoue les POST après un timeout réseau: une requête rejouée avec la
+même clé renvoie la réponse enregistrée sans ré-exécuter l'endpoint.
+
+- Les réponses sont gardées RESPONSE_TTL dans la table idempotency_keys, devant
+  laquelle chaque process garde un LRU (rejeu en O(1) sans requête SQL).
+- La clé est réservée (ligne PENDING, commitée à part) avant d'exécuter l'endpoint.
+  La réponse est écrite sur cette ligne dans la transaction de l'endpoint
+  (IdempotencyService.complete): commande et réponse enregistrée sont commitées
+  ensemble.
+- Doublons concurrents: dans un process, un verrou par clé fait attendre le second
+  appel, qui lit ensuite la réponse dans le LRU; entre workers, il attend que la
+  ligne PENDING soit complétée (409 au-delà de WAIT_SECONDS). Une réservation
+  abandonnée (worker arrêté) est reprise après LOCK_SECONDS.
+- La même clé avec un autre corps est refusée (422). Les erreurs ne sont pas
+  enregistrées: la réservation est libérée et la requête peut être rejouée.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, delete, event, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.idempotency import IdempotencyKey
+
+
+# Durée de conservation des réponses
+RESPONSE_TTL = timedelta(hours=24)
+
+# Réservation d'une requête en cours, reprise au-delà (worker arrêté en pleine requête)
+LOCK_SECONDS = 30
+
+# Attente max d'un doublon traité par un autre worker, puis 409
+WAIT_SECONDS = 10
+WAIT_POLL_SECONDS = 0.1
+
+LRU_SIZE = 10_000
+MAX_KEY_LENGTH = 255
+
+# Purge des réponses expirées, au plus une fois par intervalle et par process
+PURGE_SECONDS = 600
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+CONTEXT_KEY = "idempotency_context"
+COMPLETED_KEY = "idempotency_completed"
+PENDING_RESPONSES_KEY = "pending_idempotent_responses"
+
+CacheKey = Tuple[str, str]  # (scope, key)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def request_fingerprint(payload: Any) -> str:
+    """sha256 du corps de la requête (JSON canonique)"""
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    """LRU des réponses enregistrées: clé -> (fingerprint, status, corps, expiration monotonic)"""
+
+    def __init__(self, size: int = LRU_SIZE):
+        self.size = size
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: CacheKey) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry
+
+    def put(self, cache_key: CacheKey, fingerprint: str, status_code: int, body: Any):
+        expires = time.monotonic() + RESPONSE_TTL.total_seconds()
+        with self._lock:
+            self._entries[cache_key] = (fingerprint, status_code, body, expires)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class KeyLocks:
+    """Un verrou par clé en cours d'utilisation (libéré quand plus personne ne l'attend)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    def acquire(self, cache_key: CacheKey) -> threading.Lock:
+        with self._lock:
+            lock, users = self._locks.get(cache_key, (None, 0))
+            lock = lock or threading.Lock()
+            self._locks[cache_key] = (lock, users + 1)
+        lock.acquire()
+        return lock
+
+    def release(self, cache_key: CacheKey, lock: threading.Lock):
+        lock.release()
+        with self._lock:
+            _, users = self._locks[cache_key]
+            if users <= 1:
+                del self._locks[cache_key]
+            else:
+                self._locks[cache_key] = (lock, users - 1)
+
+
+class IdempotencyService:
+    """Exécution unique des requêtes par Idempotency-Key (table + LRU du process)."""
+
+    def __init__(self):
+        self.cache = ResponseCache()
+        self._key_locks = KeyLocks()
+        self._purged_at = 0.0
+
+    def run(self, db: Session, scope: str, key: Optional[str], payload: Any, handler: Callable[[], Any]):
+        """
+        Exécute `handler` une seule fois par (scope, key). Sans clé, l'appelle simplement.
+        Le handler doit appeler complete() avant son commit pour enregistrer sa réponse.
+        """
+        if not key:
+            return handler()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key longer than {MAX_KEY_LENGTH} characters")
+
+        cache_key = (scope, key)
+        fingerprint = request_fingerprint(payload)
+        lock = self._key_locks.acquire(cache_key)
+        try:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._replay(cached, fingerprint)
+
+            stored = self._claim(scope, key, fingerprint)
+            if stored is not None:
+                self.cache.put(cache_key, stored.fingerprint, stored.status_code, stored.response)
+                return self._replay(self.cache.get(cache_key), fingerprint)
+
+            db.info[CONTEXT_KEY] = (scope, key, fingerprint)
+            completed = False
+            try:
+                result = handler()
+                completed = db.info.get(COMPLETED_KEY) == cache_key
+                return result
+            finally:
+                db.info.pop(CONTEXT_KEY, None)
+                db.info.pop(COMPLETED_KEY, None)
+                if not completed:
+                    self._release(scope, key)
+        finally:
+            self._key_locks.release(cache_key, lock)
+
+    def complete(self, db: Session, obj: Any, schema=None, status_code: int = 200):
+        """
+        Enregistre la réponse de la requête en cours (sérialisée par `schema`) dans la
+        transaction de `db`. Sans Idempotency-Key, ne fait rien. Ne commit pas.
+        """
+        context = db.info.get(CONTEXT_KEY)
+        if context is None:
+            return
+        scope, key, fingerprint = context
+        body = jsonable_encoder(schema.model_validate(obj, from_attributes=True) if schema else obj)
+        table = IdempotencyKey.__table__
+        db.execute(
+            update(table).where(table.c.scope == scope, table.c.key == key).values(
+                state="COMPLETED", status_code=status_code, response=body, locked_until=None
+            )
+        )
+        db.info[COMPLETED_KEY] = (scope, key)
+        db.info.setdefault(PENDING_RESPONSES_KEY, []).append(((scope, key), fingerprint, status_code, body))
+
+    @staticmethod
+    def _replay(cached: tuple, fingerprint: str) -> JSONResponse:
+        stored_fingerprint, status_code, body, _ = cached
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail="Idempotency-Key already used with a different request body")
+        return JSONResponse(content=body, status_code=status_code, headers={REPLAYED_HEADER: "true"})
+
+    def _claim(self, scope: str, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """
+        Réserve la clé (None) ou retourne la réponse déjà enregistrée. Attend la fin
+        d'un doublon en cours dans un autre worker.
+        """
+        table = IdempotencyKey.__table__
+        deadline = time.monotonic() + WAIT_SECONDS
+        db = SessionLocal()
+        try:
+            self._purge_expired(db)
+            while True:
+                now = _utcnow()
+                claim = {
+                    "fingerprint": fingerprint, "state": "PENDING", "status_code": None, "response": None,
+                    "locked_until": now + timedelta(seconds=LOCK_SECONDS), "expires_at": now + RESPONSE_TTL,
+                }
+                try:
+                    db.execute(insert(table).values(scope=scope, key=key, created_at=now, **claim))
+                    db.commit()
+                    return None
+                except IntegrityError:
+                    db.rollback()
+
+                # Clé expirée ou réservation abandonnée: reprise
+                taken = db.execute(update(table).where(
+                    table.c.scope == scope, table.c.key == key,
+                    or_(table.c.expires_at < now, and_(table.c.state == "PENDING", table.c.locked_until < now))
+                ).values(**claim))
+                if taken.rowcount:
+                    db.commit()
+                    return None
+
+                stored = db.execute(
+                    select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                ).scalar_one_or_none()
+                db.rollback()
+                if stored is not None:
+                    if stored.fingerprint != fingerprint:
+                        raise HTTPException(
+                            status_code=422, detail="Idempotency-Key already used with a different request body"
+                        )
+                    if stored.state == "COMPLETED":
+                        return stored
+                if time.monotonic() > deadline:
+                    raise HTTPException(
+                        status_code=409, detail="A request with this Idempotency-Key is still being processed",
+                        headers={"Retry-After": "1"}
+                    )
+                time.sleep(WAIT_POLL_SECONDS)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _release(scope: str, key: str):
+        """Libère une réservation sans réponse (erreur): la requête pourra être rejouée"""
+        table = IdempotencyKey.__table__
+        db = SessionLocal()
+        try:
+            db.execute(delete(table).where(table.c.scope == scope, table.c.key == key, table.c.state == "PENDING"))
+            db.commit()
+        finally:
+            db.close()
+
+    def _purge_expired(self, db: Session):
+        if time.monotonic() - self._purged_at < PURGE_SECONDS:
+            return
+        self._purged_at = time.monotonic()
+        db.execute(delete(IdempotencyKey.__table__).where(IdempotencyKey.__table__.c.expires_at < _utcnow()))
+        db.commit()
+
+
+idempotency = IdempotencyService()
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_responses(session: Session):
+    for cache_key, fingerprint, status_code, body in session.info.pop(PENDING_RESPONSES_KEY, []):
+        idempotency.cache.put(cache_key, fingerprint, status_code, body)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_responses(session: Session):
+    session.info.pop(PENDING_RESPONSES_KEY, None)
+    session.info.pop(COMPLETED_KEY, None)
@@ -0,0 +1,128 @@
+"""
+Listes de commandes (GET /orders, GET /producers/me/sales, GET /producers/{id}/sales).
+
+- format=json: une page keyset sur (created_at, id), du plus récent au plus ancien,
+  servie par ix_orders_created_id / ix_orders_status_created.
+- format=ndjson | csv: export en flux de toutes les commandes filtrées (à partir du
+  curseur s'il est fourni). Les lignes sont lues par lots de EXPORT_BATCH_SIZE sur
+  un curseur serveur (yield_per) et écrites au fil de l'eau: mémoire constante quel
+  que soit le nombre de commandes.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api.pagination import encode_cursor, decode_created_cursor, created_before
+from app.db.session import SessionLocal
+from app.models.order import Order
+
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    "id", "created_at", "status", "product_id", "product_name",
+    "buyer_name", "quantity_kg", "amount", "contract_url",
+)
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+FORMAT_PATTERN = "^(json|ndjson|csv)$"
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Order.created_at est un horodatage UTC sans fuseau (datetime.utcnow)
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def order_filters(
+    status: Optional[str] = Query(None, description="PENDING, CONTRACT_GENERATED, SECURED, CONFIRMED, REJECTED"),
+    product_id: Optional[int] = None,
+    created_from: Optional[datetime] = Query(None, description="Commandes créées à partir de cette date (incluse)"),
+    created_to: Optional[datetime] = Query(None, description="Commandes créées avant cette date (exclue)"),
+) -> List:
+    """Dépendance: conditions SQL des filtres de commandes"""
+    conditions = []
+    if status:
+        conditions.append(Order.status == status.upper())
+    if product_id is not None:
+        conditions.append(Order.product_id == product_id)
+    if created_from is not None:
+        conditions.append(Order.created_at >= _naive_utc(created_from))
+    if created_to is not None:
+        conditions.append(Order.created_at < _naive_utc(created_to))
+    return conditions
+
+
+def producer_orders(producer_id: int):
+    """Condition: commandes du producteur, y compris de produits supprimés (ix_orders_producer_created)"""
+    return Order.producer_id == producer_id
+
+
+def _ordered(db: Session, stmt, conditions: List, cursor: Optional[str]):
+    for condition in conditions:
+        stmt = stmt.where(condition)
+    after = decode_created_cursor(cursor)
+    if after:
+        stmt = stmt.where(created_before(db, Order.created_at, Order.id, *after))
+    return stmt.order_by(Order.created_at.desc(), Order.id.desc())
+
+
+def orders_page(db: Session, conditions: List, limit: int, cursor: Optional[str]) -> dict:
+    # Une ligne de plus pour savoir s'il reste une page
+    orders = db.execute(_ordered(db, select(Order), conditions, cursor).limit(limit + 1)).scalars().all()
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_cursor([orders[-1].created_at.isoformat(), orders[-1].id])
+    return {"orders": orders, "next_cursor": next_cursor}
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _export_rows(conditions: List, cursor: Optional[str], output: str) -> Iterator[str]:
+    # Session propre au flux: elle vit jusqu'à la dernière ligne envoyée
+    db = SessionLocal()
+    try:
+        columns = [getattr(Order, name) for name in EXPORT_COLUMNS]
+        stmt = _ordered(db, select(*columns), conditions, cursor)
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if output == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+        for rows in result.partitions():
+            if output == "csv":
+                writer.writerows([_export_value(value) for value in row] for row in rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps({name: _export_value(value) for name, value in zip(EXPORT_COLUMNS, row)}))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if output == "csv" and buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def orders_export(conditions: List, cursor: Optional[str], output: str, filename: str) -> StreamingResponse:
+    # Curseur invalide: 400 avant d'ouvrir le flux
+    decode_created_cursor(cursor)
+    return StreamingResponse(
+        _export_rows(conditions, cursor, output),
+        media_type=EXPORT_MEDIA_TYPES[output],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{output}"'},
+    )
@@ -0,0 +1,56 @@
+"""
+Curseurs opaques pour la pagination keyset.
+
+Un curseur encode les valeurs de la clé de tri de la dernière ligne renvoyée
+(base64 url-safe d'une liste JSON). Le client le renvoie tel quel pour obtenir
+la page suivante.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, literal, or_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """Décode un curseur de `size` valeurs (None si absent), 400 s'il est invalide"""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_created_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Curseur (created_at ISO, id) -> (datetime, int), None si absent, 400 s'il est invalide"""
+    after = decode_cursor(cursor, 2)
+    if not after:
+        return None
+    try:
+        return datetime.fromisoformat(after[0]), int(after[1])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def created_before(db: Session, created_column, id_column, created_at: datetime, row_id: int):
+    """Condition keyset "après (created_at, id)" pour un tri (created_at DESC, id DESC)"""
+    row_created, cursor_created = created_column, literal(created_at, created_column.type)
+    if db.get_bind().dialect.name != "postgresql":
+        # SQLite stocke des chaînes: CURRENT_TIMESTAMP (insertions hors ORM) n'a pas de microsecondes
+        row_created, cursor_created = func.julianday(row_created), func.julianday(cursor_created)
+    return or_(
+        row_created < cursor_created,
+        and_(row_created == cursor_created, id_column < row_id)
+    )
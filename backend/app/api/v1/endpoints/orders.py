@@ -1,57 +1,85 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
 from sqlalchemy.orm import Session
-from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.order import OrderCreate, OrderResponse, OrderPage
 from app.services.contract_service import contract_service
+from app.services.market_stats import market_stats, ORDER_DEAL_STATUSES
+from app.services.stock_reservation import order_reserved_units, reserved_units, stock_reservation
+from app.services.outbox import outbox, trace_event_payload
+from app.services.sales_summary import sales_summary
 from app.api import deps
+from app.api.idempotency import idempotency
+from app.api.order_listing import FORMAT_PATTERN, order_filters, orders_export, orders_page
 from app.models.order import Order
 from app.models.product import Product
 
 router = APIRouter()
 
+def record_deal_price(db: Session, order: Order, previous_status: str):
+    """Prix conclu (amount / kg) ajouté aux statistiques de marché au commit, une fois par commande"""
+    if previous_status in ORDER_DEAL_STATUSES or not order.amount or not order.quantity_kg:
+        return
+    product = db.query(Product.product_type, Product.grade).filter(Product.id == order.product_id).first()
+    if product:
+        market_stats.record_after_commit(db, product.product_type, product.grade, order.amount / order.quantity_kg)
+
 @router.post("/", response_model=OrderResponse)
-def create_order(order_in: OrderCreate, db: Session = Depends(deps.get_db)):
-    # Verify product exists
-    product = db.query(Product).filter(Product.id == order_in.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    # Check Stock
-    if product.quantity_available < order_in.quantity_kg:
+def create_order(
+    order_in: OrderCreate,
+    db: Session = Depends(deps.get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Reserve stock and create a PENDING order.
+    A retry with the same Idempotency-Key returns the first response (no second order).
+    """
+    return idempotency.run(db, "orders.create", idempotency_key, order_in, lambda: place_order(order_in, db))
+
+def place_order(order_in: OrderCreate, db: Session):
+    if order_in.quantity_kg <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+
+    # Reserve Stock: one conditional UPDATE (check + decrement are atomic, no oversell)
+    reserved = stock_reservation.reserve(db, order_in.product_id, order_in.quantity_kg)
+    if reserved is None:
+        db.rollback()
+        if not db.query(Product.id).filter(Product.id == order_in.product_id).first():
+            raise HTTPException(status_code=404, detail="Product not found")
         raise HTTPException(status_code=400, detail="Product Sold Out or Insufficient Stock")
 
-    product_name = product.name 
-    
     # Create Order
     db_order = Order(
         product_id=order_in.product_id,
-        product_name=product_name,
+        producer_id=reserved.producer_id,
+        product_name=reserved.name,
         amount=order_in.offer_price_total,
         quantity_kg=order_in.quantity_kg,
+        reserved_units=reserved_units(order_in.quantity_kg),
         status="PENDING",
         buyer_name=order_in.buyer_name
     )
     
-    # Decrement Stock (Simplified transactional logic)
-    product.quantity_available -= int(order_in.quantity_kg)
-    
     db.add(db_order)
+    db.flush()
+    sales_summary.record_order(db, db_order)
+
+    # Side effects run after commit (outbox): Traceability "DEAL" event + producer notification
+    outbox.enqueue(db, "trace_event", trace_event_payload(
+        product_id=order_in.product_id,
+        stage="DEAL",
+        status="VALIDATED",
+        description=f"Offer Accepted by {order_in.buyer_name}. Volume: {order_in.quantity_kg}kg @ ${order_in.offer_price_total}",
+        created_by="System (Smart Contract)"
+    ))
+    if reserved.producer_id:
+        outbox.enqueue(db, "notification", {
+            "producer_id": reserved.producer_id,
+            "message": f"New order #{db_order.id}: {order_in.quantity_kg}kg of {reserved.name} by {order_in.buyer_name}",
+        })
+
+    idempotency.complete(db, db_order, OrderResponse)
     db.commit()
     db.refresh(db_order)
-    
-    # Traceability: Auto-Generate "DEAL" Event
-    try:
-        from app.models.producer import TraceabilityEvent
-        deal_event = TraceabilityEvent(
-            product_id=order_in.product_id,
-            stage="DEAL",
-            status="VALIDATED",
-            description=f"Offer Accepted by {order_in.buyer_name}. Volume: {order_in.quantity_kg}kg @ ${order_in.offer_price_total}",
-            created_by="System (Smart Contract)"
-        )
-        db.add(deal_event)
-        db.commit()
-    except Exception as e:
-        print(f"Error creating deal event: {e}")
 
     return db_order
 
@@ -70,7 +98,7 @@ def generate_contract(order_id: int, db: Session = Depends(deps.get_db)):
     )
     
     order.contract_url = pdf_url
-    order.status = "CONTRACT_GENERATED"
+    sales_summary.set_order_status(db, order, "CONTRACT_GENERATED")
     db.commit()
     db.refresh(order)
     
@@ -82,19 +110,29 @@ def simulate_payment(order_id: int, db: Session = Depends(deps.get_db)):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    order.status = "SECURED"
+    previous_status = sales_summary.set_order_status(db, order, "SECURED")
+    record_deal_price(db, order, previous_status)
     db.commit()
     db.refresh(order)
     
     return order
 
-@router.get("/", response_model=list[OrderResponse])
-def list_orders(db: Session = Depends(deps.get_db)):
+@router.get("/", response_model=OrderPage)
+def list_orders(
+    conditions: list = Depends(order_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    output: str = Query("json", alias="format", pattern=FORMAT_PATTERN,
+                        description="json: one page; ndjson / csv: stream every matching order"),
+    db: Session = Depends(deps.get_db)
+):
     """
-    List all orders (MVP: No User Filtering yet).
+    List orders (MVP: No User Filtering yet), newest first, keyset-paginated on
+    (created_at, id). format=ndjson or csv streams the whole filtered export.
     """
-    orders = db.query(Order).order_by(Order.id.desc()).all()
-    return orders
+    if output != "json":
+        return orders_export(conditions, cursor, output, "orders")
+    return orders_page(db, conditions, limit, cursor)
 
 @router.get("/{order_id}", response_model=OrderResponse)
 def get_order(order_id: int, db: Session = Depends(deps.get_db)):
@@ -150,7 +188,10 @@ def accept_order(order_id: int, db: Session = Depends(deps.get_db)):
         # For simplicity MVP, we allow transition from PENDING/SECURED to CONFIRMED.
         pass
 
-    order.status = "CONFIRMED"
+    previous_status = sales_summary.set_order_status(db, order, "CONFIRMED")
+    record_deal_price(db, order, previous_status)
+    if previous_status != "CONFIRMED":
+        outbox.enqueue(db, "producer_transaction", {"product_id": order.product_id, "order_id": order.id})
     db.commit()
     db.refresh(order)
     return order
@@ -165,18 +206,13 @@ def reject_order(order_id: int, db: Session = Depends(deps.get_db)):
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    if order.status == "REJECTED":
+    # 1. Update Status (conditional: a concurrent reject cannot refund twice)
+    if sales_summary.set_order_status(db, order, "REJECTED") == "REJECTED":
+        db.rollback()
         raise HTTPException(status_code=400, detail="Already rejected")
 
-    # 1. Update Status
-    order.status = "REJECTED"
-    
-    # 2. Refund Stock
-    product = db.query(Product).filter(Product.id == order.product_id).first()
-    if product:
-        # Refund the actual quantity that was reserved
-        refund_quantity = int(order.quantity_kg) if order.quantity_kg else 10
-        product.quantity_available += refund_quantity 
+    # 2. Refund Stock: the quantity that was reserved, with the same relative UPDATE
+    stock_reservation.release(db, order.product_id, order_reserved_units(order))
     
     db.commit()
     db.refresh(order)
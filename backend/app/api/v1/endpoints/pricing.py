@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response, UploadFile, File
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import desc, func, select, insert, case, literal, cast, Numeric
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from typing import List, Optional
 from datetime import datetime
+import math
+import numpy as np
 
 from app.api import deps
 from app.models.product import Product
@@ -16,12 +19,28 @@ from app.schemas.pricing import (
     PriceTierResponse,
     PricingModeUpdate,
     CalculatedPrice,
-    TierApplied,
-    NextTierInfo,
-    PriceTrendInfo,
+    BatchQuoteRequest,
+    BatchQuoteResponse,
+    QuoteError,
+    PriceBreakpoint,
+    PriceCurveResponse,
     PriceTierHistoryResponse,
     PriceComparisonResponse,
+    BatchPriceComparisonRequest,
+    BatchPriceComparisonResponse,
+    PricingSimulationRequest,
+    PricingSimulationResponse,
+    TierImportResponse,
 )
+from app.services.pricing_engine import (
+    pricing_engine,
+    get_effective_tiers,
+    load_pricing_product,
+    refresh_pricing_state,
+)
+from app.services.price_history_service import price_history_service
+from app.services.pricing_simulator import pricing_simulator
+from app.services.tier_import_service import tier_import_service, SUPPORTED_FORMATS
 
 router = APIRouter()
 
@@ -66,57 +85,165 @@ def create_price_history_snapshot(db: Session, product: Product, change_reason:
         changed_by=changed_by
     )
     db.add(history)
+
+    # Projection tarifaire: le snapshot devient la référence de tendance
+    product.last_base_price = product.price_fob
+    product.price_changed_at = func.now()
     return history
 
 
-def get_effective_tiers(product: Product) -> List[dict]:
-    """Retourne les paliers effectifs (calculés) pour un produit"""
-    if product.pricing_mode == "SINGLE":
-        return [{
-            "min_quantity_kg": product.moq_kg,
-            "max_quantity_kg": None,
-            "price_per_kg": product.price_fob,
-            "position": 0,
-            "discount_percent": 0
-        }]
-    elif product.pricing_mode == "TIERED":
-        return [
-            {
-                "min_quantity_kg": t.min_quantity_kg,
-                "max_quantity_kg": t.max_quantity_kg,
-                "price_per_kg": t.price_per_kg,
-                "position": t.position,
-                "discount_percent": round((1 - t.price_per_kg / product.price_fob) * 100, 2) if product.price_fob > 0 else 0
-            }
-            for t in sorted(product.price_tiers, key=lambda x: x.position)
-        ]
-    elif product.pricing_mode == "TEMPLATE" and product.price_template:
-        return [
-            {
-                "min_quantity_kg": t.min_quantity_kg,
-                "max_quantity_kg": t.max_quantity_kg,
-                "price_per_kg": round(product.price_fob * (1 - t.discount_percent / 100), 2),
-                "position": t.position,
-                "discount_percent": t.discount_percent
-            }
-            for t in sorted(product.price_template.tiers, key=lambda x: x.position)
-        ]
-    return []
-
-
-def find_applicable_tier(tiers: List[dict], quantity_kg: float) -> Optional[dict]:
-    """Trouve le palier applicable pour une quantité donnée"""
-    sorted_tiers = sorted(tiers, key=lambda t: t["min_quantity_kg"], reverse=True)
-    for tier in sorted_tiers:
-        if quantity_kg >= tier["min_quantity_kg"]:
-            if tier["max_quantity_kg"] is None or quantity_kg <= tier["max_quantity_kg"]:
-                return tier
-    # Fallback au premier palier si quantité trop petite
-    if tiers:
-        return sorted(tiers, key=lambda t: t["min_quantity_kg"])[0]
+def create_template_history_snapshots(db: Session, template_id: int, change_reason: str = None, changed_by: str = None):
+    """
+    Crée en une seule instruction le snapshot de tous les produits liés à un template,
+    puis met à jour leur projection tarifaire en un UPDATE.
+    Sur PostgreSQL: INSERT ... SELECT, le JSON des paliers est construit par la base.
+    Ailleurs (SQLite en dev): un seul executemany.
+    """
+    products = Product.__table__
+    template_tiers = TemplateTier.__table__
+    history = PriceTierHistory.__table__
+
+    if db.get_bind().dialect.name == "postgresql":
+        tier_json = func.json_build_object(
+            "min_quantity_kg", template_tiers.c.min_quantity_kg,
+            "max_quantity_kg", template_tiers.c.max_quantity_kg,
+            "discount_percent", template_tiers.c.discount_percent,
+            "computed_price", products.c.price_fob * (1 - template_tiers.c.discount_percent / 100),
+            "position", template_tiers.c.position,
+        )
+        tiers_snapshot = select(
+            func.json_agg(aggregate_order_by(tier_json, template_tiers.c.position))
+        ).where(template_tiers.c.template_id == products.c.template_id).scalar_subquery()
+
+        snapshot_rows = select(
+            products.c.id,
+            products.c.pricing_mode,
+            products.c.price_fob,
+            case((products.c.pricing_mode == "TEMPLATE", tiers_snapshot), else_=None),
+            products.c.template_id,
+            literal(change_reason),
+            literal(changed_by),
+        ).where(products.c.template_id == template_id)
+
+        db.execute(insert(history).from_select(
+            ["product_id", "pricing_mode", "base_price_fob", "tiers_snapshot",
+             "template_id_snapshot", "change_reason", "changed_by"],
+            snapshot_rows
+        ))
+    else:
+        _insert_template_history_rows(db, template_id, change_reason, changed_by)
+
+    # Projection tarifaire: le snapshot devient la référence de tendance
+    db.execute(
+        products.update()
+        .where(products.c.template_id == template_id)
+        .values(
+            last_base_price=products.c.price_fob,
+            price_changed_at=func.now(),
+            price_trend_direction=None,
+            price_trend_percent=None,
+            pricing_version=products.c.pricing_version + 1,
+        )
+    )
+
+
+def _insert_template_history_rows(db: Session, template_id: int, change_reason: str, changed_by: str):
+    products = Product.__table__
+    template_tiers = TemplateTier.__table__
+
+    tiers = db.execute(
+        select(template_tiers.c.min_quantity_kg, template_tiers.c.max_quantity_kg,
+               template_tiers.c.discount_percent, template_tiers.c.position)
+        .where(template_tiers.c.template_id == template_id)
+        .order_by(template_tiers.c.position)
+    ).all()
+    linked = db.execute(
+        select(products.c.id, products.c.pricing_mode, products.c.price_fob)
+        .where(products.c.template_id == template_id)
+    ).all()
+    if not linked:
+        return
+
+    db.execute(insert(PriceTierHistory.__table__), [
+        {
+            "product_id": product_id,
+            "pricing_mode": pricing_mode,
+            "base_price_fob": price_fob,
+            "tiers_snapshot": [
+                {
+                    "min_quantity_kg": t.min_quantity_kg,
+                    "max_quantity_kg": t.max_quantity_kg,
+                    "discount_percent": t.discount_percent,
+                    "computed_price": price_fob * (1 - t.discount_percent / 100),
+                    "position": t.position
+                }
+                for t in tiers
+            ] if pricing_mode == "TEMPLATE" else None,
+            "template_id_snapshot": template_id,
+            "change_reason": change_reason,
+            "changed_by": changed_by,
+        }
+        for product_id, pricing_mode, price_fob in linked
+    ])
+
+
+def refresh_template_pricing_state(db: Session, template_id: int):
+    """Met à jour en une instruction les stats de paliers de tous les produits liés au template"""
+    tier_count, min_discount, max_discount = db.query(
+        func.count(TemplateTier.id),
+        func.min(TemplateTier.discount_percent),
+        func.max(TemplateTier.discount_percent)
+    ).filter(TemplateTier.template_id == template_id).one()
+
+    products = Product.__table__
+    if tier_count:
+        values = dict(
+            effective_tier_count=tier_count,
+            min_price_per_kg=func.round(cast(products.c.price_fob * (1 - max_discount / 100), Numeric), 2),
+            max_price_per_kg=func.round(cast(products.c.price_fob * (1 - min_discount / 100), Numeric), 2),
+        )
+    else:
+        values = dict(effective_tier_count=0, min_price_per_kg=None, max_price_per_kg=None)
+
+    db.execute(
+        products.update()
+        .where(products.c.template_id == template_id, products.c.pricing_mode == "TEMPLATE")
+        .values(**values)
+    )
+
+
+def pricing_version(db: Session, product_id: int) -> Optional[int]:
+    """pricing_version courante du produit, lue par clé primaire (None si le produit n'existe pas)"""
+    return db.query(Product.pricing_version).filter(Product.id == product_id).scalar()
+
+
+def pricing_etag(product_id: int, version: int) -> str:
+    """ETag fort d'une grille tarifaire (change à chaque écriture de prix du produit)"""
+    return f'"{product_id}-{version}"'
+
+
+def conditional_pricing_response(request: Request, response: Response, product_id: int, version: int) -> Optional[Response]:
+    """
+    GET conditionnel sur la pricing_version lue en base: retourne une 304 si le client
+    a l'ETag courant (If-None-Match), sinon pose l'ETag sur la réponse et retourne None.
+    """
+    etag = pricing_etag(product_id, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in client_etags or etag in client_etags:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
     return None
 
 
+def count_template_products(db: Session, template_id: int) -> int:
+    return db.query(func.count(Product.id)).filter(Product.template_id == template_id).scalar()
+
+
 # ═══════════════════════════════════════════════════════════
 # TEMPLATES ENDPOINTS (Option B)
 # ═══════════════════════════════════════════════════════════
@@ -237,9 +364,8 @@ def update_price_template(
     if not db_template:
         raise HTTPException(status_code=404, detail="Template non trouvé")
 
-    # Créer un snapshot historique pour tous les produits liés
-    for product in db_template.products:
-        create_price_history_snapshot(db, product, "Modification du template", "System")
+    # Créer un snapshot historique pour tous les produits liés (une seule instruction)
+    create_template_history_snapshots(db, template_id, "Modification du template", "System")
 
     # Mettre à jour les champs simples
     if template_in.name is not None:
@@ -272,8 +398,12 @@ def update_price_template(
             )
             db.add(db_tier)
 
+        db.flush()
+        refresh_template_pricing_state(db, template_id)
+
     db.commit()
     db.refresh(db_template)
+    pricing_engine.invalidate_template(template_id)
 
     return PriceTierTemplateResponse(
         id=db_template.id,
@@ -291,7 +421,7 @@ def update_price_template(
             }
             for t in db_template.tiers
         ],
-        products_count=len(db_template.products),
+        products_count=count_template_products(db, template_id),
         created_at=db_template.created_at,
         updated_at=db_template.updated_at
     )
@@ -330,7 +460,7 @@ def set_product_price_tiers(
     db: Session = Depends(deps.get_db)
 ):
     """Définir les paliers personnalisés pour un produit (remplace les existants)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = load_pricing_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
@@ -359,7 +489,12 @@ def set_product_price_tiers(
         db.add(db_tier)
         created_tiers.append(db_tier)
 
+    db.flush()
+    db.expire(product, ["price_tiers"])
+    refresh_pricing_state(product)
+
     db.commit()
+    pricing_engine.invalidate(product_id)
 
     # Refresh pour avoir les IDs
     for tier in created_tiers:
@@ -371,22 +506,30 @@ def set_product_price_tiers(
 @router.get("/products/{product_id}/price-tiers")
 def get_product_price_tiers(
     product_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db)
 ):
     """Récupérer les paliers d'un produit (calculés si template)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    version = pricing_version(db, product_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
-    tiers = get_effective_tiers(product)
+    not_modified = conditional_pricing_response(request, response, product_id, version)
+    if not_modified:
+        return not_modified
+
+    compiled = pricing_engine.get(db, product_id, version)
+    if not compiled:
+        raise HTTPException(status_code=404, detail="Produit non trouvé")
 
     return {
         "product_id": product_id,
-        "pricing_mode": product.pricing_mode,
-        "base_price_fob": product.price_fob,
-        "moq_kg": product.moq_kg,
-        "template_id": product.template_id,
-        "tiers": tiers
+        "pricing_mode": compiled.pricing_mode,
+        "base_price_fob": compiled.base_price,
+        "moq_kg": compiled.moq_kg,
+        "template_id": compiled.template_id,
+        "tiers": compiled.tiers
     }
 
 
@@ -396,7 +539,7 @@ def delete_product_price_tiers(
     db: Session = Depends(deps.get_db)
 ):
     """Supprimer tous les paliers personnalisés et repasser en mode SINGLE"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = load_pricing_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
@@ -409,8 +552,10 @@ def delete_product_price_tiers(
     # Repasser en mode SINGLE
     product.pricing_mode = "SINGLE"
     product.template_id = None
+    refresh_pricing_state(product)
 
     db.commit()
+    pricing_engine.invalidate(product_id)
 
     return {"status": "deleted", "product_id": product_id, "pricing_mode": "SINGLE"}
 
@@ -422,13 +567,16 @@ def update_product_pricing_mode(
     db: Session = Depends(deps.get_db)
 ):
     """Changer le mode de tarification d'un produit"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = load_pricing_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
     # Si mode TEMPLATE, vérifier que le template existe et appartient au même producteur
+    template = None
     if mode_in.mode == "TEMPLATE":
-        template = db.query(PriceTierTemplate).filter(PriceTierTemplate.id == mode_in.template_id).first()
+        template = db.query(PriceTierTemplate).options(
+            joinedload(PriceTierTemplate.tiers)
+        ).filter(PriceTierTemplate.id == mode_in.template_id).first()
         if not template:
             raise HTTPException(status_code=404, detail="Template non trouvé")
         if product.producer_id and template.producer_id != product.producer_id:
@@ -439,18 +587,51 @@ def update_product_pricing_mode(
 
     # Mettre à jour
     product.pricing_mode = mode_in.mode
-    product.template_id = mode_in.template_id if mode_in.mode == "TEMPLATE" else None
+    product.price_template = template
+    refresh_pricing_state(product)
 
-    db.commit()
-    db.refresh(product)
-
-    return {
+    # Réponse construite avant le commit (qui expire l'instance): pas de rechargement
+    response = {
         "product_id": product_id,
         "pricing_mode": product.pricing_mode,
-        "template_id": product.template_id,
+        "template_id": template.id if template else None,
         "effective_tiers": get_effective_tiers(product)
     }
 
+    db.commit()
+    pricing_engine.invalidate(product_id)
+
+    return response
+
+
+@router.post("/producers/{producer_id}/price-tiers/import", response_model=TierImportResponse)
+def import_price_tiers(
+    producer_id: int,
+    file: UploadFile = File(..., description="CSV ou NDJSON: product_id, min_kg, max_kg, price_per_kg"),
+    format: Optional[str] = Query(None, description="csv ou ndjson (déduit du nom de fichier sinon)"),
+    dry_run: bool = Query(False, description="Valider sans importer"),
+    db: Session = Depends(deps.get_db)
+):
+    """Importer en masse les paliers personnalisés des produits d'un producteur (remplace les existants)"""
+    producer = db.query(ProducerProfile).filter(ProducerProfile.id == producer_id).first()
+    if not producer:
+        raise HTTPException(status_code=404, detail="Producteur non trouvé")
+
+    fmt = format or tier_import_service.detect_format(file.filename, file.content_type)
+    if fmt not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail="Format non supporté (csv ou ndjson)")
+
+    result = tier_import_service.import_tiers(db, file.file, fmt, producer_id=producer_id, dry_run=dry_run)
+    if dry_run:
+        db.rollback()
+        return result
+
+    db.commit()
+    for product_id in result["product_ids"]:
+        pricing_engine.invalidate(product_id)
+
+    return result
+
 
 # ═══════════════════════════════════════════════════════════
 # PRICE CALCULATION ENDPOINT
@@ -459,94 +640,133 @@ def update_product_pricing_mode(
 @router.get("/products/{product_id}/calculate-price", response_model=CalculatedPrice)
 def calculate_price(
     product_id: int,
+    request: Request,
+    response: Response,
     quantity_kg: float = Query(..., gt=0, description="Quantité en kg"),
     db: Session = Depends(deps.get_db)
 ):
     """Calculer le prix pour une quantité donnée"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    version = pricing_version(db, product_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Produit non trouvé")
+
+    # Même URL et même version: même réponse (les 400 ne portent pas d'ETag)
+    not_modified = conditional_pricing_response(request, response, product_id, version)
+    if not_modified:
+        return not_modified
+
+    compiled = pricing_engine.get(db, product_id, version)
+    if not compiled:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
     # Vérifier le MOQ
-    if quantity_kg < product.moq_kg:
+    if quantity_kg < compiled.moq_kg:
         raise HTTPException(
             status_code=400,
-            detail=f"Quantité minimum: {product.moq_kg} kg"
+            detail=f"Quantité minimum: {compiled.moq_kg} kg"
         )
 
-    # Obtenir les paliers effectifs
-    tiers = get_effective_tiers(product)
-    if not tiers:
-        # Fallback au prix de base
-        return CalculatedPrice(
-            product_id=product_id,
-            quantity_kg=quantity_kg,
-            pricing_mode=product.pricing_mode,
-            price_per_kg=product.price_fob,
-            total=round(product.price_fob * quantity_kg, 2)
-        )
+    return pricing_engine.quote(compiled, quantity_kg)
 
-    # Trouver le palier applicable
-    applicable_tier = find_applicable_tier(tiers, quantity_kg)
-    if not applicable_tier:
-        applicable_tier = tiers[0]
-
-    price_per_kg = applicable_tier["price_per_kg"]
-    total = round(price_per_kg * quantity_kg, 2)
-
-    # Calculer les économies vs prix de base
-    base_price = product.price_fob
-    savings_vs_base = None
-    if base_price > 0 and price_per_kg < base_price:
-        savings_amount = round((base_price - price_per_kg) * quantity_kg, 2)
-        savings_percent = round((1 - price_per_kg / base_price) * 100, 2)
-        savings_vs_base = {"percent": savings_percent, "amount": savings_amount}
-
-    # Trouver le prochain palier
-    next_tier = None
-    sorted_tiers = sorted(tiers, key=lambda t: t["min_quantity_kg"])
-    current_idx = next((i for i, t in enumerate(sorted_tiers) if t["position"] == applicable_tier["position"]), -1)
-    if current_idx >= 0 and current_idx < len(sorted_tiers) - 1:
-        next_tier_data = sorted_tiers[current_idx + 1]
-        extra_quantity = next_tier_data["min_quantity_kg"] - quantity_kg
-        extra_savings = round((price_per_kg - next_tier_data["price_per_kg"]) * next_tier_data["min_quantity_kg"], 2)
-        next_tier = NextTierInfo(
-            at_quantity_kg=next_tier_data["min_quantity_kg"],
-            price_per_kg=next_tier_data["price_per_kg"],
-            extra_savings_total=extra_savings
-        )
 
-    # Tendance des prix (historique)
-    price_trend = None
-    last_history = db.query(PriceTierHistory).filter(
-        PriceTierHistory.product_id == product_id
-    ).order_by(desc(PriceTierHistory.changed_at)).first()
-
-    if last_history and last_history.base_price_fob != product.price_fob:
-        change_percent = round((product.price_fob - last_history.base_price_fob) / last_history.base_price_fob * 100, 2)
-        price_trend = PriceTrendInfo(
-            direction="down" if change_percent < 0 else "up" if change_percent > 0 else "stable",
-            percent=abs(change_percent),
-            since=last_history.changed_at
+MAX_CURVE_POINTS = 5000
+
+
+@router.get("/products/{product_id}/price-curve", response_model=PriceCurveResponse)
+def get_price_curve(
+    product_id: int,
+    from_kg: float = Query(..., alias="from", gt=0, description="Quantité de départ (kg)"),
+    to_kg: float = Query(..., alias="to", gt=0, description="Quantité de fin (kg)"),
+    step: float = Query(1.0, gt=0, description="Pas en kg"),
+    db: Session = Depends(deps.get_db)
+):
+    """Courbe prix/kg, total et économies sur une plage de quantités (sliders)"""
+    if not all(math.isfinite(value) for value in (from_kg, to_kg, step)):
+        raise HTTPException(status_code=400, detail="'from', 'to' et 'step' doivent être des nombres finis")
+
+    compiled = pricing_engine.get(db, product_id)
+    if not compiled:
+        raise HTTPException(status_code=404, detail="Produit non trouvé")
+
+    if from_kg < compiled.moq_kg:
+        raise HTTPException(status_code=400, detail=f"Quantité minimum: {compiled.moq_kg} kg")
+    if to_kg < from_kg:
+        raise HTTPException(status_code=400, detail="'to' doit être supérieur ou égal à 'from'")
+
+    # Comparé avant int(): un pas minuscule donne un nombre de points infini
+    span = (to_kg - from_kg) / step + 1e-9
+    if not math.isfinite(span) or span >= MAX_CURVE_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maximum {MAX_CURVE_POINTS} points par courbe (augmentez 'step')"
         )
+    n_points = int(span) + 1
 
-    return CalculatedPrice(
+    quantities = np.round(from_kg + step * np.arange(n_points, dtype=float), 6)
+    curve = pricing_engine.curve(compiled, quantities)
+
+    return PriceCurveResponse(
         product_id=product_id,
-        quantity_kg=quantity_kg,
-        pricing_mode=product.pricing_mode,
-        tier_applied=TierApplied(
-            min_quantity_kg=applicable_tier["min_quantity_kg"],
-            max_quantity_kg=applicable_tier.get("max_quantity_kg"),
-            position=applicable_tier["position"]
-        ),
-        price_per_kg=price_per_kg,
-        total=total,
-        savings_vs_base=savings_vs_base,
-        next_tier=next_tier,
-        price_trend=price_trend
+        pricing_mode=compiled.pricing_mode,
+        base_price_fob=compiled.base_price,
+        breakpoints=[
+            PriceBreakpoint(at_quantity_kg=at, price_per_kg=price, position=position)
+            for at, price, position in zip(compiled.mins, compiled.prices, compiled.positions)
+        ],
+        **curve
     )
 
 
+@router.post("/quotes", response_model=BatchQuoteResponse)
+def calculate_prices_batch(
+    batch_in: BatchQuoteRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """Calculer les prix de plusieurs couples (produit, quantité) en un seul appel"""
+    compiled_by_id = pricing_engine.get_many(db, (item.product_id for item in batch_in.items))
+
+    quotes = []
+    errors = []
+    for index, item in enumerate(batch_in.items):
+        compiled = compiled_by_id.get(item.product_id)
+        if not compiled:
+            errors.append(QuoteError(
+                index=index, product_id=item.product_id, quantity_kg=item.quantity_kg,
+                status_code=404, detail="Produit non trouvé"
+            ))
+            continue
+        if item.quantity_kg < compiled.moq_kg:
+            errors.append(QuoteError(
+                index=index, product_id=item.product_id, quantity_kg=item.quantity_kg,
+                status_code=400, detail=f"Quantité minimum: {compiled.moq_kg} kg"
+            ))
+            continue
+        quotes.append(pricing_engine.quote(compiled, item.quantity_kg))
+
+    return BatchQuoteResponse(quotes=quotes, errors=errors)
+
+
+# ═══════════════════════════════════════════════════════════
+# SIMULATION ENDPOINT
+# ═══════════════════════════════════════════════════════════
+
+@router.post("/producers/{producer_id}/simulate", response_model=PricingSimulationResponse)
+def simulate_producer_pricing(
+    producer_id: int,
+    simulation_in: PricingSimulationRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Simuler un changement de prix sur tout le catalogue d'un producteur (aucune écriture):
+    courbes avant / après par produit et impact sur le chiffre d'affaires des commandes passées
+    """
+    producer = db.query(ProducerProfile).filter(ProducerProfile.id == producer_id).first()
+    if not producer:
+        raise HTTPException(status_code=404, detail="Producteur non trouvé")
+
+    return pricing_simulator.simulate(db, producer_id, simulation_in)
+
+
 # ═══════════════════════════════════════════════════════════
 # PRICE HISTORY ENDPOINTS
 # ═══════════════════════════════════════════════════════════
@@ -554,14 +774,21 @@ def calculate_price(
 @router.get("/products/{product_id}/price-history", response_model=List[PriceTierHistoryResponse])
 def get_product_price_history(
     product_id: int,
+    request: Request,
+    response: Response,
     limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(deps.get_db)
 ):
     """Récupérer l'historique des changements de prix d'un produit"""
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    # Chaque snapshot historique accompagne une écriture de prix: la version tarifaire suffit comme ETag
+    version = pricing_version(db, product_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
+    not_modified = conditional_pricing_response(request, response, product_id, version)
+    if not_modified:
+        return not_modified
+
     history = db.query(PriceTierHistory).filter(
         PriceTierHistory.product_id == product_id
     ).order_by(desc(PriceTierHistory.changed_at)).limit(limit).all()
@@ -581,12 +808,10 @@ def compare_product_price(
         raise HTTPException(status_code=404, detail="Produit non trouvé")
 
     # Trouver le snapshot le plus proche de la date demandée
-    history = db.query(PriceTierHistory).filter(
-        PriceTierHistory.product_id == product_id,
-        PriceTierHistory.changed_at <= from_date
-    ).order_by(desc(PriceTierHistory.changed_at)).first()
+    history = price_history_service.as_of(db, product_id, from_date)
 
-    if not history:
+    # Prix de référence nul: pas de variation en pourcentage, traité comme absent
+    if not history or not history.base_price_fob:
         raise HTTPException(status_code=404, detail="Pas d'historique disponible pour cette date")
 
     change_percent = round((product.price_fob - history.base_price_fob) / history.base_price_fob * 100, 2)
@@ -598,3 +823,29 @@ def compare_product_price(
         price_change_percent=change_percent,
         compared_to_date=history.changed_at
     )
+
+
+@router.post("/price-history/compare", response_model=BatchPriceComparisonResponse)
+def compare_products_price(
+    compare_in: BatchPriceComparisonRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """Comparer le prix actuel de plusieurs produits avec une même date passée (une seule requête)"""
+    snapshots = price_history_service.as_of_many(db, compare_in.product_ids, compare_in.from_date)
+
+    comparisons = []
+    missing = []
+    for product_id in dict.fromkeys(compare_in.product_ids):
+        row = snapshots.get(product_id)
+        if not row or not row.base_price_fob:
+            missing.append(product_id)
+            continue
+        comparisons.append(PriceComparisonResponse(
+            product_id=product_id,
+            current_base_price=row.current_price,
+            previous_base_price=row.base_price_fob,
+            price_change_percent=round((row.current_price - row.base_price_fob) / row.base_price_fob * 100, 2),
+            compared_to_date=row.changed_at
+        ))
+
+    return BatchPriceComparisonResponse(comparisons=comparisons, missing_product_ids=missing)
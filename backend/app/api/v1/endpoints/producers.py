@@ -1,19 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from typing import List, Optional
 from app.api import deps
+from app.api.order_listing import FORMAT_PATTERN, order_filters, orders_export, orders_page, producer_orders
 from app.models.producer import ProducerProfile
 from app.models.product import Product
-from app.models.order import Order
-from app.schemas.order import OrderResponse
+from app.schemas.order import OrderPage, ProducerSalesSummaryResponse
+from app.schemas.sourcing import SmartMatchResponse
+from app.services.smart_match import smart_match, cert_spellings
+from app.services.sales_summary import sales_summary
+from app.db.jsonb import json_contains_any_variant
 
 router = APIRouter()
 
 @router.get("/")
-def list_producers(db: Session = Depends(deps.get_db)):
+def list_producers(
+    badges: Optional[List[str]] = Query(None, description="Le producteur a tous ces badges (BIO = ORGANIC)"),
+    db: Session = Depends(deps.get_db)
+):
     """
     List all producers (Public for now).
+    Optional badge filter in SQL (JSONB containment, GIN-indexed on PostgreSQL).
     """
-    return db.query(ProducerProfile).all()
+    query = db.query(ProducerProfile)
+    if badges:
+        query = query.filter(json_contains_any_variant(
+            db, ProducerProfile.badges, [cert_spellings(b) for b in badges if b.strip()]
+        ))
+    return query.all()
 
 @router.post("/")
 def create_producer(
@@ -38,6 +52,7 @@ def create_producer(
     db.add(new_producer)
     db.commit()
     db.refresh(new_producer)
+    smart_match.upsert_producer(new_producer)
     return new_producer
 
 @router.get("/{producer_id}")
@@ -51,6 +66,23 @@ def get_producer(producer_id: int, db: Session = Depends(deps.get_db)):
         raise HTTPException(status_code=404, detail="Producer not found")
     return producer
 
+@router.get("/{producer_id}/matches", response_model=SmartMatchResponse)
+def get_producer_matches(
+    producer_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Smart Match: open sourcing requests this producer can answer, best first.
+    Matched on product type, grade and required certifications (see services/smart_match.py).
+    """
+    producer = db.query(ProducerProfile).filter(ProducerProfile.id == producer_id).first()
+    if not producer:
+        raise HTTPException(status_code=404, detail="Producer not found")
+
+    candidates, candidate_count = smart_match.rank_for_producer(db, producer, limit)
+    return {"producer_id": producer_id, "candidate_count": candidate_count, "candidates": candidates}
+
 @router.put("/{producer_id}")
 def update_producer(
     producer_id: int,
@@ -78,9 +110,12 @@ def update_producer(
         producer.location_region = data['location_region']
     if 'location_district' in data:
         producer.location_district = data['location_district']
+    if 'badges' in data:
+        producer.badges = data['badges'] or []
     
     db.commit()
     db.refresh(producer)
+    smart_match.upsert_producer(producer)
     return producer
 
 @router.post("/{producer_id}/photo")
@@ -103,16 +138,57 @@ def upload_producer_photo(
     
     return {"photo_url": photo_url, "message": "Photo uploaded successfully (mock for MVP)"}
 
-@router.get("/me/sales")
-def get_my_sales(db: Session = Depends(deps.get_db)):
+@router.get("/me/sales", response_model=OrderPage)
+def get_my_sales(
+    conditions: list = Depends(order_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    output: str = Query("json", alias="format", pattern=FORMAT_PATTERN,
+                        description="json: one page; ndjson / csv: stream every matching sale"),
+    db: Session = Depends(deps.get_db)
+):
     """
-    Get sales for the authenticated producer.
+    Get sales for the authenticated producer, newest first, keyset-paginated on
+    (created_at, id). format=ndjson or csv streams the whole filtered export.
     For MVP: We'll fetch orders linked to products owned by the *first* producer found
     (since we don't have real user auth linking yet, or we assume single user demo).
     """
     # DEMO GOD MODE: Return ALL orders in the system for everyone.
     # This ensures that no matter which producer you selected when creating the product,
     # the order appears in the dashboard.
-    orders = db.query(Order).order_by(Order.id.desc()).all()
-    
-    return orders
+    if output != "json":
+        return orders_export(conditions, cursor, output, "sales")
+    return orders_page(db, conditions, limit, cursor)
+
+# Declared after /me/sales: "me" must not be parsed as a producer_id
+@router.get("/{producer_id}/sales", response_model=OrderPage)
+def get_producer_sales(
+    producer_id: int,
+    conditions: list = Depends(order_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    output: str = Query("json", alias="format", pattern=FORMAT_PATTERN,
+                        description="json: one page; ndjson / csv: stream every matching sale"),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Orders of this producer's products, newest first, keyset-paginated on (created_at, id).
+    format=ndjson or csv streams the whole filtered export.
+    """
+    if not db.query(ProducerProfile.id).filter(ProducerProfile.id == producer_id).first():
+        raise HTTPException(status_code=404, detail="Producer not found")
+
+    conditions = conditions + [producer_orders(producer_id)]
+    if output != "json":
+        return orders_export(conditions, cursor, output, f"sales_producer_{producer_id}")
+    return orders_page(db, conditions, limit, cursor)
+
+@router.get("/{producer_id}/sales/summary", response_model=ProducerSalesSummaryResponse)
+def get_producer_sales_summary(producer_id: int, db: Session = Depends(deps.get_db)):
+    """
+    Sales dashboard of a producer: totals by status, by month and by product.
+    Read from the maintained producer_sales_summary rows (see services/sales_summary.py).
+    """
+    if not db.query(ProducerProfile.id).filter(ProducerProfile.id == producer_id).first():
+        raise HTTPException(status_code=404, detail="Producer not found")
+    return sales_summary.summary(db, producer_id)
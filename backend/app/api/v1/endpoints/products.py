@@ -2,6 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate
 from app.services.replicate_service import replicate_service
+from app.services.pricing_engine import pricing_engine, refresh_pricing_state
+from app.services.product_types import normalize_product_type
+from app.services.smart_match import smart_match
+from app.services.outbox import outbox, trace_event_payload
+from app.services.sales_summary import sales_summary
 from app.api import deps
 from app.models.product import Product
 
@@ -32,6 +37,7 @@ def upload_product(product_in: ProductCreate, db: Session = Depends(deps.get_db)
 
     db_product = Product(
         name=product_in.name,
+        product_type=normalize_product_type(product_in.name),
         grade=product_in.grade,
         price_fob=product_in.price_fob,
         image_url_raw=product_in.image_url,
@@ -47,24 +53,22 @@ def upload_product(product_in: ProductCreate, db: Session = Depends(deps.get_db)
         description=product_in.description or "Premium Madagascar Vanilla Beans. Hand-cured and sun-dried."
     )
     db.add(db_product)
+    db.flush()  # Applique les valeurs par défaut (pricing_mode, moq_kg)
+    refresh_pricing_state(db_product)
+
+    # 3. Traceability: "ORIGIN" Event, written after commit by the outbox dispatcher
+    outbox.enqueue(db, "trace_event", trace_event_payload(
+        product_id=db_product.id,
+        stage="ORIGIN",
+        status="VALIDATED",
+        description=f"Initial harvest declaration by {db_product.farmer_name}",
+        location_scan=db_product.origin, # Metadata
+        created_by="System (On behalf of Facilitator)"
+    ))
+
     db.commit()
     db.refresh(db_product)
-
-    # 3. Traceability: Auto-Generate "ORIGIN" Event
-    try:
-        from app.models.producer import TraceabilityEvent
-        origin_event = TraceabilityEvent(
-            product_id=db_product.id,
-            stage="ORIGIN",
-            status="VALIDATED",
-            description=f"Initial harvest declaration by {db_product.farmer_name}",
-            location_scan=db_product.origin, # Metadata
-            created_by="System (On behalf of Facilitator)"
-        )
-        db.add(origin_event)
-        db.commit()
-    except Exception as e:
-        print(f"Error creating origin event: {e}")
+    smart_match.upsert_product(db_product)
     
     return db_product
 
@@ -95,7 +99,10 @@ def delete_product(product_id: int, db: Session = Depends(deps.get_db)):
     # In a real app we might just set status='WITHDRAWN'
     # For MVP we hard delete to keep list clean
     db.delete(product)
+    sales_summary.detach_product(db, product_id)
     db.commit()
+    pricing_engine.invalidate(product_id)
+    smart_match.remove_product(product_id)
     
     return product
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -109,10 +116,12 @@ def update_product(product_id: int, product_in: ProductUpdate, db: Session = Dep
 
     if product_in.name is not None:
         product.name = product_in.name
+        product.product_type = normalize_product_type(product_in.name)
     if product_in.grade is not None:
         product.grade = product_in.grade
     if product_in.price_fob is not None:
         product.price_fob = product_in.price_fob
+        refresh_pricing_state(product)
     if product_in.moisture_content is not None:
         product.moisture_content = product_in.moisture_content
     if product_in.vanillin_content is not None:
@@ -122,5 +131,7 @@ def update_product(product_id: int, product_in: ProductUpdate, db: Session = Dep
         
     db.commit()
     db.refresh(product)
+    pricing_engine.invalidate(product_id)
+    smart_match.upsert_product(product)
     
     return product
@@ -1,18 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, cast, exists, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload
+from typing import Dict, List, Optional
 
 from app.api import deps
-from app.models.sourcing import SourcingRequest, SourcingOffer
+from app.api.idempotency import idempotency
+from app.api.pagination import encode_cursor, decode_cursor, decode_created_cursor, created_before
+from app.db.jsonb import SPEC_KEY_PATTERN, json_contains_any_variant, json_has_key, json_number
+from app.models.sourcing import SourcingRequest, SourcingOffer, offer_rank_order, offer_rank_trust
 from app.models.product import Product
 from app.models.producer import ProducerProfile
+from app.models.pricing import PriceTierTemplate
 from app.services.pdf_service import pdf_service
+from app.services.pricing_engine import PRICING_LOADER_OPTIONS
+from app.services.product_types import normalize_product_type
+from app.services.smart_match import smart_match, normalize_certs, cert_spellings
+from app.services.allocation_optimizer import allocation_optimizer, OfferCandidate
+from app.services.request_coverage import request_coverage, offer_state
+from app.services.request_events import request_events
+from app.services.market_stats import market_stats, OfferQuote
 from app.schemas.sourcing import (
     SourcingRequestCreate,
     SourcingRequestResponse,
     SourcingOfferCreate,
     SourcingOfferResponse,
-    SourcingOfferUpdate
+    SourcingOfferUpdate,
+    SourcingOfferPage,
+    OfferCoverageSummary,
+    SourcingRequestFeedPage,
+    AllocationOptimizeRequest,
+    AllocationPlan,
+    RequestInsights
 )
 
 router = APIRouter()
@@ -57,19 +82,37 @@ def get_product_effective_tiers(product: Product) -> List[dict]:
     return []
 
 
+def product_type_filter(product_type: Optional[str]):
+    """
+    Filtre des produits correspondant au type d'une demande.
+    Type connu: égalité sur Product.product_type (ix_product_producer_type_status).
+    Type hors vocabulaire ("Turmeric", ...): ILIKE sur le nom (ix_product_name_trgm).
+    None si la demande n'a pas de type.
+    """
+    if not product_type:
+        return None
+    normalized_type = normalize_product_type(product_type)
+    if normalized_type:
+        return Product.product_type == normalized_type
+    return Product.name.ilike(f"%{product_type}%")
+
+
 def get_producer_effective_tiers(producer: ProducerProfile, product_type: str, db: Session) -> List[dict]:
     """
     Récupère les paliers effectifs pour un producteur et un type de produit.
     Cherche d'abord un produit correspondant, sinon utilise le template par défaut.
     """
     # Chercher un produit du producteur correspondant au type demandé
-    matching_product = db.query(Product).filter(
-        Product.producer_id == producer.id,
-        Product.status == "PUBLISHED"
-    ).all()
-
-    for product in matching_product:
-        if product_type.lower() in product.name.lower():
+    # (une recherche indexée, indépendante de la taille du catalogue)
+    type_filter = product_type_filter(product_type)
+    if type_filter is not None:
+        product = db.query(Product).options(*PRICING_LOADER_OPTIONS).filter(
+            Product.producer_id == producer.id,
+            type_filter,
+            Product.status == "PUBLISHED"
+        ).order_by(Product.id).first()
+
+        if product:
             return get_product_effective_tiers(product), product
 
     # Sinon, chercher le template par défaut
@@ -79,21 +122,57 @@ def get_producer_effective_tiers(producer: ProducerProfile, product_type: str, d
     )
 
     if default_template:
-        base_price = 250.0  # Prix de base par défaut
-        return [
-            {
-                "min_quantity_kg": t.min_quantity_kg,
-                "max_quantity_kg": t.max_quantity_kg,
-                "price_per_kg": round(base_price * (1 - t.discount_percent / 100), 2),
-                "discount_percent": t.discount_percent,
-                "position": t.position
-            }
-            for t in sorted(default_template.tiers, key=lambda x: x.position)
-        ], None
+        return get_default_template_tiers(default_template), None
 
     return [], None
 
 
+def get_default_template_tiers(template: PriceTierTemplate) -> List[dict]:
+    """Paliers du template par défaut d'un producteur (sans produit correspondant)"""
+    base_price = 250.0  # Prix de base par défaut
+    return [
+        {
+            "min_quantity_kg": t.min_quantity_kg,
+            "max_quantity_kg": t.max_quantity_kg,
+            "price_per_kg": round(base_price * (1 - t.discount_percent / 100), 2),
+            "discount_percent": t.discount_percent,
+            "position": t.position
+        }
+        for t in sorted(template.tiers, key=lambda x: x.position)
+    ]
+
+
+def get_producers_effective_tiers(producer_ids: List[int], product_type: str, db: Session) -> Dict[int, List[dict]]:
+    """
+    Version groupée de get_producer_effective_tiers: paliers effectifs de plusieurs
+    producteurs en deux requêtes (produits correspondants, puis templates par défaut
+    des producteurs restants).
+    """
+    tiers_by_producer = {}
+    type_filter = product_type_filter(product_type)
+    if type_filter is not None and producer_ids:
+        products = db.query(Product).options(*PRICING_LOADER_OPTIONS).filter(
+            Product.producer_id.in_(producer_ids),
+            type_filter,
+            Product.status == "PUBLISHED"
+        ).order_by(Product.id).all()
+        for product in products:
+            if product.producer_id not in tiers_by_producer:
+                tiers_by_producer[product.producer_id] = get_product_effective_tiers(product)
+
+    missing = [producer_id for producer_id in producer_ids if producer_id not in tiers_by_producer]
+    if missing:
+        templates = db.query(PriceTierTemplate).options(joinedload(PriceTierTemplate.tiers)).filter(
+            PriceTierTemplate.producer_id.in_(missing),
+            PriceTierTemplate.is_default.is_(True)
+        ).order_by(PriceTierTemplate.id).all()
+        for template in templates:
+            if template.producer_id not in tiers_by_producer:
+                tiers_by_producer[template.producer_id] = get_default_template_tiers(template)
+
+    return tiers_by_producer
+
+
 def find_tier_for_quantity(tiers: List[dict], quantity_kg: float) -> Optional[dict]:
     """Trouve le palier applicable pour une quantité donnée"""
     sorted_tiers = sorted(tiers, key=lambda t: t["min_quantity_kg"], reverse=True)
@@ -105,6 +184,70 @@ def find_tier_for_quantity(tiers: List[dict], quantity_kg: float) -> Optional[di
         return sorted(tiers, key=lambda t: t["min_quantity_kg"])[0]
     return None
 
+# ═══════════════════════════════════════════════════════════
+# LIVE EVENTS (SSE)
+# ═══════════════════════════════════════════════════════════
+
+# Commentaire SSE envoyé sans événement pour garder la connexion ouverte (proxies)
+SSE_HEARTBEAT_SECONDS = 15
+
+EVENT_REQUEST_FIELDS = (
+    "status", "logistics_status", "offer_count", "covered_kg_pending",
+    "covered_kg_accepted", "best_price", "weighted_avg_price",
+)
+EVENT_OFFER_FIELDS = (
+    "id", "request_id", "facilitator_id", "status", "volume_offered_kg",
+    "price_offered_usd", "trust_score_snapshot",
+)
+
+
+def publish_request_event(db: Session, event_type: str, request_id: int, offer: Optional[SourcingOffer] = None):
+    """
+    Publie l'état compact de la demande (compteurs lus dans la transaction en cours)
+    et de l'offre concernée. Diffusé aux flux SSE au commit de `db`.
+    """
+    columns = [getattr(SourcingRequest, name) for name in EVENT_REQUEST_FIELDS]
+    row = db.execute(
+        select(SourcingRequest.buyer_id, *columns).where(SourcingRequest.id == request_id)
+    ).one()
+    payload = {
+        "type": event_type,
+        "request_id": request_id,
+        "buyer_id": row.buyer_id,
+        "request": {name: getattr(row, name) for name in EVENT_REQUEST_FIELDS},
+    }
+    if offer is not None:
+        payload["offer"] = {name: getattr(offer, name) for name in EVENT_OFFER_FIELDS}
+    request_events.publish(db, payload)
+
+
+def _request_exists(db: Session, request_id: int) -> bool:
+    return db.query(exists().where(SourcingRequest.id == request_id)).scalar()
+
+
+def event_stream_response(request: Request, topics) -> StreamingResponse:
+    async def stream():
+        subscription = request_events.subscribe(topics)
+        try:
+            yield "retry: 3000\nevent: ready\ndata: {}\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {payload['type']}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            request_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # --- REQUESTS ---
 
 @router.post("/", response_model=SourcingRequestResponse)
@@ -119,16 +262,153 @@ def create_request(
     db.add(db_request)
     db.commit()
     db.refresh(db_request)
+    smart_match.upsert_request(db_request)
     return db_request
 
+SPEC_FILTER_DESCRIPTION = "Borne sur une clé de specs_json, format cle:valeur (ex: vanillin_content_min:1.4)"
+
+
+def parse_spec_filters(values: Optional[List[str]], parameter: str) -> List[tuple]:
+    """["vanillin_content_min:1.4", ...] -> [("vanillin_content_min", 1.4), ...] (400 si invalide)"""
+    filters = []
+    for value in values or []:
+        key, _, number = value.partition(":")
+        try:
+            bound = float(number)
+        except ValueError:
+            bound = None
+        if bound is None or not SPEC_KEY_PATTERN.match(key):
+            raise HTTPException(status_code=400, detail=f"Invalid {parameter} filter: {value!r} (expected key:number)")
+        filters.append((key, bound))
+    return filters
+
+
+def request_spec_conditions(
+    db: Session,
+    has_certs: Optional[List[str]] = None,
+    spec_min: Optional[List[str]] = None,
+    spec_max: Optional[List[str]] = None
+) -> list:
+    """
+    Filtres SQL sur les colonnes JSONB des demandes (servis par les index GIN /
+    d'expression sur PostgreSQL, voir app/db/jsonb.py).
+    """
+    conditions = []
+    if has_certs:
+        # La demande exige au moins toutes ces certifications (quelle que soit leur écriture)
+        conditions.append(json_contains_any_variant(
+            db, SourcingRequest.required_certs, [cert_spellings(c) for c in has_certs if c.strip()]
+        ))
+    for key, bound in parse_spec_filters(spec_min, "spec_min"):
+        conditions.append(json_has_key(db, SourcingRequest.specs_json, key))
+        conditions.append(json_number(db, SourcingRequest.specs_json, key) >= bound)
+    for key, bound in parse_spec_filters(spec_max, "spec_max"):
+        conditions.append(json_has_key(db, SourcingRequest.specs_json, key))
+        conditions.append(json_number(db, SourcingRequest.specs_json, key) <= bound)
+    return conditions
+
 @router.get("/", response_model=List[SourcingRequestResponse])
 def list_requests(
+    has_certs: Optional[List[str]] = Query(None, description="La demande exige toutes ces certifications"),
+    spec_min: Optional[List[str]] = Query(None, description=SPEC_FILTER_DESCRIPTION + ", valeur >= borne"),
+    spec_max: Optional[List[str]] = Query(None, description=SPEC_FILTER_DESCRIPTION + ", valeur <= borne"),
     db: Session = Depends(deps.get_db)
 ):
     """
     List all open requests.
+    Optional SQL filters on certifications and spec bounds (JSONB, index-served on PostgreSQL).
+    """
+    return db.query(SourcingRequest).options(selectinload(SourcingRequest.offers)).filter(
+        SourcingRequest.status == "OPEN",
+        *request_spec_conditions(db, has_certs, spec_min, spec_max)
+    ).all()
+
+def certs_covered_by(db: Session, certs: List[str]):
+    """Condition SQL: les certifications requises par la demande sont toutes dans `certs`"""
+    required = SourcingRequest.required_certs
+    if db.get_bind().dialect.name == "postgresql":
+        required_jsonb = cast(required, JSONB)
+        return or_(
+            required.is_(None),
+            func.jsonb_typeof(required_jsonb) != "array",
+            required_jsonb.op("<@")(cast(literal(json.dumps(certs)), JSONB))
+        )
+    # SQLite: aucune certification requise hors de la liste
+    required_cert = func.json_each(required).table_valued("value")
+    return ~exists(select(1).select_from(required_cert).where(required_cert.c.value.not_in(certs)))
+
+@router.get("/feed", response_model=SourcingRequestFeedPage)
+def get_request_feed(
+    product_type: Optional[str] = None,
+    grade: Optional[str] = None,
+    certs: Optional[List[str]] = Query(None, description="Certifications du facilitateur: seules les demandes couvertes sont renvoyées"),
+    min_volume_kg: Optional[float] = Query(None, ge=0),
+    has_certs: Optional[List[str]] = Query(None, description="La demande exige toutes ces certifications"),
+    spec_min: Optional[List[str]] = Query(None, description=SPEC_FILTER_DESCRIPTION + ", valeur >= borne"),
+    spec_max: Optional[List[str]] = Query(None, description=SPEC_FILTER_DESCRIPTION + ", valeur <= borne"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+    db: Session = Depends(deps.get_db)
+):
     """
-    return db.query(SourcingRequest).filter(SourcingRequest.status == "OPEN").all()
+    Facilitator feed: open requests, newest first, keyset-paginated on (created_at, id).
+    Summary shape without embedded offers; coverage comes from the counters
+    maintained on each request.
+    """
+    page = select(SourcingRequest).where(SourcingRequest.status == "OPEN")
+    if product_type:
+        page = page.where(SourcingRequest.product_type == product_type)
+    if grade:
+        page = page.where(SourcingRequest.grade_target == grade)
+    if certs is not None:
+        page = page.where(certs_covered_by(db, certs))
+    if min_volume_kg is not None:
+        page = page.where(SourcingRequest.volume_target_kg >= min_volume_kg)
+    for condition in request_spec_conditions(db, has_certs, spec_min, spec_max):
+        page = page.where(condition)
+
+    after = decode_created_cursor(cursor)
+    if after:
+        page = page.where(created_before(db, SourcingRequest.created_at, SourcingRequest.id, *after))
+
+    # Une ligne de plus pour savoir s'il reste une page
+    requests = db.execute(
+        page.order_by(SourcingRequest.created_at.desc(), SourcingRequest.id.desc()).limit(limit + 1)
+    ).scalars().all()
+
+    next_cursor = None
+    if len(requests) > limit:
+        requests = requests[:limit]
+        next_cursor = encode_cursor([requests[-1].created_at.isoformat(), requests[-1].id])
+
+    return {"requests": requests, "next_cursor": next_cursor}
+
+@router.get("/events")
+async def stream_buyer_events(
+    request: Request,
+    buyer_id: int = Query(..., description="Acheteur: événements de toutes ses demandes")
+):
+    """
+    Server-Sent Events for a buyer dashboard: offer_created, offer_updated and
+    logistics_updated on any of the buyer's requests. A "resync" event means
+    events were dropped and the dashboard should reload once.
+    """
+    return event_stream_response(request, [("buyer", buyer_id)])
+
+@router.get("/{request_id}/events")
+async def stream_request_events(
+    request_id: int,
+    request: Request,
+    # scope="function": la session est fermée avant le flux, qui ne garde pas de connexion du pool
+    db: Session = Depends(deps.get_db, scope="function")
+):
+    """
+    Server-Sent Events for one request (replaces polling GET /requests/{id}).
+    Each event carries the changed offer and the request coverage counters.
+    """
+    if not await run_in_threadpool(_request_exists, db, request_id):
+        raise HTTPException(status_code=404, detail="Request not found")
+    return event_stream_response(request, [("request", request_id)])
 
 @router.get("/{request_id}", response_model=SourcingRequestResponse)
 def get_request(
@@ -144,9 +424,7 @@ def get_request(
         raise HTTPException(status_code=404, detail="Request not found")
     
     # FEATURE 9: Ranking Strategy
-    # Sort offers in memory by trust_score_snapshot DESC, then price ASC
-    req.offers.sort(key=lambda x: (x.trust_score_snapshot or 0, -x.price_offered_usd), reverse=True)
-    
+    # req.offers is loaded ordered by trust_score_snapshot DESC, then price ASC (see offer_rank_order)
     return req
 
 @router.delete("/{request_id}")
@@ -163,7 +441,9 @@ def delete_request(
         raise HTTPException(status_code=404, detail="Request not found")
     
     # Validation: Don't delete if "too late"
-    has_accepted_offers = any(o.status == 'ACCEPTED' for o in req.offers)
+    has_accepted_offers = db.query(
+        exists().where(SourcingOffer.request_id == request_id, SourcingOffer.status == "ACCEPTED")
+    ).scalar()
     has_logistics = req.logistics_status != "PREPARING" 
     
     if has_accepted_offers or has_logistics:
@@ -172,11 +452,11 @@ def delete_request(
             detail="Cannot delete request: Offers already accepted or supply chain started."
         )
     
-    for offer in req.offers:
-        db.delete(offer)
-        
+    # Offers and their coverage counters go away with the request, in the same transaction
+    db.query(SourcingOffer).filter(SourcingOffer.request_id == request_id).delete(synchronize_session=False)
     db.delete(req)
     db.commit()
+    smart_match.remove_request(request_id)
     return {"message": "Request deleted"}
 
 @router.put("/{request_id}/logistics", response_model=SourcingRequestResponse)
@@ -193,6 +473,8 @@ def update_logistics_status(
         raise HTTPException(status_code=404, detail="Request not found")
     
     req.logistics_status = status
+    db.flush()
+    publish_request_event(db, "logistics_updated", request_id)
     db.commit()
     db.refresh(req)
     return req
@@ -250,12 +532,20 @@ def generate_contract(
 def create_offer(
     request_id: int,
     offer_in: SourcingOfferCreate,
-    db: Session = Depends(deps.get_db)
+    db: Session = Depends(deps.get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Facilitator submits an offer to a specific request.
     FEATURE 7: Cert validation.
+    A retry with the same Idempotency-Key returns the first response (no duplicate offer).
     """
+    return idempotency.run(
+        db, f"offers.create:{request_id}", idempotency_key, offer_in,
+        lambda: submit_offer(request_id, offer_in, db)
+    )
+
+def submit_offer(request_id: int, offer_in: SourcingOfferCreate, db: Session):
     req = db.query(SourcingRequest).filter(SourcingRequest.id == request_id).first()
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
@@ -274,10 +564,162 @@ def create_offer(
     
     db_offer = SourcingOffer(**offer_data)
     db.add(db_offer)
+    db.flush()
+    request_coverage.apply_offer_change(db, request_id, None, offer_state(db_offer))
+    publish_request_event(db, "offer_created", request_id, db_offer)
+    idempotency.complete(db, db_offer, SourcingOfferResponse)
     db.commit()
     db.refresh(db_offer)
     return db_offer
 
+def ranked_offers_query(db: Session, request_id: int, status: Optional[str] = None):
+    """Offres d'une demande dans l'ordre du classement (ix_sourcing_offers_request_rank)"""
+    query = db.query(SourcingOffer).filter(SourcingOffer.request_id == request_id)
+    if status:
+        query = query.filter(SourcingOffer.status == status.upper())
+    return query.order_by(*offer_rank_order())
+
+@router.get("/{request_id}/offers", response_model=SourcingOfferPage)
+def list_request_offers(
+    request_id: int,
+    status: Optional[str] = Query(None, description="PENDING, NEGOTIATING, ACCEPTED, REJECTED"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor de la page précédente"),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Ranked offers of a request, one page at a time (keyset pagination).
+    Same order as the dashboard: trust score DESC, then price ASC.
+    """
+    if not db.query(SourcingRequest.id).filter(SourcingRequest.id == request_id).first():
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    query = ranked_offers_query(db, request_id, status)
+    after = decode_cursor(cursor, 3)
+    if after:
+        try:
+            trust, price, offer_id = float(after[0]), float(after[1]), int(after[2])
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        rank_trust = offer_rank_trust()
+        query = query.filter(or_(
+            rank_trust < trust,
+            and_(rank_trust == trust, or_(
+                SourcingOffer.price_offered_usd > price,
+                and_(SourcingOffer.price_offered_usd == price, SourcingOffer.id > offer_id)
+            ))
+        ))
+
+    # Une ligne de plus pour savoir s'il reste une page
+    offers = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(offers) > limit:
+        offers = offers[:limit]
+        last = offers[-1]
+        next_cursor = encode_cursor([last.trust_score_snapshot or 0, last.price_offered_usd, last.id])
+
+    return {"request_id": request_id, "offers": offers, "next_cursor": next_cursor}
+
+@router.get("/{request_id}/offers/summary", response_model=OfferCoverageSummary)
+def get_request_offers_summary(
+    request_id: int,
+    top: int = Query(5, ge=0, le=50),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Lightweight dashboard view: coverage aggregates computed in SQL
+    plus only the top-N ranked offers.
+    """
+    req = db.query(SourcingRequest).filter(SourcingRequest.id == request_id).first()
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    rows = db.query(
+        SourcingOffer.status,
+        func.count(SourcingOffer.id),
+        func.coalesce(func.sum(SourcingOffer.volume_offered_kg), 0)
+    ).filter(SourcingOffer.request_id == request_id).group_by(SourcingOffer.status).all()
+
+    status_counts, volumes = {}, {}
+    for status, count, volume in rows:
+        status = status or "PENDING"
+        status_counts[status] = status_counts.get(status, 0) + count
+        volumes[status] = volumes.get(status, 0.0) + float(volume)
+    accepted_kg = volumes.get("ACCEPTED", 0.0)
+    target = req.volume_target_kg or 0
+
+    return {
+        "request_id": request_id,
+        "volume_target_kg": target,
+        "offer_count": sum(status_counts.values()),
+        "status_counts": status_counts,
+        "offered_kg": round(sum(v for s, v in volumes.items() if s != "REJECTED"), 2),
+        "accepted_kg": round(accepted_kg, 2),
+        "pending_kg": round(volumes.get("PENDING", 0.0) + volumes.get("NEGOTIATING", 0.0), 2),
+        "coverage_percent": round(accepted_kg / target * 100, 1) if target > 0 else 0.0,
+        "top_offers": ranked_offers_query(db, request_id).limit(top).all() if top else [],
+    }
+
+@router.post("/{request_id}/optimize", response_model=AllocationPlan)
+def optimize_request_allocation(
+    request_id: int,
+    optimize_in: Optional[AllocationOptimizeRequest] = None,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Min-cost offer mix covering the request volume (accepts_partial) or the cheapest
+    single offer covering it. Offers are filtered on trust score and producer certs;
+    prices follow each producer's effective tiers for the allocated volume.
+    Nothing is written: the buyer accepts the proposed offers afterwards.
+    """
+    req = db.query(SourcingRequest).filter(SourcingRequest.id == request_id).first()
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
+    optimize_in = optimize_in or AllocationOptimizeRequest()
+
+    # Colonnes seules (pas d'entités ORM): une demande peut recevoir des milliers d'offres
+    offers = db.query(
+        SourcingOffer.id,
+        SourcingOffer.facilitator_id,
+        SourcingOffer.volume_offered_kg,
+        SourcingOffer.price_offered_usd,
+        SourcingOffer.trust_score_snapshot,
+        ProducerProfile.badges
+    ).outerjoin(ProducerProfile, SourcingOffer.facilitator_id == ProducerProfile.id).filter(
+        SourcingOffer.request_id == request_id,
+        or_(SourcingOffer.status.is_(None), SourcingOffer.status != "REJECTED")
+    ).all()
+
+    min_trust = optimize_in.min_trust_score
+    required_certs = normalize_certs(
+        optimize_in.required_certs if optimize_in.required_certs is not None else req.required_certs
+    )
+    eligible = [
+        offer for offer in offers
+        if (min_trust is None or (offer.trust_score_snapshot or 0) >= min_trust)
+        and required_certs <= normalize_certs(offer.badges)
+    ]
+    tiers_by_producer = get_producers_effective_tiers(
+        sorted({offer.facilitator_id for offer in eligible if offer.facilitator_id is not None}),
+        req.product_type, db
+    )
+    candidates = [
+        OfferCandidate(
+            offer.id, offer.facilitator_id, offer.volume_offered_kg or 0.0, offer.price_offered_usd,
+            offer.trust_score_snapshot, tiers_by_producer.get(offer.facilitator_id, [])
+        )
+        for offer in eligible
+    ]
+
+    volume_kg = optimize_in.volume_kg if optimize_in.volume_kg is not None else (req.volume_target_kg or 0.0)
+    plan = allocation_optimizer.optimize(candidates, volume_kg, bool(req.accepts_partial))
+    return {
+        **plan,
+        "request_id": request_id,
+        "accepts_partial": bool(req.accepts_partial),
+        "excluded_offer_count": len(offers) - len(eligible),
+    }
+
 # --- NEGOTIATION / ACTIONS ---
 
 @router.put("/offers/{offer_id}", response_model=SourcingOfferResponse)
@@ -293,11 +735,20 @@ def update_offer_status(
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
     
+    before = offer_state(offer)
     if start_update.status:
         offer.status = start_update.status
     if start_update.price_offered_usd:
         offer.price_offered_usd = start_update.price_offered_usd
-        
+
+    db.flush()
+    request_coverage.apply_offer_change(db, offer.request_id, before, offer_state(offer))
+    if offer.status == "ACCEPTED" and before.status != "ACCEPTED":
+        offer.accepted_at = datetime.now(timezone.utc)
+        market_stats.record_after_commit(
+            db, offer.request.product_type, offer.request.grade_target, offer.price_offered_usd
+        )
+    publish_request_event(db, "offer_updated", offer.request_id, offer)
     db.commit()
     db.refresh(offer)
     return offer
@@ -307,26 +758,56 @@ def update_offer_status(
 @router.get("/offers/{offer_id}/ai-insight")
 def get_ai_negotiation_insight(offer_id: int, db: Session = Depends(deps.get_db)):
     """
-    Mock AI Copilot for Negotiation.
+    AI Copilot for Negotiation: one offer against the market and the buyer's target.
     """
     offer = db.query(SourcingOffer).filter(SourcingOffer.id == offer_id).first()
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
 
     req = offer.request
-    delta_price = offer.price_offered_usd - req.price_target_usd
+    quote = OfferQuote(offer.id, offer.price_offered_usd, offer.trust_score_snapshot)
+    market, (insight,) = market_stats.score_offers(db, req.product_type, req.grade_target, req.price_target_usd, [quote])
+
+    return {
+        **insight,
+        "price_delta": insight["delta_vs_target_usd"],
+        "ai_advice": insight["advice"],
+        "market": market,
+    }
+
+@router.get("/{request_id}/insights", response_model=RequestInsights)
+def get_request_insights(request_id: int, db: Session = Depends(deps.get_db)):
+    """
+    Scores every offer of a request in one pass against cached market statistics
+    (recent accepted offers and orders of the same product type and grade) and the
+    buyer's target. Offers come back in ranking order.
+    """
+    req = db.query(
+        SourcingRequest.id, SourcingRequest.product_type, SourcingRequest.grade_target,
+        SourcingRequest.price_target_usd
+    ).filter(SourcingRequest.id == request_id).first()
+    if not req:
+        raise HTTPException(status_code=404, detail="Request not found")
 
-    if delta_price > 0:
-        advice = f"Offer is {delta_price}$ above target. However, facilitator has high trust. Suggest negotiating to {offer.price_offered_usd - (delta_price/2)}$."
-    elif delta_price < 0:
-        advice = "Great deal! Price is below target. Accept immediately."
-    else:
-        advice = "Price matches target perfectly."
+    offers = db.query(
+        SourcingOffer.id, SourcingOffer.facilitator_id, SourcingOffer.status,
+        SourcingOffer.volume_offered_kg, SourcingOffer.price_offered_usd, SourcingOffer.trust_score_snapshot
+    ).filter(SourcingOffer.request_id == request_id).order_by(*offer_rank_order()).all()
 
+    market, insights = market_stats.score_offers(
+        db, req.product_type, req.grade_target, req.price_target_usd,
+        [OfferQuote(o.id, o.price_offered_usd, o.trust_score_snapshot) for o in offers]
+    )
     return {
-        "offer_id": offer_id,
-        "price_delta": delta_price,
-        "ai_advice": advice
+        "request_id": req.id,
+        "product_type": req.product_type,
+        "grade_target": req.grade_target,
+        "price_target_usd": req.price_target_usd,
+        "market": market,
+        "offers": [
+            {**insight, "facilitator_id": o.facilitator_id, "status": o.status, "volume_kg": o.volume_offered_kg}
+            for o, insight in zip(offers, insights)
+        ],
     }
 
 
@@ -439,8 +920,14 @@ def get_all_producer_prices_for_request(
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
 
-    # Trouver tous les produits correspondant au type demandé
-    matching_products = db.query(Product).filter(
+    # Une seule requête: produits correspondants + producteur + paliers + template et ses paliers.
+    # Le filtre ILIKE est servi par l'index trigramme ix_product_name_trgm (PostgreSQL).
+    matching_products = db.query(Product).join(
+        ProducerProfile, Product.producer_id == ProducerProfile.id
+    ).options(
+        contains_eager(Product.producer),
+        *PRICING_LOADER_OPTIONS
+    ).filter(
         Product.status == "PUBLISHED",
         Product.name.ilike(f"%{req.product_type}%")
     ).all()
@@ -448,12 +935,7 @@ def get_all_producer_prices_for_request(
     producer_prices = []
 
     for product in matching_products:
-        if not product.producer_id:
-            continue
-
-        producer = db.query(ProducerProfile).filter(ProducerProfile.id == product.producer_id).first()
-        if not producer:
-            continue
+        producer = product.producer
 
         tiers = get_product_effective_tiers(product)
         applicable_tier = find_tier_for_quantity(tiers, req.volume_target_kg)
@@ -8,4 +8,7 @@ from app.models.producer import ProducerProfile, TraceabilityEvent
 from app.models.user import User
 from app.models.pricing import PriceTierTemplate, TemplateTier, PriceTier, PriceTierHistory
 from app.models.sourcing import SourcingRequest, SourcingOffer
+from app.models.outbox import OutboxEvent
+from app.models.idempotency import IdempotencyKey
+from app.models.sales_summary import ProducerSalesSummary
 
@@ -0,0 +1,82 @@
+"""
+Colonnes JSON filtrables en SQL: JSONB sur PostgreSQL (index GIN), JSON ailleurs
+(SQLite en local).
+
+Les filtres produisent, sur PostgreSQL, des opérateurs servis par les index créés par
+la migration 1c4e7a9b2d60 (et scripts/ensure_jsonb_columns.py au déploiement):
+- `@>` (contient tous les éléments) -> GIN jsonb_path_ops sur required_certs / badges
+- `?` (clé présente) -> GIN jsonb_ops sur specs_json
+- bornes de specs -> index d'expression sur la valeur numérique de la clé pour INDEXED_SPEC_KEYS
+  (CASE WHEN jsonb_typeof(specs_json -> 'clé') = 'number' THEN (specs_json ->> 'clé')::float END)
+Sur SQLite, les mêmes conditions passent par json_each / json_extract.
+Une valeur de spec non numérique ("25%") vaut NULL: ni erreur de cast, ni borne satisfaite.
+"""
+import json
+import re
+from typing import Iterable
+
+from sqlalchemy import JSON, Float, and_, case, cast, exists, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
+# Clés de specs avec un index d'expression (bornes servies par index)
+INDEXED_SPEC_KEYS = ("vanillin_content_min", "moisture_max")
+
+SPEC_KEY_PATTERN = re.compile(r"^[a-z][a-z0-9_]{0,62}$")
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def json_contains_all(db: Session, column, values: Iterable[str]):
+    """Condition: le tableau JSON `column` contient tous les `values`"""
+    values = list(values)
+    if _is_postgres(db):
+        # Le cast est sans effet sur une colonne déjà JSONB (l'index GIN reste utilisable)
+        return cast(column, JSONB).op("@>")(cast(literal(json.dumps(values)), JSONB))
+    conditions = []
+    for value in values:
+        element = func.json_each(column).table_valued("value")
+        conditions.append(exists(select(1).select_from(element).where(element.c.value == value)))
+    return and_(*conditions)
+
+
+def json_contains_any_variant(db: Session, column, variants_per_value: Iterable[Iterable[str]]):
+    """
+    Condition: pour chaque valeur attendue, le tableau contient au moins une de ses
+    variantes d'écriture ("ORGANIC", "Organic", "BIO"...). Chaque @> reste indexé.
+    """
+    return and_(*(
+        or_(*(json_contains_all(db, column, [variant]) for variant in sorted(set(variants))))
+        for variants in variants_per_value
+    ))
+
+
+def json_has_key(db: Session, column, key: str):
+    """Condition: l'objet JSON `column` a la clé `key`"""
+    if not SPEC_KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid JSON key: {key!r}")
+    if _is_postgres(db):
+        return cast(column, JSONB).op("?")(literal(key))
+    return func.json_type(column, f"$.{key}").is_not(None)
+
+
+def json_number(db: Session, column, key: str):
+    """Valeur numérique de `key` dans l'objet JSON `column` (NULL si absente ou non numérique)"""
+    if not SPEC_KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid JSON key: {key!r}")
+    if _is_postgres(db):
+        # Clé et type en littéraux SQL pour correspondre aux index d'expression
+        value, key_literal = cast(column, JSONB), literal_column(f"'{key}'")
+        return case(
+            (func.jsonb_typeof(value.op("->")(key_literal)) == literal_column("'number'"),
+             cast(value.op("->>")(key_literal), Float))
+        )
+    return case(
+        (func.json_type(column, f"$.{key}").in_(["integer", "real"]),
+         cast(func.json_extract(column, f"$.{key}"), Float))
+    )
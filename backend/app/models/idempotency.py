@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, func
+from app.db.base_class import Base
+from app.db.jsonb import JSONVariant
+
+
+class IdempotencyKey(Base):
+    """
+    Réponse enregistrée d'une requête POST rejouable (en-tête Idempotency-Key),
+    voir api/idempotency.py.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)  # "orders.create", "offers.create:12"
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 du corps de la requête
+
+    state = Column(String, nullable=False, default="PENDING")  # PENDING, COMPLETED
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSONVariant, nullable=True)
+
+    # Réservation d'une requête en cours (reprise possible après expiration)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Purge (TTL)
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        default=lambda: datetime.now(timezone.utc), server_default=func.now())
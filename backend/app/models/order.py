@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
@@ -13,8 +13,22 @@ class Order(Base):
     contract_url = Column(String, nullable=True)
     buyer_name = Column(String)
     quantity_kg = Column(Float, default=10.0)  # Track order quantity for stock management
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Whole kg taken from product stock at creation, given back as-is on reject
+    # (NULL: order placed before the column, which took int(quantity_kg))
+    reserved_units = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # keyset cursor: never NULL
     
-    # We could adding FK to Product, but for MVP strict loose coupling or direct ID is fine.
-    # Let's keep it simple: just product_id stored if needed, but the PDF logic used snapshots.
-    product_id = Column(Integer)
+    # The PDF logic uses snapshots (product_name): the order outlives a deleted product.
+    # Indexed FK: orders of a producer = orders of its products (ix_orders_product_created)
+    product_id = Column(Integer, ForeignKey("product.id", ondelete="SET NULL"), nullable=True)
+    # Snapshot of the product's producer at creation: sales listings and the sales
+    # summary keep the order after the product is deleted (ix_orders_producer_created)
+    producer_id = Column(Integer, nullable=True)
+
+    # Keyset listings (created_at DESC, id DESC), optionally filtered by status / product / producer
+    __table_args__ = (
+        Index("ix_orders_created_id", created_at, id),
+        Index("ix_orders_status_created", status, created_at, id),
+        Index("ix_orders_product_created", product_id, created_at, id),
+        Index("ix_orders_producer_created", producer_id, created_at, id),
+    )
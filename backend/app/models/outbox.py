@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, Index, func, text
+from app.db.base_class import Base
+from app.db.jsonb import JSONVariant
+
+
+class OutboxEvent(Base):
+    """
+    Effet de bord à exécuter après le commit d'une écriture (voir services/outbox.py).
+    Écrit dans la même transaction que la commande / le produit, supprimé une fois traité.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # trace_event, producer_transaction, notification
+    payload = Column(JSONVariant, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # Prochaine tentative (repoussée après un échec)
+    available_at = Column(DateTime(timezone=True), nullable=False,
+                          default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)  # Abandonné après MAX_ATTEMPTS
+
+    # File d'attente du dispatcher: événements à traiter par ordre d'arrivée
+    __table_args__ = (
+        Index(
+            "ix_outbox_events_pending", "available_at", "id",
+            postgresql_where=text("failed_at IS NULL"), sqlite_where=text("failed_at IS NULL")
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
@@ -88,5 +88,14 @@ class PriceTierHistory(Base):
     changed_at = Column(DateTime(timezone=True), server_default=func.now())
     changed_by = Column(String, nullable=True)      # User ID ou "System"
 
+    # Index "as-of": dernier snapshot <= date pour un produit (index-only scan grâce à INCLUDE)
+    __table_args__ = (
+        Index(
+            "ix_price_tier_history_product_changed_at",
+            product_id, changed_at.desc(),
+            postgresql_include=["base_price_fob"]
+        ),
+    )
+
     # Relationships
     product = relationship("Product", back_populates="price_history")
@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base_class import Base
+from app.db.jsonb import JSONVariant
 
 class ProducerProfile(Base):
     __tablename__ = "producer_profiles"
@@ -22,7 +23,8 @@ class ProducerProfile(Base):
     transactions_count = Column(Integer, default=0)
     
     # Certifications badges (cached list of strings)
-    badges = Column(JSON, default=list) # ["BIO", "FAIRTRADE"]
+    # JSONB + GIN jsonb_path_ops (filtre "badge contient"), créé par migration
+    badges = Column(JSONVariant, default=list) # ["BIO", "FAIRTRADE"]
     
     # Contact info (Hidden publically)
     contact_email = Column(String, nullable=True)
@@ -1,16 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
 
 class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    name = Column(String, index=True)  # + ix_product_name_trgm (GIN pg_trgm, produits publiés) créé par migration
     price_fob = Column(Float)  # Prix de base FOB/kg
     image_url_raw = Column(String)
     image_url_ai = Column(String)
     status = Column(String, default="DRAFT")  # DRAFT, PUBLISHED
     grade = Column(String, default="A")  # A, B, C, D, SPLITS, CUTS
+    product_type = Column(String, nullable=True)  # Vanilla, Clove, ... (dérivé du nom, voir services/product_types.py)
 
     # Showcase Fields
     description = Column(String, nullable=True)  # Full text description
@@ -32,6 +33,21 @@ class Product(Base):
     pricing_mode = Column(String, default="SINGLE")  # SINGLE, TIERED, TEMPLATE
     template_id = Column(Integer, ForeignKey("price_tier_templates.id"), nullable=True)
 
+    # Pricing State (projection dénormalisée, maintenue à chaque écriture de prix)
+    last_base_price = Column(Float, nullable=True)  # Prix de base du dernier snapshot historique
+    price_changed_at = Column(DateTime(timezone=True), nullable=True)  # Date du dernier snapshot
+    price_trend_direction = Column(String, nullable=True)  # up, down, stable (null = pas de variation)
+    price_trend_percent = Column(Float, nullable=True)
+    effective_tier_count = Column(Integer, default=0)
+    min_price_per_kg = Column(Float, nullable=True)
+    max_price_per_kg = Column(Float, nullable=True)
+    pricing_version = Column(Integer, nullable=False, default=1, server_default="1")  # ETag des lectures de prix, incrémenté à chaque écriture
+
+    # Résolution des paliers d'un producteur pour un type demandé (sourcing)
+    __table_args__ = (
+        Index("ix_product_producer_type_status", producer_id, product_type, status),
+    )
+
     # Relationships for pricing
     price_template = relationship("PriceTierTemplate", back_populates="products")
     price_tiers = relationship("PriceTier", back_populates="product", cascade="all, delete-orphan", order_by="PriceTier.position")
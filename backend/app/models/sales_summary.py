@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float
+from app.db.base_class import Base
+
+
+class ProducerSalesSummary(Base):
+    """
+    Ventes d'un producteur agrégées par (produit, mois, statut), tenues à jour à
+    chaque écriture de commande (voir services/sales_summary.py). Le tableau de bord
+    d'un producteur se lit en une requête sur quelques lignes, sans parcourir ses commandes.
+    """
+    __tablename__ = "producer_sales_summary"
+
+    producer_id = Column(Integer, primary_key=True)  # Clé primaire = index du tableau de bord
+    product_id = Column(Integer, primary_key=True)
+    month = Column(String(7), primary_key=True)  # "2026-10" (created_at de la commande, UTC)
+    status = Column(String, primary_key=True)  # Statut courant des commandes comptées
+
+    order_count = Column(Integer, nullable=False, default=0)
+    quantity_kg = Column(Float, nullable=False, default=0.0)
+    amount = Column(Float, nullable=False, default=0.0)
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
+from app.db.jsonb import JSONVariant
 
 class SourcingRequest(Base):
     __tablename__ = "sourcing_requests"
@@ -20,18 +22,38 @@ class SourcingRequest(Base):
     
     # Advanced Specs (JSON for flexibility)
     # e.g. {"vanillin_content_min": 1.4, "moisture_max": 30}
-    specs_json = Column(JSON, nullable=True)
+    # JSONB + GIN (clés) et index d'expression sur ces deux bornes, créés par migration
+    specs_json = Column(JSONVariant, nullable=True)
 
     # [NEW] Certifications (Feature 7)
     # e.g. ["Organic", "Fairtrade"]
-    required_certs = Column(JSON, nullable=True)
+    # JSONB + GIN jsonb_path_ops (filtre "contient toutes les certifications"), créé par migration
+    required_certs = Column(JSONVariant, nullable=True)
 
     # [NEW] Supply Chain (Feature 8)
     # e.g. "PREPARING", "TRANSIT_TO_PORT", "AT_PORT", "FOB_COMPLETE"
     logistics_status = Column(String, default="PREPARING") 
+
+    # Compteurs de couverture (maintenus à chaque écriture d'offre, voir services/request_coverage.py)
+    covered_kg_pending = Column(Float, nullable=False, default=0.0, server_default="0")  # PENDING + NEGOTIATING
+    covered_kg_accepted = Column(Float, nullable=False, default=0.0, server_default="0")
+    covered_value_usd = Column(Float, nullable=False, default=0.0, server_default="0")  # Σ volume × prix des offres actives
+    offer_count = Column(Integer, nullable=False, default=0, server_default="0")  # Toutes offres reçues
+    best_price = Column(Float, nullable=True)  # Prix le plus bas des offres non rejetées
+    weighted_avg_price = Column(Float, nullable=True)  # Prix moyen pondéré par le volume (offres non rejetées)
+
+    # Feed keyset (created_at, id): horodatage Python (précision µs, même format partout)
+    # et défaut SQL pour les insertions hors ORM
+    created_at = Column(DateTime(timezone=True), nullable=False,
+                        default=lambda: datetime.now(timezone.utc), server_default=func.now())
+
+    # Feed des demandes ouvertes, du plus récent au plus ancien
+    __table_args__ = (
+        Index("ix_sourcing_requests_status_created", "status", "created_at", "id"),
+    )
     
-    # Relationship
-    offers = relationship("SourcingOffer", back_populates="request")
+    # Relationship (classées par le rang des offres, voir offer_rank_order)
+    offers = relationship("SourcingOffer", back_populates="request", order_by=lambda: offer_rank_order())
 
 
 class SourcingOffer(Base):
@@ -46,6 +68,7 @@ class SourcingOffer(Base):
     price_offered_usd = Column(Float)
     
     status = Column(String, default="PENDING") # PENDING, NEGOTIATING, ACCEPTED, REJECTED
+    accepted_at = Column(DateTime(timezone=True), nullable=True)  # Date du prix conclu (statistiques de marché)
     
     # Evidence
     # e.g. ["url_photo_1", "url_photo_2"]
@@ -53,7 +76,7 @@ class SourcingOffer(Base):
 
     # [NEW] Cert Proofs (Feature 7)
     # e.g. ["http://s3.../cert_bio.pdf"]
-    cert_proofs_urls = Column(JSON, nullable=True)
+    cert_proofs_urls = Column(JSONVariant, nullable=True)
 
     # [NEW] Mock Ranking (Feature 9)
     # In a real app, this is computed. For MVP we store it to simulate sorting.
@@ -62,3 +85,21 @@ class SourcingOffer(Base):
     # Relationship
     request = relationship("SourcingRequest", back_populates="offers")
     producer = relationship("ProducerProfile", back_populates="offers")
+
+
+# FEATURE 9: Ranking Strategy - trust score DESC (absent = 0), puis prix ASC, puis id (ordre total pour le keyset)
+def offer_rank_trust():
+    return func.coalesce(SourcingOffer.trust_score_snapshot, 0)
+
+
+def offer_rank_order():
+    return [offer_rank_trust().desc(), SourcingOffer.price_offered_usd.asc(), SourcingOffer.id.asc()]
+
+
+Index(
+    "ix_sourcing_offers_request_rank",
+    SourcingOffer.request_id,
+    offer_rank_trust().desc(),
+    SourcingOffer.price_offered_usd,
+    SourcingOffer.id,
+)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class OrderCreate(BaseModel):
@@ -10,10 +10,37 @@ class OrderCreate(BaseModel):
 
 class OrderResponse(BaseModel):
     id: int
-    product_id: int
+    product_id: Optional[int] = None  # None once the product is deleted
     product_name: str
     amount: float
     status: str # PENDING, CONTRACT_SIGNED, SECURED, SHIPPED
     contract_url: Optional[str] = None
     quantity_kg: Optional[float] = None
     created_at: datetime
+
+class OrderPage(BaseModel):
+    orders: List[OrderResponse]
+    next_cursor: Optional[str] = None  # None = last page
+
+
+class SalesTotals(BaseModel):
+    order_count: int
+    quantity_kg: float
+    amount: float
+
+class SalesStatusTotals(SalesTotals):
+    status: str
+
+class SalesMonthTotals(SalesTotals):
+    month: str  # "2026-10"
+
+class SalesProductTotals(SalesTotals):
+    product_id: int
+    product_name: Optional[str] = None
+
+class ProducerSalesSummaryResponse(BaseModel):
+    producer_id: int
+    totals: SalesTotals  # All statuses except REJECTED
+    by_status: List[SalesStatusTotals]
+    by_month: List[SalesMonthTotals]  # Newest first, except REJECTED
+    by_product: List[SalesProductTotals]  # Highest amount first, except REJECTED
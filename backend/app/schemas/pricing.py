@@ -1,3 +1,4 @@
+import math
 from pydantic import BaseModel, field_validator, model_validator
 from typing import Optional, List
 from datetime import datetime
@@ -152,6 +153,21 @@ class ProductPriceTiersCreate(BaseModel):
         return self
 
 
+class TierImportError(BaseModel):
+    line: Optional[int] = None  # Ligne du fichier (première ligne du produit si erreur de grille)
+    product_id: Optional[int] = None
+    detail: str
+
+
+class TierImportResponse(BaseModel):
+    """Résultat d'un import en masse de paliers (les produits en erreur ne sont pas importés)"""
+    products_imported: int
+    tiers_imported: int
+    error_count: int
+    errors: List[TierImportError] = []  # Limitée aux 1000 premières erreurs
+    dry_run: bool = False
+
+
 # ═══════════════════════════════════════════════════════════
 # PRICING MODE
 # ═══════════════════════════════════════════════════════════
@@ -212,6 +228,141 @@ class CalculatedPrice(BaseModel):
     price_trend: Optional[PriceTrendInfo] = None
 
 
+class QuoteItem(BaseModel):
+    product_id: int
+    quantity_kg: float
+
+    @field_validator('quantity_kg')
+    @classmethod
+    def validate_quantity(cls, v):
+        # NaN passe la comparaison "v <= 0" et donnerait des prix NaN
+        if not (math.isfinite(v) and v > 0):
+            raise ValueError('quantity_kg doit être un nombre positif fini')
+        return v
+
+
+class BatchQuoteRequest(BaseModel):
+    """Plusieurs couples (produit, quantité) à chiffrer en un seul appel"""
+    items: List[QuoteItem]
+
+    @field_validator('items')
+    @classmethod
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError('Au moins un élément est requis')
+        if len(v) > 1000:
+            raise ValueError('Maximum 1000 éléments par requête')
+        return v
+
+
+class QuoteError(BaseModel):
+    index: int
+    product_id: int
+    quantity_kg: float
+    status_code: int
+    detail: str
+
+
+class BatchQuoteResponse(BaseModel):
+    """Devis dans l'ordre des éléments demandés (les éléments en erreur sont listés à part)"""
+    quotes: List[CalculatedPrice] = []
+    errors: List[QuoteError] = []
+
+
+class PriceBreakpoint(BaseModel):
+    at_quantity_kg: float
+    price_per_kg: float
+    position: int
+
+
+class PriceCurveResponse(BaseModel):
+    """Courbe de prix sur une plage de quantités (tableaux parallèles à `quantities`)"""
+    product_id: int
+    pricing_mode: str
+    base_price_fob: float
+    quantities: List[float]
+    price_per_kg: List[float]
+    totals: List[float]
+    savings_amount: List[float]
+    savings_percent: List[float]
+    tier_positions: List[int]
+    next_tier_at_kg: List[Optional[float]]
+    breakpoints: List[PriceBreakpoint] = []
+
+
+# ═══════════════════════════════════════════════════════════
+# SIMULATION (what-if sur tout le catalogue d'un producteur)
+# ═══════════════════════════════════════════════════════════
+
+DEFAULT_SIMULATION_QUANTITIES = [1, 10, 50, 100, 250, 500, 1000]
+
+
+class PricingSimulationRequest(BaseModel):
+    """
+    Changements proposés, appliqués à tout le catalogue sans rien écrire:
+    - base_price_change_percent: variation du prix de base (8 = +8%)
+    - template_discount_delta: points de réduction ajoutés aux paliers des templates (2 = 10% → 12%)
+    - scale_custom_tiers: appliquer aussi la variation du prix de base aux paliers personnalisés (TIERED)
+    """
+    base_price_change_percent: float = 0.0
+    template_discount_delta: float = 0.0
+    scale_custom_tiers: bool = True
+    quantities: List[float] = DEFAULT_SIMULATION_QUANTITIES
+    product_ids: Optional[List[int]] = None  # Restreindre à certains produits
+
+    @field_validator('base_price_change_percent')
+    @classmethod
+    def validate_base_change(cls, v):
+        if v <= -100:
+            raise ValueError('base_price_change_percent doit être supérieur à -100')
+        return v
+
+    @field_validator('template_discount_delta')
+    @classmethod
+    def validate_discount_delta(cls, v):
+        if v < -100 or v > 100:
+            raise ValueError('template_discount_delta doit être entre -100 et 100')
+        return v
+
+    @field_validator('quantities')
+    @classmethod
+    def validate_quantities(cls, v):
+        if not v:
+            raise ValueError('Au moins une quantité est requise')
+        if len(v) > 50:
+            raise ValueError('Maximum 50 quantités')
+        if any(q <= 0 for q in v):
+            raise ValueError('Les quantités doivent être positives')
+        return sorted(v)
+
+
+class ProductSimulation(BaseModel):
+    """Avant / après pour un produit (price_per_kg_* parallèles à `quantities`)"""
+    product_id: int
+    name: Optional[str] = None
+    pricing_mode: str
+    base_price_before: float
+    base_price_after: float
+    price_per_kg_before: List[float]
+    price_per_kg_after: List[float]
+    historical_volume_kg: float
+    order_count: int
+    revenue_before: float
+    revenue_after: float
+    revenue_change_percent: Optional[float] = None
+
+
+class PricingSimulationResponse(BaseModel):
+    """Impact sur le chiffre d'affaires, calculé sur les volumes des commandes passées"""
+    producer_id: int
+    quantities: List[float]
+    products: List[ProductSimulation] = []
+    revenue_before: float
+    revenue_after: float
+    revenue_change: float
+    revenue_change_percent: Optional[float] = None
+
+
 # ═══════════════════════════════════════════════════════════
 # HISTORIQUE
 # ═══════════════════════════════════════════════════════════
@@ -237,3 +388,23 @@ class PriceComparisonResponse(BaseModel):
     previous_base_price: float
     price_change_percent: float
     compared_to_date: datetime
+
+
+class BatchPriceComparisonRequest(BaseModel):
+    """Comparer plusieurs produits à une même date passée"""
+    product_ids: List[int]
+    from_date: datetime
+
+    @field_validator('product_ids')
+    @classmethod
+    def validate_product_ids(cls, v):
+        if not v:
+            raise ValueError('Au moins un produit est requis')
+        if len(v) > 1000:
+            raise ValueError('Maximum 1000 produits par requête')
+        return v
+
+
+class BatchPriceComparisonResponse(BaseModel):
+    comparisons: List[PriceComparisonResponse] = []
+    missing_product_ids: List[int] = []  # Produit inconnu ou sans historique à cette date
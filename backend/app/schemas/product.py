@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
 from app.schemas.pricing import PriceTierResponse, TemplateTierResponse
 
 
@@ -37,6 +38,7 @@ class ProductResponse(BaseModel):
     image_url_ai: str
     status: str
     grade: Optional[str] = "A"
+    product_type: Optional[str] = None
 
     description: Optional[str] = None
     origin: Optional[str] = None
@@ -52,6 +54,15 @@ class ProductResponse(BaseModel):
     pricing_mode: str = "SINGLE"
     template_id: Optional[int] = None
 
+    # Pricing state (projection maintenue à chaque écriture de prix)
+    last_base_price: Optional[float] = None
+    price_changed_at: Optional[datetime] = None
+    price_trend_direction: Optional[str] = None
+    price_trend_percent: Optional[float] = None
+    effective_tier_count: Optional[int] = None
+    min_price_per_kg: Optional[float] = None
+    max_price_per_kg: Optional[float] = None
+
     class Config:
         from_attributes = True
 
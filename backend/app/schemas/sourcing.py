@@ -1,5 +1,6 @@
 from typing import List, Optional, Any
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 
 # --- OFFER SCHEMAS ---
 
@@ -29,6 +30,89 @@ class SourcingOfferResponse(SourcingOfferBase):
     class Config:
         orm_mode = True
 
+class SourcingOfferPage(BaseModel):
+    request_id: int
+    offers: List[SourcingOfferResponse]
+    next_cursor: Optional[str] = None  # None = dernière page
+
+class OfferCoverageSummary(BaseModel):
+    request_id: int
+    volume_target_kg: float
+    offer_count: int
+    status_counts: dict  # {"PENDING": 3, "ACCEPTED": 1, ...}
+    offered_kg: float  # Toutes offres sauf REJECTED
+    accepted_kg: float
+    pending_kg: float  # PENDING + NEGOTIATING
+    coverage_percent: float  # accepted_kg / volume_target_kg
+    top_offers: List[SourcingOfferResponse]
+
+class AllocationOptimizeRequest(BaseModel):
+    min_trust_score: Optional[float] = None  # Offres sous ce score exclues
+    required_certs: Optional[List[str]] = None  # Défaut: certifications de la demande
+    volume_kg: Optional[float] = Field(None, gt=0)  # Défaut: volume_target_kg
+
+class OfferAllocation(BaseModel):
+    offer_id: int
+    facilitator_id: Optional[int] = None
+    volume_kg: float
+    offered_kg: float
+    is_partial: bool
+    price_per_kg: float  # Prix au palier du volume alloué
+    tier_min_kg: Optional[float] = None
+    trust_score: Optional[float] = None
+    total_usd: float
+
+class AllocationPlan(BaseModel):
+    request_id: int
+    accepts_partial: bool
+    volume_target_kg: float
+    allocated_kg: float
+    shortfall_kg: float  # > 0 si les offres éligibles ne couvrent pas le volume
+    total_usd: float
+    average_price_per_kg: Optional[float] = None
+    allocations: List[OfferAllocation]
+    candidate_count: int  # Offres éligibles et tarifées
+    excluded_offer_count: int  # Écartées par le score de confiance ou les certifications
+    dp_offer_count: int  # Offres restant après élagage
+    grid_step_kg: float  # Pas de volume de l'optimisation
+
+class MarketStats(BaseModel):
+    """Prix conclus récents (offres acceptées + commandes) du type / grade"""
+    product_type: str
+    grade: Optional[str] = None  # None = toutes grades (pas assez d'échantillons pour la grade)
+    sample_count: int
+    mean: float
+    median: float
+    p25: float
+    p75: float
+    min: float
+    max: float
+    volatility: Optional[float] = None  # Écart-type / moyenne
+
+class OfferInsight(BaseModel):
+    offer_id: int
+    facilitator_id: Optional[int] = None
+    status: Optional[str] = None
+    volume_kg: Optional[float] = None
+    price_per_kg: Optional[float] = None
+    trust_score: Optional[float] = None
+    market_percentile: Optional[float] = None  # % des prix conclus sous cette offre
+    delta_vs_median_pct: Optional[float] = None
+    delta_vs_target_usd: Optional[float] = None
+    z_score: Optional[float] = None
+    score: float  # 0-100, plus haut = meilleure affaire pour l'acheteur
+    recommendation: str  # ACCEPT, NEGOTIATE, DECLINE
+    counter_price_usd: Optional[float] = None
+    advice: str
+
+class RequestInsights(BaseModel):
+    request_id: int
+    product_type: str
+    grade_target: Optional[str] = None
+    price_target_usd: Optional[float] = None
+    market: Optional[MarketStats] = None  # None sans historique de prix pour ce type
+    offers: List[OfferInsight]
+
 # --- REQUEST SCHEMAS ---
 
 class SourcingRequestBase(BaseModel):
@@ -53,15 +137,59 @@ class SourcingRequestResponse(SourcingRequestBase):
     
     # FEATURE 8
     logistics_status: Optional[str] = "PREPARING"
+    created_at: Optional[datetime] = None
     
-    # Computed fields for Dashboard
+    # Coverage counters for Dashboard (maintained on SourcingRequest)
+    covered_kg_pending: float = 0.0
+    covered_kg_accepted: float = 0.0
+    offer_count: int = 0
+    best_price: Optional[float] = None
+    weighted_avg_price: Optional[float] = None
+
     @property
     def total_covered_kg(self) -> float:
-        # This will be computed in validation or service layer if needed,
-        # but for simple response, we might just assume the backend passes it pre-calculated
-        # or lets frontend calculate it from 'offers'.
-        # We'll rely on the 'offers' list for now.
-        return 0.0
+        return self.covered_kg_pending + self.covered_kg_accepted
 
     class Config:
         orm_mode = True
+
+class SourcingRequestSummary(SourcingRequestBase):
+    """Demande sans offres embarquées (feed facilitateurs)"""
+    id: int
+    buyer_id: int
+    status: str
+    logistics_status: Optional[str] = "PREPARING"
+    created_at: datetime
+    covered_kg_pending: float = 0.0
+    covered_kg_accepted: float = 0.0
+    offer_count: int = 0
+    best_price: Optional[float] = None
+    weighted_avg_price: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class SourcingRequestFeedPage(BaseModel):
+    requests: List[SourcingRequestSummary]
+    next_cursor: Optional[str] = None  # None = dernière page
+
+# --- SMART MATCH SCHEMAS ---
+
+class SmartMatchCandidate(BaseModel):
+    request_id: int
+    product_type: str
+    grade_target: str
+    volume_target_kg: float
+    price_target_usd: float
+    required_certs: List[str] = []
+    matching_product_ids: List[int]
+    stock_available_kg: float
+    coverage_percent: float
+    best_price_per_kg: Optional[float] = None
+    score: float
+    has_offer: bool = False
+
+class SmartMatchResponse(BaseModel):
+    producer_id: int
+    candidate_count: int  # Toutes les demandes retenues (avant limit)
+    candidates: List[SmartMatchCandidate]
@@ -0,0 +1,272 @@
+"""
+Optimiseur d'allocation de volume entre plusieurs offres d'une demande de sourcing.
+
+Pour une demande accepts_partial, on cherche la combinaison d'offres (chacune prise en
+totalité ou en partie) qui couvre le volume cible au coût total le plus bas. Le prix
+d'une offre dépend du volume retenu: le prix offert vaut pour le volume offert, et les
+paliers effectifs du producteur donnent le prix relatif des autres volumes (le MOQ du
+premier palier interdit les prises plus petites).
+
+Chaque offre devient une liste de segments (volume min, volume max, prix/kg). Le
+problème est un sac à dos à choix multiples résolu par programmation dynamique sur une
+grille de volume (pas de 1 kg, au plus GRID_UNITS pas): pour un segment, la mise à jour
+est un minimum glissant calculé en numpy en O(grille). Avant la DP, la borne de la
+relaxation continue (remplissage au meilleur prix) écarte les offres qui ne peuvent
+pas faire partie d'une solution moins chère que l'heuristique gloutonne.
+"""
+import math
+from collections import namedtuple
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+# Taille max de la grille de volume (le pas vaut volume / GRID_UNITS au-delà de GRID_UNITS kg)
+GRID_UNITS = 1000
+
+# Offres max dans la DP après élagage (au-delà, on garde les moins chères)
+MAX_DP_OFFERS = 1000
+
+# Tolérance de comparaison des coûts (reconstruction de la solution)
+COST_TOLERANCE = 1e-6
+
+OfferCandidate = namedtuple(
+    "OfferCandidate", ["offer_id", "facilitator_id", "volume_kg", "price_per_kg", "trust_score", "tiers"]
+)
+
+# Segment de prix d'une offre sur la grille: unités [lo, hi] au prix unitaire `price_per_kg`
+Segment = namedtuple("Segment", ["lo", "hi", "price_per_kg", "tier_min_kg"])
+
+
+def _tier_price_at(tiers: List[dict], quantity_kg: float) -> float:
+    """Prix du palier applicable (paliers triés par min_quantity_kg, le premier sert sous le MOQ)"""
+    price = tiers[0]["price_per_kg"]
+    for tier in tiers:
+        if quantity_kg >= (tier["min_quantity_kg"] or 0):
+            price = tier["price_per_kg"]
+    return price
+
+
+def price_segments(candidate: OfferCandidate, step_kg: float, max_units: int) -> List[Segment]:
+    """
+    Segments de prix d'une offre sur la grille de pas `step_kg`.
+    Sans paliers: un seul segment au prix offert, de 1 pas au volume offert.
+    """
+    capacity = min(int(math.floor(candidate.volume_kg / step_kg + COST_TOLERANCE)), max_units)
+    if capacity < 1:
+        return []
+    tiers = sorted(
+        (t for t in candidate.tiers or [] if t.get("price_per_kg")),
+        key=lambda t: t["min_quantity_kg"] or 0
+    )
+    if not tiers:
+        if candidate.price_per_kg is None:
+            return []
+        return [Segment(1, capacity, candidate.price_per_kg, None)]
+
+    # Le prix offert vaut au volume offert: les paliers donnent le prix relatif des autres volumes
+    reference = _tier_price_at(tiers, candidate.volume_kg)
+    scale = candidate.price_per_kg / reference if candidate.price_per_kg is not None and reference > 0 else 1.0
+
+    segments = []
+    for i, tier in enumerate(tiers):
+        tier_min = tier["min_quantity_kg"] or 0
+        # Le MOQ du premier palier est plafonné au volume offert (offre entière toujours possible)
+        lowest = min(tier_min, candidate.volume_kg) if i == 0 else tier_min
+        lo = max(1, int(math.ceil(lowest / step_kg - COST_TOLERANCE)))
+        if i + 1 < len(tiers):
+            hi = int(math.ceil((tiers[i + 1]["min_quantity_kg"] or 0) / step_kg - COST_TOLERANCE)) - 1
+        else:
+            hi = capacity
+        hi = min(hi, capacity)
+        if lo <= hi:
+            segments.append(Segment(lo, hi, round(tier["price_per_kg"] * scale, 6), tier_min))
+    return segments
+
+
+def _sliding_min(values: np.ndarray, width: int) -> np.ndarray:
+    """out[i] = min(values[max(0, i - width + 1) .. i]) en O(n) (blocs préfixe/suffixe)"""
+    n = len(values)
+    if width <= 1:
+        return values.copy()
+    if width >= n:
+        return np.minimum.accumulate(values)
+    padded = np.concatenate([values, np.full((-n) % width, np.inf)]).reshape(-1, width)
+    prefix = np.minimum.accumulate(padded, axis=1).ravel()
+    suffix = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    out = np.empty(n)
+    out[:width - 1] = np.minimum.accumulate(values[:width - 1])
+    out[width - 1:] = np.minimum(suffix[:n - width + 1], prefix[width - 1:n])
+    return out
+
+
+class AllocationOptimizer:
+    """Allocation au coût minimum du volume d'une demande entre ses offres."""
+
+    def optimize(self, candidates: Sequence[OfferCandidate], volume_kg: float, accepts_partial: bool = True) -> dict:
+        """
+        Retourne l'allocation optimale (sur la grille) couvrant `volume_kg`, ou le plus grand
+        volume atteignable s'il est impossible de tout couvrir. Sans accepts_partial, une
+        seule offre doit couvrir tout le volume.
+        """
+        units = max(1, min(GRID_UNITS, int(math.ceil(volume_kg - COST_TOLERANCE)))) if volume_kg > 0 else 0
+        step_kg = volume_kg / units if units else 1.0
+        priced = []
+        for candidate in candidates:
+            segments = price_segments(candidate, step_kg, units)
+            if segments:
+                priced.append((candidate, segments))
+
+        plan = {
+            "volume_target_kg": volume_kg,
+            "grid_step_kg": round(step_kg, 6),
+            "candidate_count": len(priced),
+            "dp_offer_count": 0,
+        }
+        if not units or not priced:
+            return self._result(plan, [], step_kg)
+
+        if not accepts_partial:
+            choice = self._best_single(priced, units)
+            return self._result(plan, [choice] if choice else [], step_kg)
+
+        kept = self._prune(priced, units, step_kg)
+        plan["dp_offer_count"] = len(kept)
+        return self._result(plan, self._solve(kept, units, step_kg), step_kg)
+
+    @staticmethod
+    def _best_single(priced, units: int):
+        """Offre unique la moins chère pouvant fournir tout le volume"""
+        best = None
+        for candidate, segments in priced:
+            for segment in segments:
+                if segment.lo <= units <= segment.hi and (best is None or segment.price_per_kg < best[2].price_per_kg):
+                    best = (candidate, units, segment)
+        return best
+
+    def _prune(self, priced, units: int, step_kg: float):
+        """
+        Élagage par coût réduit: L = relaxation continue (chaque kg au meilleur prix de
+        l'offre), λ = prix marginal, U = coût d'une solution gloutonne. Une offre dont le
+        plus petit prélèvement possible coûte plus de U - L au-dessus de λ est écartée.
+        """
+        ranked = sorted(priced, key=lambda item: min(s.price_per_kg for s in item[1]))
+        if len(ranked) <= 1:
+            return ranked
+
+        remaining, lower_bound, marginal_price = units, 0.0, None
+        for candidate, segments in ranked:
+            price = min(s.price_per_kg for s in segments)
+            taken = min(remaining, segments[-1].hi)
+            lower_bound += taken * step_kg * price
+            remaining -= taken
+            if remaining == 0:
+                marginal_price = price
+                break
+        if marginal_price is None:
+            # Volume impossible à couvrir entièrement: toutes les offres peuvent servir
+            return ranked[:MAX_DP_OFFERS]
+
+        upper_bound = self._greedy_cost(ranked, units, step_kg)
+        if upper_bound is None:
+            return ranked[:MAX_DP_OFFERS]
+
+        kept = []
+        for candidate, segments in ranked:
+            price = min(s.price_per_kg for s in segments)
+            smallest_take = segments[0].lo * step_kg
+            if price <= marginal_price or lower_bound + (price - marginal_price) * smallest_take <= upper_bound + COST_TOLERANCE:
+                kept.append((candidate, segments))
+        return kept[:MAX_DP_OFFERS]
+
+    @staticmethod
+    def _greedy_cost(ranked, units: int, step_kg: float) -> Optional[float]:
+        """Offres entières par prix croissant, puis le reliquat sur la meilleure offre restante"""
+        remaining, cost, used = units, 0.0, set()
+        for index, (candidate, segments) in enumerate(ranked):
+            last = segments[-1]
+            if last.hi <= remaining:
+                cost += last.hi * step_kg * last.price_per_kg
+                remaining -= last.hi
+                used.add(index)
+            if remaining == 0:
+                return cost
+        tail = [
+            segment.price_per_kg
+            for index, (candidate, segments) in enumerate(ranked) if index not in used
+            for segment in segments if segment.lo <= remaining <= segment.hi
+        ]
+        return cost + remaining * step_kg * min(tail) if tail else None
+
+    @staticmethod
+    def _solve(kept, units: int, step_kg: float) -> list:
+        """
+        DP: best[k] = coût minimum pour allouer exactement k pas avec les offres vues.
+        Pour un segment [lo, hi] au coût c par pas:
+        new[k] = c·k + min(best[j] - c·j) pour j dans [k - hi, k - lo].
+        """
+        grid = np.arange(units + 1, dtype=float)
+        best = np.full(units + 1, np.inf)
+        best[0] = 0.0
+        history = [best]
+        for candidate, segments in kept:
+            new = best.copy()
+            for segment in segments:
+                unit_cost = segment.price_per_kg * step_kg
+                window = _sliding_min(best - unit_cost * grid, segment.hi - segment.lo + 1)
+                reach = units + 1 - segment.lo
+                np.minimum(new[segment.lo:], window[:reach] + unit_cost * grid[segment.lo:], out=new[segment.lo:])
+            best = new
+            history.append(best)
+
+        reachable = np.flatnonzero(np.isfinite(best))
+        k = int(reachable[-1])
+        allocations = []
+        for index in range(len(kept) - 1, -1, -1):
+            if k == 0:
+                break
+            previous, cost = history[index], history[index + 1][k]
+            if previous[k] <= cost + COST_TOLERANCE * max(1.0, cost):
+                continue
+            candidate, segments = kept[index]
+            for segment in segments:
+                if k < segment.lo:
+                    continue
+                taken = np.arange(segment.lo, min(segment.hi, k) + 1)
+                totals = previous[k - taken] + segment.price_per_kg * step_kg * taken
+                position = int(np.argmin(totals))
+                if totals[position] <= cost + COST_TOLERANCE * max(1.0, cost):
+                    allocations.append((candidate, int(taken[position]), segment))
+                    k -= int(taken[position])
+                    break
+        return allocations
+
+    @staticmethod
+    def _result(plan: dict, allocations: list, step_kg: float) -> dict:
+        lines = []
+        for candidate, taken, segment in sorted(allocations, key=lambda a: (a[2].price_per_kg, a[0].offer_id)):
+            volume = round(taken * step_kg, 3)
+            lines.append({
+                "offer_id": candidate.offer_id,
+                "facilitator_id": candidate.facilitator_id,
+                "volume_kg": volume,
+                "offered_kg": candidate.volume_kg,
+                "is_partial": volume < candidate.volume_kg - COST_TOLERANCE,
+                "price_per_kg": round(segment.price_per_kg, 2),
+                "tier_min_kg": segment.tier_min_kg,
+                "trust_score": candidate.trust_score,
+                "total_usd": round(taken * step_kg * segment.price_per_kg, 2),
+            })
+        allocated = round(sum(line["volume_kg"] for line in lines), 3)
+        total = round(sum(taken * step_kg * segment.price_per_kg for _, taken, segment in allocations), 2)
+        return {
+            **plan,
+            "allocated_kg": allocated,
+            "shortfall_kg": round(max(0.0, plan["volume_target_kg"] - allocated), 3),
+            "total_usd": total,
+            "average_price_per_kg": round(total / allocated, 2) if allocated > 0 else None,
+            "allocations": lines,
+        }
+
+
+allocation_optimizer = AllocationOptimizer()
@@ -0,0 +1,333 @@
+"""
+Statistiques de marché par (product_type, grade): médiane glissante, percentiles et
+volatilité des prix au kg conclus.
+
+Échantillons:
+- offres de sourcing ACCEPTED (price_offered_usd, type / grade de la demande, accepted_at)
+- commandes CONFIRMED ou SECURED (amount / quantity_kg, type / grade du produit, created_at)
+
+Le cache vit dans le process: il est chargé en une requête au premier usage (les
+WINDOW_SIZE derniers échantillons par clé, offres et commandes fusionnées par date),
+puis complété incrémentalement après le commit de chaque offre acceptée ou commande
+confirmée.
+Chaque clé garde sa fenêtre triée (bisect) et ses sommes: médiane, percentiles et
+volatilité se lisent sans requête. Les écritures des autres workers (et les
+annulations d'acceptation) sont rattrapées par un rechargement complet toutes les
+RELOAD_SECONDS.
+
+Chaque échantillon alimente sa clé (type, grade) et la clé (type, None) toutes
+grades confondues, utilisée quand la première a moins de MIN_SAMPLES échantillons.
+"""
+import bisect
+import math
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.models.product import Product
+from app.models.sourcing import SourcingOffer, SourcingRequest
+from app.services.product_types import normalize_product_type
+
+
+# Échantillons gardés par clé (les plus récents)
+WINDOW_SIZE = 500
+
+# Échantillons min pour utiliser la clé (type, grade) plutôt que (type, toutes grades)
+MIN_SAMPLES = 5
+
+# Rechargement complet (écritures des autres workers, acceptations annulées)
+RELOAD_SECONDS = 300
+
+# Statuts de commande comptés comme prix conclus
+ORDER_DEAL_STATUSES = ("CONFIRMED", "SECURED")
+
+PENDING_SAMPLES_KEY = "pending_market_samples"
+
+MarketKey = Tuple[str, Optional[str]]  # (product_type, grade ou None = toutes grades)
+
+# Offre à évaluer (colonnes lues en une requête par l'endpoint)
+OfferQuote = namedtuple("OfferQuote", ["offer_id", "price_per_kg", "trust_score"])
+
+
+def market_key(product_type: Optional[str], grade: Optional[str]) -> Optional[MarketKey]:
+    """Clé normalisée ("vanille bourbon", " a " -> ("Vanilla", "A")), None si type inconnu"""
+    normalized = normalize_product_type(product_type)
+    if normalized is None:
+        return None
+    grade = (grade or "").strip().upper() or None
+    return normalized, grade
+
+
+class RollingWindow:
+    """Derniers `size` prix d'une clé, avec leur version triée et leurs sommes."""
+
+    def __init__(self, size: int = WINDOW_SIZE):
+        self.size = size
+        self.samples: deque = deque()
+        self.sorted: List[float] = []
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def add(self, price: float):
+        if len(self.samples) >= self.size:
+            oldest = self.samples.popleft()
+            del self.sorted[bisect.bisect_left(self.sorted, oldest)]
+            self.total -= oldest
+            self.total_sq -= oldest * oldest
+        self.samples.append(price)
+        bisect.insort(self.sorted, price)
+        self.total += price
+        self.total_sq += price * price
+
+    def quantile(self, q: float) -> float:
+        """Quantile par interpolation linéaire (comme numpy.percentile)"""
+        position = q * (len(self.sorted) - 1)
+        low = int(math.floor(position))
+        high = min(low + 1, len(self.sorted) - 1)
+        return self.sorted[low] + (self.sorted[high] - self.sorted[low]) * (position - low)
+
+    def rank(self, price: float) -> float:
+        """Part des échantillons sous `price` (0 = moins cher que tout le marché, 1 = plus cher)"""
+        below = bisect.bisect_left(self.sorted, price)
+        equal = bisect.bisect_right(self.sorted, price) - below
+        return (below + equal / 2) / len(self.sorted)
+
+    def snapshot(self) -> dict:
+        count = len(self.sorted)
+        mean = self.total / count
+        variance = max(0.0, self.total_sq / count - mean * mean)
+        return {
+            "sample_count": count,
+            "mean": round(mean, 4),
+            "median": round(self.quantile(0.5), 4),
+            "p25": round(self.quantile(0.25), 4),
+            "p75": round(self.quantile(0.75), 4),
+            "min": self.sorted[0],
+            "max": self.sorted[-1],
+            # Coefficient de variation (écart-type / moyenne)
+            "volatility": round(math.sqrt(variance) / mean, 4) if mean > 0 else None,
+        }
+
+
+def score_offer(offer: OfferQuote, rank: Optional[float], stats: Optional[dict], target_price: Optional[float]) -> dict:
+    """
+    Évaluation d'une offre pour l'acheteur (score 0-100, plus haut = meilleure affaire):
+    70 % position du prix (percentile sur le marché, à défaut écart à la cible) et
+    30 % score de confiance. Recommandation ACCEPT / NEGOTIATE / DECLINE et prix de
+    contre-offre (médiane du marché ou cible, au plus le prix offert).
+    """
+    price = offer.price_per_kg
+    delta_target = price - target_price if price is not None and target_price else None
+    median = stats["median"] if stats else None
+    delta_median_pct = round((price - median) / median * 100, 2) if price is not None and median else None
+    z_score = None
+    if stats and price is not None and stats["volatility"]:
+        z_score = round((price - median) / (stats["volatility"] * stats["mean"]), 2)
+
+    if rank is not None:
+        price_quality = 1 - rank
+    elif delta_target is not None:
+        # Sans marché: ±50 % de la cible couvre toute l'échelle
+        price_quality = min(1.0, max(0.0, 0.5 - delta_target / target_price))
+    else:
+        price_quality = 0.5
+    trust_quality = min(1.0, max(0.0, (offer.trust_score or 0) / 5))
+    score = round(100 * (0.7 * price_quality + 0.3 * trust_quality), 1)
+
+    # Prix de référence: le plus bas entre médiane du marché et cible de l'acheteur
+    references = [value for value in (median, target_price) if value]
+    reference = min(references) if references else None
+    if price is None or reference is None:
+        recommendation, counter_price = "NEGOTIATE", None
+        advice = "Not enough market data or target price to assess this offer."
+    elif price <= reference or (rank is not None and rank <= 0.25 and (delta_target or 0) <= 0):
+        recommendation, counter_price = "ACCEPT", None
+        advice = "Great deal! Price is at or below the market and the target. Accept."
+    elif stats and price > stats["p75"] and (z_score is None or z_score > 1) and (delta_target is None or delta_target > 0):
+        recommendation, counter_price = "DECLINE", round(reference, 2)
+        advice = (f"Price is above {round(rank * 100)}% of recent deals (median ${round(median, 2)}/kg). "
+                  f"Decline or counter at ${counter_price}/kg.")
+    else:
+        recommendation = "NEGOTIATE"
+        counter_price = round((price + reference) / 2, 2)
+        if (offer.trust_score or 0) >= 4.5:
+            advice = f"Slightly above reference, but facilitator has high trust. Suggest negotiating to ${counter_price}/kg."
+        else:
+            advice = f"Above reference price ${round(reference, 2)}/kg. Suggest negotiating to ${counter_price}/kg."
+
+    return {
+        "offer_id": offer.offer_id,
+        "price_per_kg": price,
+        "trust_score": offer.trust_score,
+        "market_percentile": round(rank * 100, 1) if rank is not None else None,
+        "delta_vs_median_pct": delta_median_pct,
+        "delta_vs_target_usd": round(delta_target, 2) if delta_target is not None else None,
+        "z_score": z_score,
+        "score": score,
+        "recommendation": recommendation,
+        "counter_price_usd": counter_price,
+        "advice": advice,
+    }
+
+
+class MarketStatsService:
+    """Cache des statistiques de prix conclus par (product_type, grade)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[MarketKey, RollingWindow] = {}
+        self._loaded_at: Optional[float] = None
+
+    def window(self, db: Session, product_type: Optional[str], grade: Optional[str]) -> Optional[Tuple[MarketKey, RollingWindow]]:
+        """
+        Fenêtre de référence pour un type / grade: la clé exacte si elle a assez
+        d'échantillons, sinon toutes grades confondues. None sans aucun échantillon.
+        """
+        self._ensure_loaded(db)
+        key = market_key(product_type, grade)
+        if key is None:
+            return None
+        with self._lock:
+            exact = self._windows.get(key)
+            if exact is not None and len(exact.sorted) >= MIN_SAMPLES:
+                return key, exact
+            # La fenêtre toutes grades contient aussi les échantillons de la clé exacte
+            fallback = self._windows.get((key[0], None))
+            if fallback is not None and fallback.sorted:
+                return (key[0], None), fallback
+        return None
+
+    def stats(self, db: Session, product_type: Optional[str], grade: Optional[str]) -> Optional[dict]:
+        found = self.window(db, product_type, grade)
+        if found is None:
+            return None
+        (key_type, key_grade), window = found
+        with self._lock:
+            return {"product_type": key_type, "grade": key_grade, **window.snapshot()}
+
+    def score_offers(
+        self,
+        db: Session,
+        product_type: Optional[str],
+        grade: Optional[str],
+        target_price: Optional[float],
+        offers: Iterable[OfferQuote],
+    ) -> Tuple[Optional[dict], List[dict]]:
+        """
+        Positionne chaque offre sur le marché de la demande (une seule lecture du cache).
+        Retourne (statistiques du marché ou None, évaluation par offre dans l'ordre reçu).
+        """
+        offers = list(offers)
+        found = self.window(db, product_type, grade)
+        with self._lock:
+            stats = None
+            if found is not None:
+                (key_type, key_grade), window = found
+                stats = {"product_type": key_type, "grade": key_grade, **window.snapshot()}
+            ranks = [
+                window.rank(offer.price_per_kg) if stats and offer.price_per_kg is not None else None
+                for offer in offers
+            ]
+        return stats, [score_offer(offer, rank, stats, target_price) for offer, rank in zip(offers, ranks)]
+
+    def record_after_commit(self, db: Session, product_type: Optional[str], grade: Optional[str], price_per_kg: Optional[float]):
+        """
+        Ajoute un prix conclu au cache quand la transaction de `db` est commitée
+        (rien en cas de rollback). Ne commit pas.
+        """
+        key = market_key(product_type, grade)
+        if key is None or not price_per_kg or price_per_kg <= 0:
+            return
+        db.info.setdefault(PENDING_SAMPLES_KEY, []).append((key, float(price_per_kg)))
+
+    def invalidate(self):
+        """Force un rechargement complet au prochain usage"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _add(self, samples: Iterable[Tuple[MarketKey, float]]):
+        with self._lock:
+            if self._loaded_at is None:
+                return  # le chargement initial lira ces prix en base
+            for key, price in samples:
+                for target in (key, (key[0], None)) if key[1] is not None else (key,):
+                    self._windows.setdefault(target, RollingWindow()).add(price)
+
+    def _ensure_loaded(self, db: Session):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < RELOAD_SECONDS:
+                return
+        windows: Dict[MarketKey, RollingWindow] = {}
+        # Du plus ancien au plus récent: la fenêtre garde les WINDOW_SIZE derniers
+        for product_type, grade, price in self._load_samples(db):
+            key = market_key(product_type, grade)
+            if key is None or not price or price <= 0:
+                continue
+            for target in (key, (key[0], None)) if key[1] is not None else (key,):
+                windows.setdefault(target, RollingWindow()).add(float(price))
+        with self._lock:
+            self._windows = windows
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _load_samples(db: Session) -> List[tuple]:
+        """
+        Prix conclus (type, grade, prix/kg), les WINDOW_SIZE plus récents par type et
+        grade, offres et commandes fusionnées par date (la fenêtre toutes grades se
+        remplit avec les mêmes lignes, dans le même ordre).
+        """
+        offers = select(
+            SourcingRequest.product_type.label("product_type"),
+            SourcingRequest.grade_target.label("grade"),
+            SourcingOffer.price_offered_usd.label("price"),
+            # Offres acceptées avant accepted_at: date de la demande
+            func.coalesce(SourcingOffer.accepted_at, SourcingRequest.created_at).label("concluded_at"),
+        ).join(SourcingRequest, SourcingRequest.id == SourcingOffer.request_id).where(
+            SourcingOffer.status == "ACCEPTED",
+            SourcingOffer.price_offered_usd > 0,
+        )
+
+        orders = select(
+            Product.product_type.label("product_type"),
+            Product.grade.label("grade"),
+            (Order.amount / Order.quantity_kg).label("price"),
+            Order.created_at.label("concluded_at"),
+        ).join(Product, Product.id == Order.product_id).where(
+            Order.status.in_(ORDER_DEAL_STATUSES),
+            Order.amount > 0,
+            Order.quantity_kg > 0,
+        )
+
+        samples = union_all(offers, orders).subquery()
+        ranked = select(
+            samples.c.product_type, samples.c.grade, samples.c.price, samples.c.concluded_at,
+            func.row_number().over(
+                partition_by=(samples.c.product_type, samples.c.grade),
+                order_by=samples.c.concluded_at.desc()
+            ).label("position"),
+        ).subquery()
+
+        return db.execute(
+            select(ranked.c.product_type, ranked.c.grade, ranked.c.price)
+            .where(ranked.c.position <= WINDOW_SIZE)
+            .order_by(ranked.c.concluded_at, ranked.c.position.desc())
+        ).all()
+
+market_stats = MarketStatsService()
+
+
+@event.listens_for(Session, "after_commit")
+def _record_pending_samples(session: Session):
+    samples = session.info.pop(PENDING_SAMPLES_KEY, None)
+    if samples:
+        market_stats._add(samples)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_samples(session: Session):
+    session.info.pop(PENDING_SAMPLES_KEY, None)
@@ -0,0 +1,256 @@
+"""
+Outbox transactionnel: effets de bord des commandes et produits exécutés après commit.
+
+Les endpoints ajoutent un OutboxEvent dans la transaction de leur écriture (un seul
+commit, aucun effet de bord synchrone): l'événement existe si et seulement si la
+commande / le produit existe. Un dispatcher en tâche de fond (un thread par worker,
+démarré avec l'application) lit les événements en attente par lots, les groupe par
+type et appelle le handler du type une fois par lot:
+- trace_event: insertion groupée des TraceabilityEvent (ceux d'un produit supprimé
+  entre-temps sont abandonnés: leur clé étrangère échouerait à chaque tentative)
+- producer_transaction: track record des producteurs (transactions_count)
+- notification: messages aux producteurs (journalisés pour le MVP)
+
+Le handler et la suppression des événements traités sont commités ensemble: un lot
+n'est jamais appliqué deux fois. Si le handler échoue sur un lot, ses événements sont
+rejoués un par un: seuls ceux en échec sont retentés avec un délai croissant, puis
+marqués failed_at après MAX_ATTEMPTS tentatives.
+Sur PostgreSQL, FOR UPDATE SKIP LOCKED répartit les lots entre les workers.
+Les notifications sont au moins une fois (un échec après envoi rejoue le lot).
+"""
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent
+from app.models.producer import ProducerProfile, TraceabilityEvent
+from app.models.product import Product
+
+
+logger = logging.getLogger(__name__)
+
+# Événements lus par lot
+BATCH_SIZE = 200
+
+# Attente max du dispatcher entre deux lectures (événements des autres workers);
+# les commits de ce process le réveillent immédiatement
+POLL_SECONDS = 2.0
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 5  # 5 s, 10 s, 20 s, 40 s
+
+PENDING_OUTBOX_KEY = "pending_outbox_events"
+
+Handler = Callable[[Session, List[dict]], None]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def trace_event_payload(**fields) -> dict:
+    """Colonnes d'un TraceabilityEvent, horodaté à l'écriture (pas au traitement)"""
+    return {**fields, "timestamp": _utcnow().isoformat()}
+
+
+def _insert_trace_events(db: Session, payloads: List[dict]):
+    product_ids = {payload["product_id"] for payload in payloads if payload.get("product_id") is not None}
+    if product_ids:
+        existing = set(db.execute(select(Product.id).where(Product.id.in_(product_ids))).scalars())
+        kept = [payload for payload in payloads if payload.get("product_id") is None or payload["product_id"] in existing]
+        if len(kept) < len(payloads):
+            logger.info("Dropped %d trace events of deleted products", len(payloads) - len(kept))
+        payloads = kept
+    rows = []
+    for payload in payloads:
+        row = dict(payload)
+        if row.get("timestamp"):
+            row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+        rows.append(row)
+    # Lignes homogènes par jeu de colonnes (un INSERT multi-lignes chacun)
+    by_columns = defaultdict(list)
+    for row in rows:
+        by_columns[tuple(sorted(row))].append(row)
+    for batch in by_columns.values():
+        db.execute(insert(TraceabilityEvent.__table__), batch)
+
+
+def _count_producer_transactions(db: Session, payloads: List[dict]):
+    """Une transaction réussie de plus par commande confirmée, pour le producteur du produit"""
+    product_ids = Counter(payload["product_id"] for payload in payloads if payload.get("product_id"))
+    if not product_ids:
+        return
+    producers = Counter()
+    for product_id, producer_id in db.execute(
+        select(Product.id, Product.producer_id).where(Product.id.in_(list(product_ids)))
+    ):
+        if producer_id is not None:
+            producers[producer_id] += product_ids[product_id]
+    if producers:
+        table = ProducerProfile.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(
+                transactions_count=func.coalesce(table.c.transactions_count, 0) + bindparam("b_count")
+            ),
+            [{"b_id": producer_id, "b_count": count} for producer_id, count in producers.items()]
+        )
+
+
+def _send_notifications(db: Session, payloads: List[dict]):
+    # MVP: pas encore de canal push / WhatsApp, les messages sont journalisés
+    for payload in payloads:
+        logger.info("Notification to producer %s: %s", payload.get("producer_id"), payload.get("message"))
+
+
+class OutboxService:
+    """Écriture des événements dans la transaction de l'appelant et dispatcher de fond."""
+
+    def __init__(self):
+        self._handlers: Dict[str, Handler] = {
+            "trace_event": _insert_trace_events,
+            "producer_transaction": _count_producer_transactions,
+            "notification": _send_notifications,
+        }
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, kind: str, handler: Handler):
+        self._handlers[kind] = handler
+
+    def enqueue(self, db: Session, kind: str, payload: dict):
+        """Ajoute un effet de bord à la transaction de `db`. Ne commit pas."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown outbox event kind: {kind!r}")
+        db.add(OutboxEvent(kind=kind, payload=payload))
+        db.info[PENDING_OUTBOX_KEY] = True
+
+    def drain(self, db: Session, limit: int = BATCH_SIZE) -> int:
+        """
+        Traite un lot d'événements disponibles et commit. Retourne le nombre d'événements
+        lus (traités ou reportés).
+        """
+        query = select(OutboxEvent).where(
+            OutboxEvent.failed_at.is_(None), OutboxEvent.available_at <= _utcnow()
+        ).order_by(OutboxEvent.available_at, OutboxEvent.id).limit(limit)
+        if db.get_bind().dialect.name == "postgresql":
+            query = query.with_for_update(skip_locked=True)
+        events = db.execute(query).scalars().all()
+        if not events:
+            db.rollback()
+            return 0
+
+        by_kind: Dict[str, List[OutboxEvent]] = defaultdict(list)
+        for outbox_event in events:
+            by_kind[outbox_event.kind].append(outbox_event)
+
+        done = []
+        for kind, batch in by_kind.items():
+            handler = self._handlers.get(kind)
+            if handler is None:
+                exc = LookupError(f"No outbox handler for {kind!r}")
+                logger.error("%s (%d events)", exc, len(batch))
+                for outbox_event in batch:
+                    self._postpone(outbox_event, exc)
+                continue
+            try:
+                with db.begin_nested():
+                    handler(db, [outbox_event.payload for outbox_event in batch])
+                done.extend(outbox_event.id for outbox_event in batch)
+            except Exception as exc:
+                logger.exception("Outbox handler %r failed for %d events", kind, len(batch))
+                if len(batch) == 1:
+                    self._postpone(batch[0], exc)
+                else:
+                    # Un événement invalide ne bloque pas le lot: chaque événement est rejoué seul
+                    done.extend(self._apply_one_by_one(db, kind, handler, batch))
+
+        if done:
+            db.execute(delete(OutboxEvent.__table__).where(OutboxEvent.__table__.c.id.in_(done)))
+        db.commit()
+        return len(events)
+
+    def _apply_one_by_one(self, db: Session, kind: str, handler: Handler, batch: List[OutboxEvent]) -> List[int]:
+        """Applique chaque événement dans son savepoint, reporte ceux en échec. Retourne les ids traités."""
+        done = []
+        for outbox_event in batch:
+            try:
+                with db.begin_nested():
+                    handler(db, [outbox_event.payload])
+                done.append(outbox_event.id)
+            except Exception as exc:
+                logger.warning("Outbox event %s (%r) failed: %s", outbox_event.id, kind, exc)
+                self._postpone(outbox_event, exc)
+        return done
+
+    @staticmethod
+    def _postpone(outbox_event: OutboxEvent, exc: Exception):
+        outbox_event.attempts = (outbox_event.attempts or 0) + 1
+        outbox_event.last_error = f"{type(exc).__name__}: {exc}"[:500]
+        if outbox_event.attempts >= MAX_ATTEMPTS:
+            outbox_event.failed_at = _utcnow()
+        else:
+            delay = RETRY_BASE_SECONDS * 2 ** (outbox_event.attempts - 1)
+            outbox_event.available_at = _utcnow() + timedelta(seconds=delay)
+
+    def drain_all(self) -> int:
+        """Vide la file (lots successifs, session dédiée). Retourne le nombre d'événements lus."""
+        total = 0
+        db = SessionLocal()
+        try:
+            while True:
+                count = self.drain(db)
+                total += count
+                if count < BATCH_SIZE:
+                    return total
+        finally:
+            db.close()
+
+    def start(self):
+        """Démarre le dispatcher de ce process (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.drain_all()
+            except Exception:
+                logger.exception("Outbox dispatcher failed, retrying")
+
+
+outbox = OutboxService()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_dispatcher(session: Session):
+    if session.info.pop(PENDING_OUTBOX_KEY, False):
+        outbox.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_pending(session: Session):
+    session.info.pop(PENDING_OUTBOX_KEY, None)
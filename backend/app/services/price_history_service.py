@@ -0,0 +1,83 @@
+"""
+Lectures "as-of" de l'historique des prix.
+
+Toutes les requêtes ne lisent que (product_id, changed_at, base_price_fob), couverts par
+l'index ix_price_tier_history_product_changed_at: PostgreSQL les sert en index-only scan.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, func, true
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.pricing import PriceTierHistory
+
+
+class PriceHistoryService:
+
+    def as_of(self, db: Session, product_id: int, at: Optional[datetime] = None):
+        """
+        Snapshot valide à la date `at` (le dernier snapshot si `at` est None).
+        Retourne une ligne (product_id, changed_at, base_price_fob) ou None.
+        """
+        stmt = select(
+            PriceTierHistory.product_id,
+            PriceTierHistory.changed_at,
+            PriceTierHistory.base_price_fob,
+        ).where(PriceTierHistory.product_id == product_id)
+        if at is not None:
+            stmt = stmt.where(PriceTierHistory.changed_at <= at)
+        return db.execute(stmt.order_by(PriceTierHistory.changed_at.desc()).limit(1)).first()
+
+    def as_of_many(self, db: Session, product_ids: Iterable[int], at: Optional[datetime] = None) -> Dict[int, object]:
+        """
+        Snapshot valide à la date `at` pour plusieurs produits, en une seule requête.
+        Retourne {product_id: ligne (product_id, current_price, changed_at, base_price_fob)}
+        pour chaque produit existant (changed_at/base_price_fob à None s'il n'a pas d'historique).
+        """
+        product_ids = list(set(product_ids))
+        if not product_ids:
+            return {}
+
+        products = select(
+            Product.id.label("product_id"),
+            Product.price_fob.label("current_price"),
+        ).where(Product.id.in_(product_ids)).subquery("p")
+
+        if db.get_bind().dialect.name == "postgresql":
+            # LATERAL: un "LIMIT 1" indexé par produit
+            snapshot = select(PriceTierHistory.changed_at, PriceTierHistory.base_price_fob).where(
+                PriceTierHistory.product_id == products.c.product_id
+            )
+            if at is not None:
+                snapshot = snapshot.where(PriceTierHistory.changed_at <= at)
+            snapshot = snapshot.order_by(PriceTierHistory.changed_at.desc()).limit(1).lateral("h")
+            stmt = select(
+                products.c.product_id, products.c.current_price,
+                snapshot.c.changed_at, snapshot.c.base_price_fob,
+            ).select_from(products.outerjoin(snapshot, true()))
+        else:
+            ranked = select(
+                PriceTierHistory.product_id,
+                PriceTierHistory.changed_at,
+                PriceTierHistory.base_price_fob,
+                func.row_number().over(
+                    partition_by=PriceTierHistory.product_id,
+                    order_by=PriceTierHistory.changed_at.desc()
+                ).label("rn"),
+            ).where(PriceTierHistory.product_id.in_(product_ids))
+            if at is not None:
+                ranked = ranked.where(PriceTierHistory.changed_at <= at)
+            ranked = ranked.subquery("h")
+            stmt = select(
+                products.c.product_id, products.c.current_price,
+                ranked.c.changed_at, ranked.c.base_price_fob,
+            ).select_from(products.outerjoin(
+                ranked, (ranked.c.product_id == products.c.product_id) & (ranked.c.rn == 1)
+            ))
+
+        return {row.product_id: row for row in db.execute(stmt)}
+
+
+price_history_service = PriceHistoryService()
@@ -0,0 +1,354 @@
+"""
+Moteur de tarification en mémoire.
+
+Les paliers effectifs d'un produit (SINGLE, TIERED ou TEMPLATE) sont compilés
+une seule fois en tableaux parallèles triés par quantité minimum. Un devis
+devient alors une simple recherche par bisection, sans requête SQL.
+
+Chaque écriture de prix incrémente Product.pricing_version (endpoints, import de
+paliers, templates). Une grille en cache n'est servie que si sa version est encore
+celle de la base: une requête d'une colonne par lecture, qui voit aussi les
+écritures des autres process et des scripts. Les endpoints invalident en plus
+explicitement pour libérer l'entrée tout de suite.
+"""
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.product import Product
+from app.models.pricing import PriceTierTemplate
+from app.schemas.pricing import CalculatedPrice, TierApplied, NextTierInfo, PriceTrendInfo
+
+
+UNLIMITED = float("inf")
+
+# Chargement explicite de tout ce qu'il faut pour tarifer un produit (paliers propres,
+# template et ses paliers) dans la même requête, sans lazy load ensuite.
+PRICING_LOADER_OPTIONS = (
+    joinedload(Product.price_tiers),
+    joinedload(Product.price_template).joinedload(PriceTierTemplate.tiers),
+)
+
+
+def load_pricing_product(db: Session, product_id: int) -> Optional[Product]:
+    """Charge un produit avec ses paliers et son template en une seule requête"""
+    return db.query(Product).options(*PRICING_LOADER_OPTIONS).filter(Product.id == product_id).first()
+
+
+def get_effective_tiers(product: Product) -> List[dict]:
+    """Retourne les paliers effectifs (calculés) pour un produit"""
+    if product.pricing_mode == "SINGLE":
+        return [{
+            "min_quantity_kg": product.moq_kg,
+            "max_quantity_kg": None,
+            "price_per_kg": product.price_fob,
+            "position": 0,
+            "discount_percent": 0
+        }]
+    elif product.pricing_mode == "TIERED":
+        return [
+            {
+                "min_quantity_kg": t.min_quantity_kg,
+                "max_quantity_kg": t.max_quantity_kg,
+                "price_per_kg": t.price_per_kg,
+                "position": t.position,
+                "discount_percent": round((1 - t.price_per_kg / product.price_fob) * 100, 2) if product.price_fob > 0 else 0
+            }
+            for t in sorted(product.price_tiers, key=lambda x: x.position)
+        ]
+    elif product.pricing_mode == "TEMPLATE" and product.price_template:
+        return [
+            {
+                "min_quantity_kg": t.min_quantity_kg,
+                "max_quantity_kg": t.max_quantity_kg,
+                "price_per_kg": round(product.price_fob * (1 - t.discount_percent / 100), 2),
+                "position": t.position,
+                "discount_percent": t.discount_percent
+            }
+            for t in sorted(product.price_template.tiers, key=lambda x: x.position)
+        ]
+    return []
+
+
+def refresh_pricing_state(product: Product):
+    """
+    Recalcule la projection tarifaire dénormalisée du produit (tendance + stats des paliers)
+    et incrémente sa pricing_version (ETag des lectures de prix).
+    À appeler dans la transaction de chaque écriture de prix, avant le commit.
+    """
+    # Incrément côté SQL: deux écritures concurrentes ne peuvent pas produire la même version
+    product.pricing_version = Product.pricing_version + 1
+
+    tiers = get_effective_tiers(product)
+    prices = [t["price_per_kg"] for t in tiers if t["price_per_kg"] is not None]
+    product.effective_tier_count = len(tiers)
+    product.min_price_per_kg = min(prices) if prices else None
+    product.max_price_per_kg = max(prices) if prices else None
+
+    last_base_price = product.last_base_price
+    if last_base_price and product.price_fob is not None and product.price_fob != last_base_price:
+        change_percent = round((product.price_fob - last_base_price) / last_base_price * 100, 2)
+        product.price_trend_direction = "down" if change_percent < 0 else "up" if change_percent > 0 else "stable"
+        product.price_trend_percent = abs(change_percent)
+    else:
+        product.price_trend_direction = None
+        product.price_trend_percent = None
+
+
+class CompiledPricing:
+    """
+    Grille tarifaire compilée d'un produit.
+    mins / maxs / prices / positions sont des tuples parallèles triés par min_quantity_kg
+    (max illimité = +inf).
+    """
+    __slots__ = (
+        "product_id", "pricing_mode", "base_price", "moq_kg", "template_id",
+        "version", "tiers", "mins", "maxs", "prices", "positions",
+        "trend_direction", "trend_percent", "trend_since",
+    )
+
+    def __init__(self, product: Product):
+        self.product_id = product.id
+        self.pricing_mode = product.pricing_mode
+        self.base_price = product.price_fob
+        self.moq_kg = product.moq_kg
+        self.template_id = product.template_id
+        self.version = product.pricing_version
+
+        # Paliers dans l'ordre d'affichage (position)
+        self.tiers = get_effective_tiers(product)
+
+        by_min = sorted(self.tiers, key=lambda t: t["min_quantity_kg"])
+        self.mins = tuple(t["min_quantity_kg"] for t in by_min)
+        self.maxs = tuple(UNLIMITED if t["max_quantity_kg"] is None else t["max_quantity_kg"] for t in by_min)
+        self.prices = tuple(t["price_per_kg"] for t in by_min)
+        self.positions = tuple(t["position"] for t in by_min)
+
+        # Tendance des prix (projection maintenue sur Product, voir refresh_pricing_state)
+        self.trend_direction = product.price_trend_direction
+        self.trend_percent = product.price_trend_percent
+        self.trend_since = product.price_changed_at
+
+    def find_tier_index(self, quantity_kg: float) -> int:
+        """
+        Index du palier applicable (même règle que l'ancien find_applicable_tier):
+        le palier de plus grand minimum <= quantité dont le maximum couvre la quantité,
+        sinon le premier palier.
+        """
+        idx = bisect_right(self.mins, quantity_kg) - 1
+        while idx >= 0:
+            if quantity_kg <= self.maxs[idx]:
+                return idx
+            idx -= 1
+        return 0
+
+    def find_tier_indices(self, quantities: np.ndarray) -> np.ndarray:
+        """Version vectorisée de find_tier_index (searchsorted sur les minimums)"""
+        mins = np.asarray(self.mins)
+        maxs = np.asarray(self.maxs)
+        idx = np.searchsorted(mins, quantities, side="right") - 1
+
+        covered = (idx >= 0) & (quantities <= maxs[np.clip(idx, 0, None)])
+        if not covered.all():
+            # Quantités tombant dans un trou entre paliers: on redescend palier par palier
+            unresolved = ~covered
+            for j in range(len(mins) - 1, -1, -1):
+                hit = unresolved & (quantities >= mins[j]) & (quantities <= maxs[j])
+                idx[hit] = j
+                unresolved &= ~hit
+            idx[unresolved] = 0
+        return idx
+
+
+class PricingEngine:
+    """Cache LRU des grilles compilées, partagé par le process."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, CompiledPricing]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Cache ---
+
+    def get(self, db: Session, product_id: int, version: Optional[int] = None) -> Optional[CompiledPricing]:
+        """
+        Retourne la grille compilée d'un produit (None si le produit n'existe pas).
+        `version`: pricing_version déjà lue par l'appelant (évite de la relire).
+        """
+        versions = None if version is None else {product_id: version}
+        return self.get_many(db, [product_id], versions).get(product_id)
+
+    def versions(self, db: Session, product_ids: Iterable[int]) -> Dict[int, int]:
+        """pricing_version courante des produits (les IDs inconnus sont omis)"""
+        return dict(db.query(Product.id, Product.pricing_version).filter(Product.id.in_(list(product_ids))).all())
+
+    def get_many(
+        self, db: Session, product_ids: Iterable[int], versions: Optional[Dict[int, int]] = None
+    ) -> Dict[int, CompiledPricing]:
+        """
+        Retourne les grilles compilées de plusieurs produits.
+        Les entrées du cache sont vérifiées contre la pricing_version de la base (une
+        requête d'une colonne); les produits absents ou périmés sont chargés en UNE
+        requête (produits, paliers et paliers du template), sans lire l'historique.
+        Les IDs inconnus sont omis.
+        """
+        product_ids = set(product_ids)
+        if versions is None:
+            versions = self.versions(db, product_ids)
+
+        found: Dict[int, CompiledPricing] = {}
+        missing = []
+        with self._lock:
+            for product_id in product_ids:
+                if product_id not in versions:
+                    continue
+                compiled = self._entries.get(product_id)
+                if compiled is not None and compiled.version == versions[product_id]:
+                    self._entries.move_to_end(product_id)
+                    found[product_id] = compiled
+                else:
+                    missing.append(product_id)
+
+        if missing:
+            for compiled in self._load(db, missing):
+                self._store(compiled)
+                found[compiled.product_id] = compiled
+        return found
+
+    def _load(self, db: Session, product_ids: List[int]) -> List[CompiledPricing]:
+        products = db.query(Product).options(*PRICING_LOADER_OPTIONS).filter(
+            Product.id.in_(product_ids)
+        ).all()
+        return [CompiledPricing(product) for product in products]
+
+    def _store(self, compiled: CompiledPricing):
+        with self._lock:
+            # Chargement concurrent plus récent déjà en cache: ne pas le remplacer
+            current = self._entries.get(compiled.product_id)
+            if current is not None and current.version > compiled.version:
+                return
+            self._entries[compiled.product_id] = compiled
+            self._entries.move_to_end(compiled.product_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, product_id: int):
+        with self._lock:
+            self._entries.pop(product_id, None)
+
+    def invalidate_template(self, template_id: int):
+        """Invalide tous les produits compilés qui utilisent ce template"""
+        with self._lock:
+            stale = [pid for pid, c in self._entries.items() if c.template_id == template_id]
+            for pid in stale:
+                del self._entries[pid]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # --- Calcul ---
+
+    def quote(self, compiled: CompiledPricing, quantity_kg: float) -> CalculatedPrice:
+        """Calcule le prix pour une quantité donnée (aucun accès base de données)"""
+        if not compiled.mins:
+            # Fallback au prix de base
+            return CalculatedPrice(
+                product_id=compiled.product_id,
+                quantity_kg=quantity_kg,
+                pricing_mode=compiled.pricing_mode,
+                price_per_kg=compiled.base_price,
+                total=round(compiled.base_price * quantity_kg, 2)
+            )
+
+        idx = compiled.find_tier_index(quantity_kg)
+        price_per_kg = compiled.prices[idx]
+        total = round(price_per_kg * quantity_kg, 2)
+
+        # Économies vs prix de base
+        base_price = compiled.base_price
+        savings_vs_base = None
+        if base_price > 0 and price_per_kg < base_price:
+            savings_amount = round((base_price - price_per_kg) * quantity_kg, 2)
+            savings_percent = round((1 - price_per_kg / base_price) * 100, 2)
+            savings_vs_base = {"percent": savings_percent, "amount": savings_amount}
+
+        # Prochain palier
+        next_tier = None
+        if idx < len(compiled.mins) - 1:
+            next_min = compiled.mins[idx + 1]
+            next_price = compiled.prices[idx + 1]
+            next_tier = NextTierInfo(
+                at_quantity_kg=next_min,
+                price_per_kg=next_price,
+                extra_savings_total=round((price_per_kg - next_price) * next_min, 2)
+            )
+
+        # Tendance des prix (projection dénormalisée)
+        price_trend = None
+        if compiled.trend_direction:
+            price_trend = PriceTrendInfo(
+                direction=compiled.trend_direction,
+                percent=compiled.trend_percent,
+                since=compiled.trend_since
+            )
+
+        max_quantity = compiled.maxs[idx]
+        return CalculatedPrice(
+            product_id=compiled.product_id,
+            quantity_kg=quantity_kg,
+            pricing_mode=compiled.pricing_mode,
+            tier_applied=TierApplied(
+                min_quantity_kg=compiled.mins[idx],
+                max_quantity_kg=None if max_quantity == UNLIMITED else max_quantity,
+                position=compiled.positions[idx]
+            ),
+            price_per_kg=price_per_kg,
+            total=total,
+            savings_vs_base=savings_vs_base,
+            next_tier=next_tier,
+            price_trend=price_trend
+        )
+
+    def curve(self, compiled: CompiledPricing, quantities: np.ndarray) -> dict:
+        """
+        Courbe prix / total / économies sur un ensemble de quantités (calcul vectorisé).
+        Retourne des tableaux parallèles à `quantities`.
+        """
+        base_price = compiled.base_price
+        if not compiled.mins:
+            price_per_kg = np.full(quantities.shape, base_price, dtype=float)
+            positions = np.zeros(quantities.shape, dtype=int)
+            next_at = np.full(quantities.shape, np.nan)
+        else:
+            idx = compiled.find_tier_indices(quantities)
+            price_per_kg = np.asarray(compiled.prices, dtype=float)[idx]
+            positions = np.asarray(compiled.positions)[idx]
+            next_mins = np.append(np.asarray(compiled.mins[1:], dtype=float), np.nan)
+            next_at = next_mins[idx]
+
+        totals = np.round(price_per_kg * quantities, 2)
+        if base_price > 0:
+            discounted = price_per_kg < base_price
+            savings_amount = np.where(discounted, np.round((base_price - price_per_kg) * quantities, 2), 0.0)
+            savings_percent = np.where(discounted, np.round((1 - price_per_kg / base_price) * 100, 2), 0.0)
+        else:
+            savings_amount = np.zeros(quantities.shape)
+            savings_percent = np.zeros(quantities.shape)
+
+        return {
+            "quantities": quantities.tolist(),
+            "price_per_kg": price_per_kg.tolist(),
+            "totals": totals.tolist(),
+            "savings_amount": savings_amount.tolist(),
+            "savings_percent": savings_percent.tolist(),
+            "tier_positions": positions.tolist(),
+            "next_tier_at_kg": [None if np.isnan(v) else v for v in next_at.tolist()],
+        }
+
+
+pricing_engine = PricingEngine()
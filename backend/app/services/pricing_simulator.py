@@ -0,0 +1,268 @@
+"""
+Simulateur de tarification (what-if) sur tout le catalogue d'un producteur.
+
+Le catalogue est chargé une seule fois en tableaux colonnes: une ligne par produit,
+les paliers complétés jusqu'à la largeur de la plus grande grille (min = +inf pour
+les cases vides). Les changements proposés et la recherche du palier applicable sont
+ensuite calculés en numpy pour tous les produits à la fois. Rien n'est écrit en base.
+"""
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.models.product import Product
+from app.models.pricing import PriceTier, TemplateTier
+from app.schemas.pricing import PricingSimulationRequest
+
+
+UNLIMITED = float("inf")
+
+# Commandes exclues des volumes historiques
+EXCLUDED_ORDER_STATUSES = ("REJECTED",)
+
+MODE_SINGLE, MODE_TIERED, MODE_TEMPLATE = 0, 1, 2
+MODE_CODES = {"SINGLE": MODE_SINGLE, "TIERED": MODE_TIERED, "TEMPLATE": MODE_TEMPLATE}
+
+
+def _pad_tiers(owner_index: np.ndarray, mins: np.ndarray, maxs: np.ndarray, columns: List[np.ndarray], n_rows: int):
+    """
+    Range des paliers "longs" (une ligne par palier) en tableaux (n_rows x largeur),
+    triés par minimum dans chaque ligne. Retourne (mins, maxs, [colonnes], nombre de paliers).
+    """
+    counts = np.bincount(owner_index, minlength=n_rows)
+    width = max(int(counts.max()) if n_rows else 0, 1)
+
+    order = np.lexsort((mins, owner_index))
+    owner_index = owner_index[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = np.arange(len(owner_index)) - starts[owner_index]
+
+    def pad(values, fill):
+        padded = np.full((n_rows, width), fill)
+        padded[owner_index, position] = values[order]
+        return padded
+
+    return pad(mins, UNLIMITED), pad(maxs, UNLIMITED), [pad(c, np.nan) for c in columns], counts
+
+
+def _fetch_columns(db: Session, stmt, n_columns: int) -> list:
+    """Exécute une requête Core et retourne ses colonnes (tuples) plutôt que ses lignes"""
+    rows = db.connection().execute(stmt).all()
+    return list(zip(*rows)) if rows else [()] * n_columns
+
+
+def _float_column(values, none_as: float = np.nan) -> np.ndarray:
+    column = np.array(values, dtype=float)  # None -> nan
+    if not np.isnan(none_as):
+        column[np.isnan(column)] = none_as
+    return column
+
+
+class CatalogGrid:
+    """Catalogue d'un producteur en colonnes (produits x paliers)"""
+
+    def __init__(self, products: list, custom_tiers: list, template_tiers: list):
+        ids, names, modes, base_prices, moqs, template_ids = products
+        n = len(ids)
+        self.product_ids = np.array(ids, dtype=np.int64)
+        self.names = list(names)
+        self.mode_labels = [mode or "SINGLE" for mode in modes]
+        self.modes = np.array([MODE_CODES.get(mode, MODE_SINGLE) for mode in modes], dtype=np.int8)
+        self.base_prices = _float_column(base_prices, none_as=0.0)
+        moqs = _float_column(moqs, none_as=0.0)
+
+        # SINGLE: un palier unique à partir du MOQ
+        single_rows = np.flatnonzero(self.modes == MODE_SINGLE)
+
+        # TIERED: paliers personnalisés (la ligne produit est retrouvée par searchsorted, ids triés)
+        tier_product_ids, tier_mins, tier_maxs, tier_prices = custom_tiers
+        custom_rows = np.searchsorted(self.product_ids, np.array(tier_product_ids, dtype=np.int64))
+
+        # TEMPLATE: chaque produit reçoit le bloc de paliers de son template
+        tpl_ids, tpl_mins, tpl_maxs, tpl_discounts = template_tiers
+        tpl_ids = np.array(tpl_ids, dtype=np.int64)
+        order = np.argsort(tpl_ids, kind="stable")
+        known_templates, tpl_starts, tpl_counts = np.unique(tpl_ids[order], return_index=True, return_counts=True)
+        template_rows = np.flatnonzero(self.modes == MODE_TEMPLATE)
+        row_templates = np.array([template_ids[i] if template_ids[i] is not None else -1 for i in template_rows], dtype=np.int64)
+        slot = np.clip(np.searchsorted(known_templates, row_templates), 0, max(len(known_templates) - 1, 0))
+        linked = (slot < len(known_templates)) & (known_templates[slot] == row_templates) if len(known_templates) else np.zeros(len(template_rows), dtype=bool)
+        template_rows, slot = template_rows[linked], slot[linked]
+        repeats = tpl_counts[slot]
+        offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        tpl_tier_index = order[np.repeat(tpl_starts[slot], repeats) + offsets]
+
+        # Paliers "longs" (une ligne par palier), puis mise en grille
+        n_single, n_custom, n_template = len(single_rows), len(custom_rows), len(tpl_tier_index)
+        self.mins, self.maxs, (self.tier_prices, self.discounts), self.tier_counts = _pad_tiers(
+            np.concatenate([single_rows, custom_rows, np.repeat(template_rows, repeats)]).astype(np.int64),
+            np.concatenate([moqs[single_rows], _float_column(tier_mins), _float_column(tpl_mins)[tpl_tier_index]]),
+            np.concatenate([np.full(n_single, UNLIMITED), _float_column(tier_maxs, none_as=UNLIMITED),
+                            _float_column(tpl_maxs, none_as=UNLIMITED)[tpl_tier_index]]),
+            [
+                np.concatenate([np.full(n_single, np.nan), _float_column(tier_prices), np.full(n_template, np.nan)]),
+                np.concatenate([np.zeros(n_single), np.full(n_custom, np.nan), _float_column(tpl_discounts)[tpl_tier_index]]),
+            ],
+            n
+        )
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    def apply(self, base_price_change_percent: float = 0.0, template_discount_delta: float = 0.0,
+              scale_custom_tiers: bool = True):
+        """Retourne (prix de base, prix des paliers) après application des changements proposés"""
+        factor = 1 + base_price_change_percent / 100
+        base = self.base_prices if factor == 1 else np.round(self.base_prices * factor, 2)
+
+        prices = np.full(self.mins.shape, np.nan)
+        single = self.modes == MODE_SINGLE
+        tiered = self.modes == MODE_TIERED
+        template = self.modes == MODE_TEMPLATE
+
+        prices[single, 0] = base[single]
+        if scale_custom_tiers and factor != 1:
+            prices[tiered] = np.round(self.tier_prices[tiered] * factor, 2)
+        else:
+            prices[tiered] = self.tier_prices[tiered]
+        discounts = np.clip(self.discounts[template] + template_discount_delta, 0, 100)
+        prices[template] = np.round(base[template, None] * (1 - discounts / 100), 2)
+        return base, prices
+
+    def lookup(self, base: np.ndarray, prices: np.ndarray, rows: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        """
+        Prix au kg pour chaque couple (ligne produit, quantité). Même règle que
+        CompiledPricing.find_tier_index: le palier de plus grand minimum <= quantité
+        dont le maximum couvre la quantité, sinon le premier palier (prix de base sans palier).
+        """
+        q = quantities[:, None]
+        covered = (self.mins[rows] <= q) & (q <= self.maxs[rows])
+        width = covered.shape[1]
+        idx = np.where(covered.any(axis=1), width - 1 - np.argmax(covered[:, ::-1], axis=1), 0)
+        per_kg = prices[rows, idx]
+        return np.where(self.tier_counts[rows] > 0, per_kg, base[rows])
+
+
+def _catalog_conditions(producer_id: int, product_ids: Optional[List[int]] = None) -> list:
+    conditions = [Product.producer_id == producer_id]
+    if product_ids:
+        conditions.append(Product.id.in_(product_ids))
+    return conditions
+
+
+class PricingSimulator:
+
+    def load(self, db: Session, producer_id: int, product_ids: Optional[List[int]] = None) -> CatalogGrid:
+        """Charge le catalogue en 3 requêtes (produits, paliers personnalisés, paliers des templates)"""
+        conditions = _catalog_conditions(producer_id, product_ids)
+
+        products = _fetch_columns(db, select(
+            Product.id, Product.name, Product.pricing_mode, Product.price_fob, Product.moq_kg, Product.template_id
+        ).where(*conditions).order_by(Product.id), 6)
+
+        custom_tiers = _fetch_columns(db, select(
+            PriceTier.product_id, PriceTier.min_quantity_kg, PriceTier.max_quantity_kg, PriceTier.price_per_kg
+        ).join(Product, Product.id == PriceTier.product_id).where(*conditions, Product.pricing_mode == "TIERED"), 4)
+
+        template_ids = {t for mode, t in zip(products[2], products[5]) if mode == "TEMPLATE" and t}
+        template_tiers = _fetch_columns(db, select(
+            TemplateTier.template_id, TemplateTier.min_quantity_kg, TemplateTier.max_quantity_kg,
+            TemplateTier.discount_percent
+        ).where(TemplateTier.template_id.in_(template_ids)), 4) if template_ids else [()] * 4
+
+        return CatalogGrid(products, custom_tiers, template_tiers)
+
+    def load_order_volumes(self, db: Session, grid: CatalogGrid, producer_id: int,
+                           product_ids: Optional[List[int]] = None):
+        """
+        Volumes des commandes passées, agrégés en base par (produit, quantité):
+        retourne des colonnes (ligne produit, quantité, nombre de commandes)
+        """
+        order_product_ids, quantities, counts = _fetch_columns(db, select(
+            Order.product_id, Order.quantity_kg, func.count()
+        ).where(
+            Order.product_id.in_(select(Product.id).where(*_catalog_conditions(producer_id, product_ids))),
+            Order.status.notin_(EXCLUDED_ORDER_STATUSES),
+            Order.quantity_kg > 0,
+        ).group_by(Order.product_id, Order.quantity_kg), 3)
+
+        rows = np.searchsorted(grid.product_ids, np.array(order_product_ids, dtype=np.int64))
+        return rows, np.array(quantities, dtype=float), np.array(counts, dtype=float)
+
+    def simulate(self, db: Session, producer_id: int, simulation_in: PricingSimulationRequest) -> dict:
+        grid = self.load(db, producer_id, simulation_in.product_ids)
+        order_rows, order_quantities, order_counts = self.load_order_volumes(
+            db, grid, producer_id, simulation_in.product_ids
+        )
+        n = len(grid)
+        curve_quantities = np.asarray(simulation_in.quantities, dtype=float)
+
+        base_before, prices_before = grid.apply()
+        base_after, prices_after = grid.apply(
+            simulation_in.base_price_change_percent,
+            simulation_in.template_discount_delta,
+            simulation_in.scale_custom_tiers,
+        )
+
+        # Courbes: toutes les (ligne, quantité) en un seul calcul
+        curve_rows = np.repeat(np.arange(n), len(curve_quantities))
+        curve_q = np.tile(curve_quantities, n)
+        curve_before = grid.lookup(base_before, prices_before, curve_rows, curve_q).reshape(n, -1)
+        curve_after = grid.lookup(base_after, prices_after, curve_rows, curve_q).reshape(n, -1)
+
+        # Chiffre d'affaires: volumes historiques re-chiffrés avec l'ancienne et la nouvelle grille
+        ordered_kg = order_quantities * order_counts
+        revenue_before = np.bincount(
+            order_rows, weights=ordered_kg * grid.lookup(base_before, prices_before, order_rows, order_quantities),
+            minlength=n
+        )
+        revenue_after = np.bincount(
+            order_rows, weights=ordered_kg * grid.lookup(base_after, prices_after, order_rows, order_quantities),
+            minlength=n
+        )
+        volumes = np.bincount(order_rows, weights=ordered_kg, minlength=n)
+        order_counts = np.bincount(order_rows, weights=order_counts, minlength=n).astype(int)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_percent = np.round((revenue_after - revenue_before) / revenue_before * 100, 2)
+
+        revenue_before, revenue_after = np.round(revenue_before, 2), np.round(revenue_after, 2)
+        products = [
+            {
+                "product_id": product_id,
+                "name": name,
+                "pricing_mode": mode,
+                "base_price_before": b_before,
+                "base_price_after": b_after,
+                "price_per_kg_before": c_before,
+                "price_per_kg_after": c_after,
+                "historical_volume_kg": volume,
+                "order_count": count,
+                "revenue_before": r_before,
+                "revenue_after": r_after,
+                "revenue_change_percent": pct if r_before > 0 else None,
+            }
+            for product_id, name, mode, b_before, b_after, c_before, c_after, volume, count, r_before, r_after, pct in zip(
+                grid.product_ids.tolist(), grid.names, grid.mode_labels,
+                base_before.tolist(), base_after.tolist(), curve_before.tolist(), curve_after.tolist(),
+                np.round(volumes, 2).tolist(), order_counts.tolist(),
+                revenue_before.tolist(), revenue_after.tolist(), change_percent.tolist(),
+            )
+        ]
+
+        total_before = round(float(revenue_before.sum()), 2)
+        total_after = round(float(revenue_after.sum()), 2)
+        return {
+            "producer_id": producer_id,
+            "quantities": curve_quantities.tolist(),
+            "products": products,
+            "revenue_before": total_before,
+            "revenue_after": total_after,
+            "revenue_change": round(total_after - total_before, 2),
+            "revenue_change_percent": round((total_after - total_before) / total_before * 100, 2) if total_before > 0 else None,
+        }
+
+
+pricing_simulator = PricingSimulator()
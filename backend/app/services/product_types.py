@@ -0,0 +1,45 @@
+"""
+Vocabulaire normalisé des types de produit (commodités).
+
+Product.product_type est dérivé du nom du produit à chaque écriture et utilise
+les mêmes valeurs que SourcingRequest.product_type ("Vanilla", "Clove", ...).
+La résolution des paliers d'un producteur pour une demande devient ainsi une
+recherche indexée (producer_id, product_type, status) au lieu d'un filtrage
+des noms en Python.
+"""
+import unicodedata
+from typing import Optional
+
+
+# Type canonique -> mots-clés reconnus dans les noms (minuscules, sans accents).
+# L'ordre compte: le premier type dont un mot-clé apparaît dans le nom l'emporte.
+PRODUCT_TYPE_KEYWORDS = {
+    "Vanilla": ("vanilla", "vanille", "bourbon"),
+    "Clove": ("clove", "girofle"),
+    "Lychee": ("lychee", "litchi"),
+    "Pepper": ("pepper", "poivre"),
+    "Cinnamon": ("cinnamon", "cannelle"),
+    "Cocoa": ("cocoa", "cacao"),
+    "Coffee": ("coffee", "cafe"),
+    "Ginger": ("ginger", "gingembre"),
+}
+
+
+def _fold(value: str) -> str:
+    """Minuscules sans accents ("Vanille Étoilée" -> "vanille etoilee")"""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def normalize_product_type(value: Optional[str]) -> Optional[str]:
+    """
+    Retourne le type canonique d'un nom de produit ou d'un type saisi par un acheteur.
+    None si aucun type connu n'est reconnu.
+    """
+    if not value:
+        return None
+    folded = _fold(value)
+    for product_type, keywords in PRODUCT_TYPE_KEYWORDS.items():
+        if any(keyword in folded for keyword in keywords):
+            return product_type
+    return None
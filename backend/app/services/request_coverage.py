@@ -0,0 +1,167 @@
+"""
+Compteurs de couverture d'une demande de sourcing.
+
+SourcingRequest porte ses agrégats d'offres (volumes en attente / acceptés,
+nombre d'offres, meilleur prix, prix moyen pondéré) pour que les tableaux de
+bord et les listes les lisent sans parcourir les offres.
+
+Chaque écriture d'offre applique un delta par un seul UPDATE relatif
+(col = col + delta) dans la transaction de l'endpoint: les écritures
+concurrentes sur une même demande se sérialisent sur la ligne sans perte.
+Seul best_price est recalculé (MIN sur les offres actives) quand l'offre qui
+quitte l'ensemble actif, ou dont le prix monte, pouvait être la meilleure.
+reconcile() recalcule tout depuis les offres pour réparer une dérive.
+"""
+from collections import namedtuple
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.sourcing import SourcingOffer, SourcingRequest
+
+
+OfferState = namedtuple("OfferState", ["status", "volume_kg", "price_usd"])
+
+COUNTER_COLUMNS = (
+    "offer_count", "covered_kg_pending", "covered_kg_accepted",
+    "covered_value_usd", "best_price", "weighted_avg_price",
+)
+
+# Tolérance de comparaison des agrégats flottants (reconciliation)
+DRIFT_TOLERANCE = 1e-6
+
+
+def coverage_bucket(status: Optional[str]) -> Optional[str]:
+    """"accepted", None (REJECTED) ou "pending" (PENDING, NEGOTIATING, sans statut)"""
+    if status == "ACCEPTED":
+        return "accepted"
+    if status == "REJECTED":
+        return None
+    return "pending"
+
+
+def offer_state(offer: SourcingOffer) -> OfferState:
+    return OfferState(offer.status, offer.volume_offered_kg or 0.0, offer.price_offered_usd or 0.0)
+
+
+class RequestCoverageService:
+    """Maintien et réparation des compteurs de couverture des demandes."""
+
+    def apply_offer_change(
+        self,
+        db: Session,
+        request_id: int,
+        before: Optional[OfferState],
+        after: Optional[OfferState],
+    ):
+        """
+        Répercute la création (before=None), la modification ou la suppression (after=None)
+        d'une offre sur les compteurs de sa demande. L'offre doit déjà être flushée.
+        Ne commit pas: l'appelant commit avec l'offre.
+        """
+        delta_pending = delta_accepted = delta_value = 0.0
+        delta_count = 0
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            delta_count += sign
+            bucket = coverage_bucket(state.status)
+            if bucket == "pending":
+                delta_pending += sign * state.volume_kg
+            elif bucket == "accepted":
+                delta_accepted += sign * state.volume_kg
+            if bucket:
+                delta_value += sign * state.volume_kg * state.price_usd
+
+        c = SourcingRequest.__table__.c
+        covered_kg = c.covered_kg_pending + delta_pending + c.covered_kg_accepted + delta_accepted
+        covered_value = c.covered_value_usd + delta_value
+        values = {
+            "covered_kg_pending": c.covered_kg_pending + delta_pending,
+            "covered_kg_accepted": c.covered_kg_accepted + delta_accepted,
+            "covered_value_usd": covered_value,
+            "offer_count": c.offer_count + delta_count,
+            "weighted_avg_price": case((covered_kg > DRIFT_TOLERANCE, covered_value / covered_kg), else_=None),
+        }
+
+        was_active = before is not None and coverage_bucket(before.status) is not None
+        is_active = after is not None and coverage_bucket(after.status) is not None
+        if was_active and (not is_active or after.price_usd > before.price_usd):
+            # L'ancienne meilleure offre a pu partir: MIN sur les offres actives restantes
+            values["best_price"] = select(func.min(SourcingOffer.price_offered_usd)).where(
+                SourcingOffer.request_id == request_id,
+                or_(SourcingOffer.status.is_(None), SourcingOffer.status != "REJECTED")
+            ).scalar_subquery()
+        elif is_active:
+            values["best_price"] = case(
+                (or_(c.best_price.is_(None), c.best_price > after.price_usd), after.price_usd),
+                else_=c.best_price
+            )
+
+        db.execute(update(SourcingRequest.__table__).where(c.id == request_id).values(**values))
+
+    def reconcile(self, db: Session, request_ids: Optional[Iterable[int]] = None, dry_run: bool = False) -> List[int]:
+        """
+        Recalcule les compteurs depuis les offres (toutes les demandes ou `request_ids`)
+        et corrige ceux qui ont dérivé. Retourne les IDs corrigés (ou à corriger en dry_run).
+        """
+        offers = SourcingOffer.__table__.c
+        accepted = offers.status == "ACCEPTED"
+        active = or_(offers.status.is_(None), offers.status != "REJECTED")
+        pending = or_(offers.status.is_(None), offers.status.not_in(["ACCEPTED", "REJECTED"]))
+        volume_sum = lambda condition, value=offers.volume_offered_kg: func.coalesce(
+            func.sum(case((condition, value), else_=0)), 0
+        )
+        aggregates = select(
+            offers.request_id,
+            func.count(offers.id).label("offer_count"),
+            volume_sum(pending).label("covered_kg_pending"),
+            volume_sum(accepted).label("covered_kg_accepted"),
+            volume_sum(active, offers.volume_offered_kg * offers.price_offered_usd).label("covered_value_usd"),
+            func.min(case((active, offers.price_offered_usd), else_=None)).label("best_price"),
+        ).group_by(offers.request_id)
+
+        table = SourcingRequest.__table__
+        requests = select(table.c.id, *(table.c[name] for name in COUNTER_COLUMNS))
+        if request_ids is not None:
+            request_ids = list(request_ids)
+            aggregates = aggregates.where(offers.request_id.in_(request_ids))
+            requests = requests.where(table.c.id.in_(request_ids))
+
+        conn = db.connection()
+        expected = {row.request_id: row for row in conn.execute(aggregates)}
+        fixes = []
+        for current in conn.execute(requests):
+            agg = expected.get(current.id)
+            target = {
+                "offer_count": agg.offer_count if agg else 0,
+                "covered_kg_pending": float(agg.covered_kg_pending) if agg else 0.0,
+                "covered_kg_accepted": float(agg.covered_kg_accepted) if agg else 0.0,
+                "covered_value_usd": float(agg.covered_value_usd) if agg else 0.0,
+                "best_price": agg.best_price if agg else None,
+            }
+            covered_kg = target["covered_kg_pending"] + target["covered_kg_accepted"]
+            target["weighted_avg_price"] = (
+                target["covered_value_usd"] / covered_kg if covered_kg > DRIFT_TOLERANCE else None
+            )
+            if any(self._drifted(getattr(current, name), value) for name, value in target.items()):
+                fixes.append({"b_id": current.id, **{f"b_{name}": value for name, value in target.items()}})
+
+        if fixes and not dry_run:
+            conn.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(
+                    {name: bindparam(f"b_{name}") for name in COUNTER_COLUMNS}
+                ),
+                fixes
+            )
+        return [fix["b_id"] for fix in fixes]
+
+    @staticmethod
+    def _drifted(current, expected) -> bool:
+        if current is None or expected is None:
+            return current is not expected
+        return abs(current - expected) > DRIFT_TOLERANCE * max(1.0, abs(expected))
+
+
+request_coverage = RequestCoverageService()
@@ -0,0 +1,205 @@
+"""
+Événements temps réel des demandes de sourcing (offres, statuts, logistique).
+
+Les endpoints d'écriture publient un événement compact (offre concernée + compteurs
+de la demande) que les tableaux de bord reçoivent en SSE au lieu de recharger la
+demande entière en boucle.
+
+Diffusion:
+- PostgreSQL: pg_notify() dans la transaction de l'écriture (l'événement part au
+  commit, jamais en cas de rollback). Chaque worker uvicorn écoute le canal sur une
+  connexion dédiée (LISTEN) et redistribue aux abonnés de son process.
+- Autres bases (SQLite en local, un seul process): l'événement est gardé sur la
+  session et distribué localement après le commit.
+
+Les abonnés sont des files asyncio (une par flux SSE), alimentées depuis les threads
+des endpoints synchrones et du listener via call_soon_threadsafe. Une file pleine
+(client trop lent) est vidée et reçoit un événement "resync": le client recharge
+alors la demande une fois.
+"""
+import asyncio
+import json
+import logging
+import select as select_module
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "request_events"
+
+# Événements en attente par abonné avant resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Attente max du listener avant un aller-retour (pg8000 n'a pas d'attente bloquante
+# des notifications: on attend que la socket soit lisible, puis une requête vide les lit)
+LISTEN_POLL_SECONDS = 1.0
+LISTEN_RETRY_SECONDS = 2.0
+
+PENDING_EVENTS_KEY = "pending_request_events"
+
+Topic = Tuple[str, int]  # ("request", id) ou ("buyer", id)
+
+
+def event_topics(payload: dict) -> List[Topic]:
+    topics = [("request", payload["request_id"])]
+    if payload.get("buyer_id") is not None:
+        topics.append(("buyer", payload["buyer_id"]))
+    return topics
+
+
+def _send(subscription: "Subscription", payload: dict):
+    try:
+        subscription.loop.call_soon_threadsafe(subscription.deliver, payload)
+    except RuntimeError:
+        pass  # boucle fermée: le flux est terminé
+
+
+class Subscription:
+    """Flux d'un client SSE: file asyncio liée à la boucle qui l'a créée"""
+
+    def __init__(self, topics: Iterable[Topic]):
+        self.topics = list(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, payload: dict):
+        """Appelé dans la boucle de l'abonné"""
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+
+class RequestEventBus:
+    """Pub/sub en mémoire des événements de demandes, relayé entre workers par LISTEN/NOTIFY."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Topic, Set[Subscription]] = defaultdict(set)
+        self._listener: Optional[threading.Thread] = None
+
+    def subscribe(self, topics: Iterable[Topic]) -> Subscription:
+        subscription = Subscription(topics)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def dispatch(self, payload: dict):
+        """Distribue un événement aux abonnés de ce process (thread-safe)"""
+        with self._lock:
+            targets = set()
+            for topic in event_topics(payload):
+                targets.update(self._subscribers.get(topic, ()))
+        for subscription in targets:
+            _send(subscription, payload)
+
+    def broadcast_resync(self):
+        """Tous les abonnés rechargent (événements possiblement perdus)"""
+        with self._lock:
+            targets = {s for subscribers in self._subscribers.values() for s in subscribers}
+        for subscription in targets:
+            _send(subscription, {"type": "resync"})
+
+    def publish(self, db: Session, payload: dict):
+        """
+        Publie un événement dans la transaction de `db`: il n'est diffusé qu'au commit.
+        """
+        payload = {**payload, "at": datetime.now(timezone.utc).isoformat()}
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": NOTIFY_CHANNEL, "payload": json.dumps(payload, default=str)}
+            )
+        else:
+            db.info.setdefault(PENDING_EVENTS_KEY, []).append(payload)
+
+    def _ensure_listener(self):
+        if engine.dialect.name != "postgresql":
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen_forever, name="request-events-listener", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Request events listener failed, reconnecting")
+            # Des notifications ont pu être perdues pendant la coupure
+            self.broadcast_resync()
+            time.sleep(LISTEN_RETRY_SECONDS)
+
+    def _listen(self):
+        raw = engine.raw_connection()
+        raw.detach()  # connexion dédiée, hors du pool
+        connection = raw.dbapi_connection
+        try:
+            connection.autocommit = True
+            cursor = connection.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            sock = getattr(connection, "_usock", None)
+            while True:
+                if sock is not None:
+                    select_module.select([sock], [], [], LISTEN_POLL_SECONDS)
+                else:
+                    time.sleep(LISTEN_POLL_SECONDS)
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                for payload in self._drain(connection):
+                    self.dispatch(payload)
+        finally:
+            raw.close()
+
+    @staticmethod
+    def _drain(connection) -> List[dict]:
+        """Notifications reçues par la connexion (pg8000: deque de (pid, canal, payload))"""
+        notifications = getattr(connection, "notifications", None)
+        payloads = []
+        while notifications:
+            _, channel, payload = notifications.popleft()
+            if channel == NOTIFY_CHANNEL:
+                try:
+                    payloads.append(json.loads(payload))
+                except ValueError:
+                    logger.warning("Invalid request event payload: %r", payload)
+        return payloads
+
+
+request_events = RequestEventBus()
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_pending_events(session: Session):
+    for payload in session.info.pop(PENDING_EVENTS_KEY, []):
+        request_events.dispatch(payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
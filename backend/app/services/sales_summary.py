@@ -0,0 +1,252 @@
+"""
+Synthèse des ventes des producteurs (table producer_sales_summary).
+
+Une ligne par (producteur, produit, mois, statut) porte le nombre de commandes, les
+kg et le montant. Chaque écriture de commande y applique son delta dans la
+transaction de l'endpoint:
+- création: +1 sur le statut initial
+- changement de statut: -1 sur l'ancien, +1 sur le nouveau, par un UPDATE
+  conditionnel de la commande (status = ancien statut): deux transitions
+  concurrentes ne peuvent pas compter la même commande deux fois
+- suppression du produit: ses lignes passent sur DELETED_PRODUCT_ID (ses commandes
+  restent au producteur par Order.producer_id, sans produit)
+Les deltas sont des upserts relatifs (col = col + delta), les lignes d'une même
+écriture étant verrouillées dans l'ordre des statuts (pas d'interblocage).
+reconcile() recalcule tout depuis les commandes pour réparer une dérive.
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.order import Order
+from app.models.product import Product
+from app.models.sales_summary import ProducerSalesSummary
+
+
+# Commandes annulées: gardées par statut, hors des totaux de ventes
+CANCELLED_STATUSES = ("REJECTED",)
+
+DEFAULT_STATUS = "PENDING"
+
+# Clé produit des ventes de produits supprimés (Order.product_id NULL)
+DELETED_PRODUCT_ID = 0
+
+# Tolérance de comparaison des agrégats flottants (reconciliation)
+DRIFT_TOLERANCE = 1e-6
+
+SummaryKey = namedtuple("SummaryKey", ["producer_id", "product_id", "month", "status"])
+
+KEY_COLUMNS = SummaryKey._fields
+VALUE_COLUMNS = ("order_count", "quantity_kg", "amount")
+
+
+def sales_month(created_at: datetime) -> str:
+    """Mois de vente "YYYY-MM" d'une commande (created_at UTC)"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.strftime("%Y-%m")
+
+
+def _month_column(db: Session, created_at):
+    # Même mois que sales_month(), calculé en SQL
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(created_at, "YYYY-MM")
+    return func.strftime("%Y-%m", created_at)
+
+
+def _totals(rows) -> dict:
+    return {
+        "order_count": sum(row.order_count for row in rows),
+        "quantity_kg": sum(row.quantity_kg for row in rows),
+        "amount": sum(row.amount for row in rows),
+    }
+
+
+class SalesSummaryService:
+    """Maintien, lecture et réparation de la synthèse des ventes par producteur."""
+
+    def record_order(self, db: Session, order: Order):
+        """
+        Compte une nouvelle commande (flushée) sur son statut initial.
+        Ne commit pas: l'appelant commit avec la commande.
+        """
+        self._apply(db, order, None, order.status or DEFAULT_STATUS)
+
+    def set_order_status(self, db: Session, order: Order, status: str) -> str:
+        """
+        Passe la commande à `status` et déplace sa ligne de synthèse. Retourne le
+        statut précédent (égal à `status` si la commande y était déjà: rien n'est
+        compté). Ne commit pas.
+        """
+        table = Order.__table__
+        while True:
+            previous = db.execute(select(table.c.status).where(table.c.id == order.id)).scalar()
+            if previous == status:
+                break
+            changed = db.execute(
+                update(table)
+                .where(table.c.id == order.id, table.c.status.is_not_distinct_from(previous))
+                .values(status=status)
+            )
+            if changed.rowcount:
+                self._apply(db, order, previous or DEFAULT_STATUS, status)
+                break
+            # Une transition concurrente est passée entre-temps: relire le statut courant
+        set_committed_value(order, "status", status)
+        return previous
+
+    def detach_product(self, db: Session, product_id: int):
+        """
+        Produit supprimé: ses ventes restent au producteur, sous DELETED_PRODUCT_ID, et ses
+        commandes perdent leur product_id (comme ON DELETE SET NULL, aussi sur SQLite).
+        Ne commit pas.
+        """
+        orders = Order.__table__
+        db.execute(update(orders).where(orders.c.product_id == product_id).values(product_id=None))
+        table = ProducerSalesSummary.__table__
+        moved = db.execute(
+            delete(table).where(table.c.product_id == product_id).returning(*table.c)
+        ).mappings().all()
+        if moved:
+            self._add(db, [{**row, "product_id": DELETED_PRODUCT_ID} for row in moved])
+
+    def _apply(self, db: Session, order: Order, before: Optional[str], after: Optional[str]):
+        if order.created_at is None:
+            return
+        producer_id = order.producer_id
+        if producer_id is None and order.product_id is not None:
+            # Commande antérieure à Order.producer_id (renseigné par reconcile_sales_summary.py)
+            producer_id = db.execute(select(Product.producer_id).where(Product.id == order.product_id)).scalar()
+        if producer_id is None:
+            return
+
+        month = sales_month(order.created_at)
+        product_id = order.product_id if order.product_id is not None else DELETED_PRODUCT_ID
+        quantity, amount = order.quantity_kg or 0.0, order.amount or 0.0
+        self._add(db, [
+            {
+                "producer_id": producer_id, "product_id": product_id, "month": month, "status": status,
+                "order_count": sign, "quantity_kg": sign * quantity, "amount": sign * amount,
+            }
+            for status, sign in sorted(((before, -1), (after, 1)), key=lambda change: change[0] or "")
+            if status is not None
+        ])
+
+    def _add(self, db: Session, rows: List[dict]):
+        # Deltas relatifs, une ligne par clé: col = col + delta
+        table = ProducerSalesSummary.__table__
+        stmt = self._insert(db).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={name: table.c[name] + stmt.excluded[name] for name in VALUE_COLUMNS}
+        ))
+
+    @staticmethod
+    def _insert(db: Session):
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(ProducerSalesSummary.__table__)
+
+    def summary(self, db: Session, producer_id: int) -> dict:
+        """
+        Tableau de bord d'un producteur: totaux, par statut, par mois et par produit
+        (mois et produits hors commandes annulées), en une requête sur la synthèse.
+        Les produits supprimés sont regroupés sous DELETED_PRODUCT_ID, sans nom.
+        """
+        table = ProducerSalesSummary.__table__
+        rows = db.execute(
+            select(table, Product.name.label("product_name"))
+            .outerjoin(Product, Product.id == table.c.product_id)
+            .where(table.c.producer_id == producer_id, table.c.order_count != 0)
+        ).all()
+
+        sales = [row for row in rows if row.status not in CANCELLED_STATUSES]
+        by_status, by_month, by_product = defaultdict(list), defaultdict(list), defaultdict(list)
+        for row in rows:
+            by_status[row.status].append(row)
+        for row in sales:
+            by_month[row.month].append(row)
+            by_product[row.product_id].append(row)
+
+        return {
+            "producer_id": producer_id,
+            "totals": _totals(sales),
+            "by_status": [{"status": status, **_totals(group)} for status, group in sorted(by_status.items())],
+            "by_month": [{"month": month, **_totals(group)} for month, group in sorted(by_month.items(), reverse=True)],
+            "by_product": sorted(
+                ({"product_id": product_id, "product_name": group[0].product_name, **_totals(group)}
+                 for product_id, group in by_product.items()),
+                key=lambda product: -product["amount"]
+            ),
+        }
+
+    def reconcile(self, db: Session, producer_ids: Optional[Iterable[int]] = None, dry_run: bool = False) -> List[int]:
+        """
+        Recalcule la synthèse depuis les commandes (tous les producteurs ou `producer_ids`)
+        et corrige les lignes qui ont dérivé. Retourne les producteurs corrigés
+        (ou à corriger en dry_run).
+        """
+        orders = Order.__table__.c
+        month = _month_column(db, orders.created_at)
+        product_id = func.coalesce(orders.product_id, DELETED_PRODUCT_ID)
+        status = func.coalesce(orders.status, DEFAULT_STATUS)
+        aggregates = (
+            select(
+                orders.producer_id, product_id.label("product_id"), month.label("month"), status.label("status"),
+                func.count(orders.id).label("order_count"),
+                func.coalesce(func.sum(orders.quantity_kg), 0).label("quantity_kg"),
+                func.coalesce(func.sum(orders.amount), 0).label("amount"),
+            )
+            .where(orders.producer_id.is_not(None), orders.created_at.is_not(None))
+            .group_by(orders.producer_id, product_id, month, status)
+        )
+        table = ProducerSalesSummary.__table__
+        current_rows = select(table)
+        if producer_ids is not None:
+            producer_ids = list(producer_ids)
+            aggregates = aggregates.where(orders.producer_id.in_(producer_ids))
+            current_rows = current_rows.where(table.c.producer_id.in_(producer_ids))
+
+        conn = db.connection()
+        expected = {SummaryKey(*row[:4]): row for row in conn.execute(aggregates)}
+        current = {SummaryKey(*(row._mapping[name] for name in KEY_COLUMNS)): row for row in conn.execute(current_rows)}
+
+        fixes = []
+        for key, row in expected.items():
+            target = {"order_count": row.order_count, "quantity_kg": float(row.quantity_kg), "amount": float(row.amount)}
+            stored = current.get(key)
+            if stored is None or any(self._drifted(getattr(stored, name), value) for name, value in target.items()):
+                fixes.append({**key._asdict(), **target})
+        removed = [key for key in current if key not in expected]
+
+        if not dry_run:
+            if removed:
+                conn.execute(
+                    delete(table).where(*(table.c[name] == bindparam(f"b_{name}") for name in KEY_COLUMNS)),
+                    [{f"b_{name}": value for name, value in key._asdict().items()} for key in removed]
+                )
+            if fixes:
+                stmt = self._insert(db)
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=list(KEY_COLUMNS),
+                        set_={name: stmt.excluded[name] for name in VALUE_COLUMNS}
+                    ),
+                    fixes
+                )
+        # Lignes à zéro sans commande: supprimées sans compter comme une dérive
+        stale = {key.producer_id for key in removed if current[key].order_count != 0}
+        return sorted({fix["producer_id"] for fix in fixes} | stale)
+
+    @staticmethod
+    def _drifted(current, expected) -> bool:
+        if current is None:
+            return True
+        return abs(current - expected) > DRIFT_TOLERANCE * max(1.0, abs(expected))
+
+
+sales_summary = SalesSummaryService()
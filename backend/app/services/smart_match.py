@@ -0,0 +1,341 @@
+"""
+Smart Match: index inversé des demandes de sourcing ouvertes.
+
+Les demandes OPEN sont rangées par (product_type, grade_target) puis par
+ensemble de certifications requises. Un produit publié est candidat pour toutes
+les demandes de sa clé dont les certifications sont couvertes par les badges de
+son producteur. L'index maintient, pour chaque producteur, ses demandes
+candidates et ses produits par clé.
+
+Les mises à jour sont incrémentales: une demande créée n'est comparée qu'aux
+producteurs présents sur sa clé, un produit ne touche les demandes de sa clé
+que s'il est le premier (ou le dernier) de son producteur sur cette clé, et un
+producteur modifié n'est recomparé qu'aux clés de ses produits (jamais
+demandes × produits).
+
+Le classement (stock, prix, confiance) est calculé à la lecture à partir de
+l'état courant en base: seuls les critères d'appariement sont gardés en mémoire.
+L'index est propre au process; il est reconstruit périodiquement pour absorber
+les écritures faites hors API (scripts, autres workers).
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.producer import ProducerProfile
+from app.models.product import Product
+from app.models.sourcing import SourcingOffer, SourcingRequest
+from app.services.product_types import normalize_product_type
+
+
+REBUILD_INTERVAL_SECONDS = 300
+
+# Pondération du score de classement (somme = 1)
+COVERAGE_WEIGHT = 0.5
+PRICE_WEIGHT = 0.3
+TRUST_WEIGHT = 0.2
+MAX_TRUST_SCORE = 5.0
+
+# Synonymes de certifications (badges producteurs / certifications demandées)
+CERT_ALIASES = {
+    "BIO": "ORGANIC",
+    "FAIR TRADE": "FAIRTRADE",
+    "FAIR-TRADE": "FAIRTRADE",
+}
+
+MatchKey = Tuple[str, str]  # (product_type, grade)
+
+
+def normalize_cert(cert: str) -> str:
+    """"Organic", "bio " -> "ORGANIC" """
+    value = cert.strip().upper()
+    return CERT_ALIASES.get(value, value)
+
+
+def cert_spellings(cert: str) -> Set[str]:
+    """Écritures possibles en base d'une certification ("organic" -> ORGANIC, Organic, BIO, Bio)"""
+    canonical = normalize_cert(cert)
+    names = {canonical} | {alias for alias, target in CERT_ALIASES.items() if target == canonical}
+    return {cert.strip()} | {spelling for name in names for spelling in (name, name.title())}
+
+
+def normalize_certs(certs: Optional[Iterable[str]]) -> FrozenSet[str]:
+    return frozenset(normalize_cert(c) for c in (certs or []) if c and c.strip())
+
+
+def normalize_grade(grade: Optional[str]) -> Optional[str]:
+    return grade.strip().upper() if grade and grade.strip() else None
+
+
+def request_key(product_type: Optional[str], grade: Optional[str]) -> Optional[MatchKey]:
+    normalized_type = normalize_product_type(product_type)
+    normalized_grade = normalize_grade(grade)
+    if not normalized_type or not normalized_grade:
+        return None
+    return normalized_type, normalized_grade
+
+
+class SmartMatchIndex:
+    """Index inversé demandes ouvertes -> producteurs candidats, partagé par le process."""
+
+    def __init__(self, rebuild_interval: float = REBUILD_INTERVAL_SECONDS):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        # Demandes: id -> (clé, certifications) et clé -> certifications -> ids
+        self._requests: Dict[int, Tuple[MatchKey, FrozenSet[str]]] = {}
+        self._request_buckets: Dict[MatchKey, Dict[FrozenSet[str], Set[int]]] = defaultdict(lambda: defaultdict(set))
+        # Produits publiés: id -> (producteur, clé), puis producteur -> clé -> ids
+        self._products: Dict[int, Tuple[int, MatchKey]] = {}
+        self._producer_keys: Dict[int, Dict[MatchKey, Set[int]]] = defaultdict(dict)
+        # Clé -> producteurs ayant au moins un produit publié sur cette clé
+        self._key_producers: Dict[MatchKey, Set[int]] = defaultdict(set)
+        self._producer_badges: Dict[int, FrozenSet[str]] = {}
+        # Résultat: producteur -> demandes candidates (+ index inverse)
+        self._candidates: Dict[int, Set[int]] = defaultdict(set)
+        self._request_producers: Dict[int, Set[int]] = defaultdict(set)
+
+    # --- Chargement ---
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def ensure_loaded(self, db: Session):
+        """Construit l'index au premier usage puis le reconstruit toutes les rebuild_interval secondes"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.rebuild_interval:
+            self.rebuild(db)
+
+    def rebuild(self, db: Session):
+        """Reconstruction complète: 3 requêtes, puis appariement par (producteur, clé)"""
+        conn = db.connection()
+        requests = conn.execute(
+            select(SourcingRequest.id, SourcingRequest.product_type, SourcingRequest.grade_target,
+                   SourcingRequest.required_certs).where(SourcingRequest.status == "OPEN")
+        ).all()
+        products = conn.execute(
+            select(Product.id, Product.producer_id, Product.product_type, Product.grade).where(
+                Product.status == "PUBLISHED", Product.producer_id.isnot(None), Product.product_type.isnot(None)
+            )
+        ).all()
+        producers = conn.execute(select(ProducerProfile.id, ProducerProfile.badges)).all()
+
+        with self._lock:
+            self._reset()
+            for producer_id, badges in producers:
+                self._producer_badges[producer_id] = normalize_certs(badges)
+            for request_id, product_type, grade, certs in requests:
+                key = request_key(product_type, grade)
+                if key:
+                    self._requests[request_id] = (key, normalize_certs(certs))
+                    self._request_buckets[key][normalize_certs(certs)].add(request_id)
+            for product_id, producer_id, product_type, grade in products:
+                self._add_product(product_id, producer_id, product_type, grade, link=False)
+            for producer_id, keys in self._producer_keys.items():
+                for key in keys:
+                    self._link_key(producer_id, key)
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._loaded_at = None
+
+    # --- Appariement (appelé sous verrou) ---
+
+    def _link_key(self, producer_id: int, key: MatchKey):
+        """Relie un producteur aux demandes d'une clé dont les certifications sont couvertes par ses badges"""
+        badges = self._producer_badges.get(producer_id, frozenset())
+        candidates = self._candidates[producer_id]
+        for certs, request_ids in self._request_buckets.get(key, {}).items():
+            if certs <= badges:
+                candidates.update(request_ids)
+                for request_id in request_ids:
+                    self._request_producers[request_id].add(producer_id)
+
+    def _unlink_key(self, producer_id: int, key: MatchKey):
+        candidates = self._candidates[producer_id]
+        for request_ids in self._request_buckets.get(key, {}).values():
+            for request_id in request_ids & candidates:
+                candidates.discard(request_id)
+                self._request_producers[request_id].discard(producer_id)
+
+    def _add_product(self, product_id: int, producer_id: int, product_type: str, grade: Optional[str], link: bool = True):
+        normalized_grade = normalize_grade(grade)
+        if not normalized_grade:
+            return
+        key = (product_type, normalized_grade)
+        self._products[product_id] = (producer_id, key)
+        product_ids = self._producer_keys[producer_id].setdefault(key, set())
+        product_ids.add(product_id)
+        # Premier produit du producteur sur cette clé: nouvelles demandes candidates
+        if len(product_ids) == 1:
+            self._key_producers[key].add(producer_id)
+            if link:
+                self._link_key(producer_id, key)
+
+    def _drop_product(self, product_id: int):
+        entry = self._products.pop(product_id, None)
+        if entry is None:
+            return
+        producer_id, key = entry
+        product_ids = self._producer_keys[producer_id][key]
+        product_ids.discard(product_id)
+        # Dernier produit du producteur sur cette clé: ses demandes ne sont plus candidates
+        if not product_ids:
+            del self._producer_keys[producer_id][key]
+            self._key_producers[key].discard(producer_id)
+            self._unlink_key(producer_id, key)
+
+    # --- Mises à jour incrémentales (no-op tant que l'index n'est pas chargé) ---
+
+    def upsert_request(self, req: SourcingRequest):
+        """Demande créée ou modifiée: comparée uniquement aux producteurs présents sur sa clé"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove_request(req.id)
+            key = request_key(req.product_type, req.grade_target)
+            if req.status != "OPEN" or key is None:
+                return
+            certs = normalize_certs(req.required_certs)
+            self._requests[req.id] = (key, certs)
+            self._request_buckets[key][certs].add(req.id)
+            for producer_id in self._key_producers.get(key, ()):
+                if certs <= self._producer_badges.get(producer_id, frozenset()):
+                    self._candidates[producer_id].add(req.id)
+                    self._request_producers[req.id].add(producer_id)
+
+    def remove_request(self, request_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove_request(request_id)
+
+    def _remove_request(self, request_id: int):
+        entry = self._requests.pop(request_id, None)
+        if entry is not None:
+            key, certs = entry
+            self._request_buckets[key][certs].discard(request_id)
+        for producer_id in self._request_producers.pop(request_id, set()):
+            self._candidates[producer_id].discard(request_id)
+
+    def upsert_product(self, product: Product):
+        """Produit créé, renommé, regradé ou dépublié: seules les demandes de ses clés sont touchées"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._drop_product(product.id)
+            if product.status == "PUBLISHED" and product.producer_id and product.product_type:
+                if product.producer_id not in self._producer_badges:
+                    self._producer_badges[product.producer_id] = normalize_certs(
+                        product.producer.badges if product.producer else None
+                    )
+                self._add_product(product.id, product.producer_id, product.product_type, product.grade)
+
+    def remove_product(self, product_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._drop_product(product_id)
+
+    def upsert_producer(self, producer: ProducerProfile):
+        """Badges modifiés: recalcul des candidats de ce producteur uniquement"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._producer_badges[producer.id] = normalize_certs(producer.badges)
+            for request_id in self._candidates.pop(producer.id, set()):
+                self._request_producers[request_id].discard(producer.id)
+            for key in self._producer_keys.get(producer.id, {}):
+                self._link_key(producer.id, key)
+
+    # --- Lecture ---
+
+    def candidates_for_producer(self, db: Session, producer_id: int) -> Dict[int, Set[int]]:
+        """Demande -> produits du producteur qui y répondent (même clé)"""
+        self.ensure_loaded(db)
+        with self._lock:
+            keys = self._producer_keys.get(producer_id, {})
+            return {
+                request_id: set(keys.get(self._requests[request_id][0], ()))
+                for request_id in self._candidates.get(producer_id, ())
+            }
+
+    def rank_for_producer(self, db: Session, producer: ProducerProfile, limit: int) -> Tuple[List[dict], int]:
+        """
+        Classe les demandes candidates d'un producteur. Le score combine la couverture du
+        volume par le stock des produits appariés, le meilleur prix face à la cible et le
+        trust score du producteur. Lecture de l'état courant en 3 requêtes, bornées par
+        le nombre de candidats.
+        Retourne les `limit` meilleures et le nombre total de demandes retenues.
+        """
+        candidates = self.candidates_for_producer(db, producer.id)
+        if not candidates:
+            return [], 0
+
+        conn = db.connection()
+        requests = {
+            row.id: row for row in conn.execute(
+                select(SourcingRequest.id, SourcingRequest.product_type, SourcingRequest.grade_target,
+                       SourcingRequest.volume_target_kg, SourcingRequest.price_target_usd,
+                       SourcingRequest.accepts_partial, SourcingRequest.required_certs, SourcingRequest.status)
+                .where(SourcingRequest.id.in_(candidates))
+            )
+        }
+        product_ids = set().union(*candidates.values())
+        products = {
+            row.id: row for row in conn.execute(
+                select(Product.id, Product.quantity_available, Product.min_price_per_kg, Product.price_fob)
+                .where(Product.id.in_(product_ids))
+            )
+        }
+        offered = set(conn.execute(
+            select(SourcingOffer.request_id).where(
+                SourcingOffer.facilitator_id == producer.id, SourcingOffer.request_id.in_(candidates)
+            )
+        ).scalars())
+
+        trust = min(max((producer.trust_score or 0) / MAX_TRUST_SCORE, 0.0), 1.0)
+        ranked = []
+        for request_id, matched in candidates.items():
+            req = requests.get(request_id)
+            rows = [products[pid] for pid in matched if pid in products]
+            if req is None or req.status != "OPEN" or not rows or not req.volume_target_kg:
+                continue
+            stock = float(sum(row.quantity_available or 0 for row in rows))
+            if stock <= 0 or (not req.accepts_partial and stock < req.volume_target_kg):
+                continue
+            prices = [p for p in (row.min_price_per_kg or row.price_fob for row in rows) if p]
+            best_price = min(prices) if prices else None
+
+            coverage = min(stock / req.volume_target_kg, 1.0)
+            price_fit = min(req.price_target_usd / best_price, 1.0) if best_price and req.price_target_usd else 0.0
+            score = COVERAGE_WEIGHT * coverage + PRICE_WEIGHT * price_fit + TRUST_WEIGHT * trust
+            ranked.append({
+                "request_id": request_id,
+                "product_type": req.product_type,
+                "grade_target": req.grade_target,
+                "volume_target_kg": req.volume_target_kg,
+                "price_target_usd": req.price_target_usd,
+                "required_certs": req.required_certs or [],
+                "matching_product_ids": sorted(matched),
+                "stock_available_kg": stock,
+                "coverage_percent": round(coverage * 100, 1),
+                "best_price_per_kg": best_price,
+                "score": round(score, 4),
+                "has_offer": request_id in offered,
+            })
+
+        ranked.sort(key=lambda c: (-c["score"], c["request_id"]))
+        return ranked[:limit], len(ranked)
+
+
+smart_match = SmartMatchIndex()
@@ -0,0 +1,73 @@
+"""
+Réservation atomique du stock des produits (commandes).
+
+Le contrôle et la décrémentation tiennent dans un seul UPDATE conditionnel:
+    UPDATE product SET quantity_available = quantity_available - :q
+    WHERE id = :id AND quantity_available >= :q RETURNING ...
+La base évalue la condition sur la version courante de la ligne: deux commandes
+concurrentes ne peuvent pas vendre le même stock, et aucun SELECT ... FOR UPDATE
+ne bloque les acheteurs pendant la lecture / validation. Le verrou de ligne pris
+par l'UPDATE ne dure que jusqu'au commit de la commande.
+
+Les remboursements (commande rejetée) passent par le même primitif sans condition
+et rendent exactement les unités retenues à la création (Order.reserved_units).
+"""
+import math
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+
+
+def reserved_units(quantity_kg: Optional[float]) -> int:
+    """Unités de stock (kg entiers) retenues pour une quantité commandée, arrondie au kg supérieur"""
+    return int(math.ceil(quantity_kg)) if quantity_kg and quantity_kg > 0 else 0
+
+
+def order_reserved_units(order) -> int:
+    """
+    Unités retenues par une commande. Les commandes antérieures à Order.reserved_units
+    (NULL) ont retiré int(quantity_kg), 10 sans quantité: c'est ce qui leur est rendu.
+    """
+    if order.reserved_units is not None:
+        return order.reserved_units
+    return int(order.quantity_kg) if order.quantity_kg else 10
+
+
+class StockReservationService:
+    """Réservation et remboursement du stock par UPDATE relatif."""
+
+    def reserve(self, db: Session, product_id: int, quantity_kg: float):
+        """
+        Retire `quantity_kg` du stock du produit si (et seulement si) il suffit.
+        Retourne la ligne (id, name, producer_id, quantity_available après réservation),
+        ou None si le produit n'existe pas ou que le stock est insuffisant. Ne commit pas.
+        """
+        units = reserved_units(quantity_kg)
+        table = Product.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == product_id, table.c.quantity_available >= units)
+            .values(quantity_available=table.c.quantity_available - units)
+            .returning(table.c.id, table.c.name, table.c.producer_id, table.c.quantity_available)
+        )
+        return db.execute(stmt).first()
+
+    def release(self, db: Session, product_id: int, units: int) -> Optional[int]:
+        """
+        Rend `units` unités au stock du produit (voir order_reserved_units). Retourne le
+        stock après remboursement (None si le produit n'existe plus). Ne commit pas.
+        """
+        table = Product.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == product_id)
+            .values(quantity_available=table.c.quantity_available + units)
+            .returning(table.c.quantity_available)
+        )
+        return db.execute(stmt).scalar()
+
+
+stock_reservation = StockReservationService()
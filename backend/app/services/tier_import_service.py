@@ -0,0 +1,369 @@
+"""
+Import en masse de paliers personnalisés (CSV ou NDJSON).
+
+Chaque ligne décrit un palier: product_id, min_kg, max_kg, price_per_kg.
+Les lignes sont regroupées par produit et validées avec les règles de
+ProductPriceTiersCreate; les produits invalides sont écartés et signalés.
+
+Sur PostgreSQL les paliers valides sont chargés par COPY dans une table temporaire,
+puis une seule instruction (CTE) écrit les snapshots historiques, remplace les paliers
+et met à jour la projection tarifaire des produits. Ailleurs (SQLite en dev), repli
+sur des executemany.
+"""
+import csv
+import io
+import json
+from collections import OrderedDict
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.pricing import PriceTier, PriceTierHistory, TemplateTier
+from app.schemas.pricing import PriceTierCreate, ProductPriceTiersCreate
+
+
+SUPPORTED_FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 1000
+ID_CHUNK_SIZE = 10000
+
+# Noms de colonnes acceptés -> champ de PriceTierCreate
+COLUMN_ALIASES = {
+    "product_id": "product_id",
+    "min_kg": "min_quantity_kg",
+    "min_quantity_kg": "min_quantity_kg",
+    "max_kg": "max_quantity_kg",
+    "max_quantity_kg": "max_quantity_kg",
+    "price_per_kg": "price_per_kg",
+}
+
+STAGING_COLUMNS = "product_id, min_quantity_kg, max_quantity_kg, price_per_kg, position"
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE price_tier_import (
+        product_id integer NOT NULL,
+        min_quantity_kg double precision NOT NULL,
+        max_quantity_kg double precision,
+        price_per_kg double precision NOT NULL,
+        position integer NOT NULL
+    ) ON COMMIT DROP
+"""
+
+COPY_STAGING_SQL = f"COPY price_tier_import ({STAGING_COLUMNS}) FROM STDIN WITH (FORMAT csv)"
+
+# Snapshot de l'état actuel, remplacement des paliers et projection tarifaire en une instruction.
+# Toutes les sous-requêtes voient l'état d'avant l'instruction: le snapshot lit les anciens paliers.
+SWAP_TIERS_SQL = f"""
+    WITH staged AS (
+        SELECT product_id, count(*) AS tier_count, min(price_per_kg) AS min_price, max(price_per_kg) AS max_price
+        FROM price_tier_import
+        GROUP BY product_id
+    ),
+    snapshots AS (
+        INSERT INTO price_tier_history
+            (product_id, pricing_mode, base_price_fob, tiers_snapshot, template_id_snapshot, change_reason, changed_by)
+        SELECT p.id, p.pricing_mode, p.price_fob,
+            CASE p.pricing_mode
+                WHEN 'TIERED' THEN (
+                    SELECT json_agg(json_build_object(
+                        'min_quantity_kg', t.min_quantity_kg, 'max_quantity_kg', t.max_quantity_kg,
+                        'price_per_kg', t.price_per_kg, 'position', t.position
+                    ) ORDER BY t.position)
+                    FROM price_tiers t WHERE t.product_id = p.id
+                )
+                WHEN 'TEMPLATE' THEN (
+                    SELECT json_agg(json_build_object(
+                        'min_quantity_kg', tt.min_quantity_kg, 'max_quantity_kg', tt.max_quantity_kg,
+                        'discount_percent', tt.discount_percent,
+                        'computed_price', p.price_fob * (1 - tt.discount_percent / 100),
+                        'position', tt.position
+                    ) ORDER BY tt.position)
+                    FROM template_tiers tt WHERE tt.template_id = p.template_id
+                )
+            END,
+            p.template_id, :change_reason, :changed_by
+        FROM product p JOIN staged s ON s.product_id = p.id
+    ),
+    removed AS (
+        DELETE FROM price_tiers t USING staged s WHERE t.product_id = s.product_id
+    ),
+    inserted AS (
+        INSERT INTO price_tiers ({STAGING_COLUMNS})
+        SELECT {STAGING_COLUMNS} FROM price_tier_import
+    )
+    UPDATE product p SET
+        pricing_mode = 'TIERED',
+        template_id = NULL,
+        last_base_price = p.price_fob,
+        price_changed_at = now(),
+        price_trend_direction = NULL,
+        price_trend_percent = NULL,
+        effective_tier_count = s.tier_count,
+        min_price_per_kg = s.min_price,
+        max_price_per_kg = s.max_price,
+        pricing_version = p.pricing_version + 1
+    FROM staged s
+    WHERE s.product_id = p.id
+"""
+
+
+def _chunks(values: List[int], size: int = ID_CHUNK_SIZE) -> Iterator[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _optional_float(value):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return float(value)
+
+
+class TierImportService:
+
+    # --- Lecture ---
+
+    def detect_format(self, filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+        name = (filename or "").lower()
+        if name.endswith(".csv") or content_type == "text/csv":
+            return "csv"
+        if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+            return "ndjson"
+        return None
+
+    def iter_rows(self, stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, dict]]:
+        """Lit le fichier en flux: (numéro de ligne, dict brut) par palier"""
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        if fmt == "csv":
+            reader = csv.DictReader(text_stream)
+            for row in reader:
+                yield reader.line_num, self._normalize_keys(row)
+        else:
+            for line_number, line in enumerate(text_stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, e  # signalée par validate(), la lecture continue
+                    continue
+                yield line_number, self._normalize_keys(row) if isinstance(row, dict) else {}
+
+    def _normalize_keys(self, row: dict) -> dict:
+        return {COLUMN_ALIASES.get(k.strip(), k.strip()): v for k, v in row.items() if k}
+
+    # --- Validation ---
+
+    def validate(self, db: Session, rows: Iterator[Tuple[int, dict]], producer_id: Optional[int] = None):
+        """
+        Regroupe les lignes par produit et les valide (règles de ProductPriceTiersCreate,
+        existence du produit et appartenance au producteur).
+        Retourne ({product_id: paliers triés par min}, erreurs, nombre total d'erreurs).
+        """
+        errors = []
+        error_count = 0
+
+        def report(line, product_id, detail):
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "product_id": product_id, "detail": detail})
+
+        grouped: "OrderedDict[int, List[Tuple[int, dict]]]" = OrderedDict()
+        rejected = set()  # Une ligne invalide écarte toute la grille du produit
+        try:
+            for line, raw in rows:
+                if isinstance(raw, Exception):
+                    report(line, None, f"Ligne invalide: {raw}")
+                    continue
+                try:
+                    product_id = int(raw["product_id"])
+                except KeyError as e:
+                    report(line, None, f"Colonne manquante: {e}")
+                    continue
+                except (TypeError, ValueError) as e:
+                    report(line, None, f"Ligne invalide: {e}")
+                    continue
+                try:
+                    tier = {
+                        "min_quantity_kg": float(raw["min_quantity_kg"]),
+                        "max_quantity_kg": _optional_float(raw.get("max_quantity_kg")),
+                        "price_per_kg": float(raw["price_per_kg"]),
+                    }
+                except KeyError as e:
+                    report(line, product_id, f"Colonne manquante: {e}")
+                    rejected.add(product_id)
+                    continue
+                except (TypeError, ValueError) as e:
+                    report(line, product_id, f"Ligne invalide: {e}")
+                    rejected.add(product_id)
+                    continue
+                grouped.setdefault(product_id, []).append((line, tier))
+        except (UnicodeDecodeError, csv.Error) as e:
+            report(None, None, f"Fichier illisible: {e}")
+            return {}, errors, error_count
+
+        known_ids = set()
+        for chunk in _chunks(list(grouped)):
+            query = select(Product.id).where(Product.id.in_(chunk))
+            if producer_id is not None:
+                query = query.where(Product.producer_id == producer_id)
+            known_ids.update(db.execute(query).scalars())
+
+        valid: Dict[int, List[PriceTierCreate]] = {}
+        for product_id, lines in grouped.items():
+            first_line = lines[0][0]
+            if product_id in rejected:
+                continue
+            if product_id not in known_ids:
+                report(first_line, product_id, "Produit non trouvé")
+                continue
+            try:
+                tiers_in = ProductPriceTiersCreate(tiers=[tier for _, tier in lines])
+            except ValidationError as e:
+                report(first_line, product_id, "; ".join(err["msg"] for err in e.errors()))
+                continue
+            valid[product_id] = sorted(tiers_in.tiers, key=lambda t: t.min_quantity_kg)
+
+        errors.sort(key=lambda e: e["line"] or 0)
+        return valid, errors, error_count
+
+    # --- Application ---
+
+    def apply(self, db: Session, tiers_by_product: Dict[int, List[PriceTierCreate]],
+              change_reason: str, changed_by: str):
+        """Remplace les paliers des produits (sans commit)"""
+        if not tiers_by_product:
+            return
+        staged_rows = [
+            (product_id, t.min_quantity_kg, t.max_quantity_kg, t.price_per_kg, position)
+            for product_id, tiers in tiers_by_product.items()
+            for position, t in enumerate(tiers)
+        ]
+        if db.get_bind().dialect.name == "postgresql":
+            self._copy_to_staging(db, staged_rows)
+            db.execute(text(SWAP_TIERS_SQL), {"change_reason": change_reason, "changed_by": changed_by})
+        else:
+            self._apply_executemany(db, tiers_by_product, staged_rows, change_reason, changed_by)
+
+    def _copy_to_staging(self, db: Session, staged_rows: List[tuple]):
+        db.execute(text(CREATE_STAGING_SQL))
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(staged_rows)  # None -> champ vide -> NULL en COPY csv
+        buffer.seek(0)
+
+        cursor = db.connection().connection.cursor()
+        try:
+            if db.get_bind().dialect.driver == "psycopg":
+                # psycopg 3 (dev local)
+                with cursor.copy(COPY_STAGING_SQL) as copy:
+                    copy.write(buffer.getvalue())
+            else:
+                # pg8000 (Render)
+                cursor.execute(COPY_STAGING_SQL, stream=buffer)
+        finally:
+            cursor.close()
+
+    def _apply_executemany(self, db: Session, tiers_by_product, staged_rows, change_reason, changed_by):
+        """Même résultat que SWAP_TIERS_SQL, en quelques executemany (SQLite)"""
+        products = Product.__table__
+        price_tiers = PriceTier.__table__
+        template_tiers = TemplateTier.__table__
+        product_ids = list(tiers_by_product)
+
+        # Snapshots de l'état actuel
+        current = []
+        old_tiers: Dict[int, list] = {}
+        for chunk in _chunks(product_ids):
+            current.extend(db.execute(
+                select(products.c.id, products.c.pricing_mode, products.c.price_fob, products.c.template_id)
+                .where(products.c.id.in_(chunk))
+            ).all())
+            for t in db.execute(
+                select(price_tiers.c.product_id, price_tiers.c.min_quantity_kg, price_tiers.c.max_quantity_kg,
+                       price_tiers.c.price_per_kg, price_tiers.c.position)
+                .where(price_tiers.c.product_id.in_(chunk)).order_by(price_tiers.c.position)
+            ):
+                old_tiers.setdefault(t.product_id, []).append(t)
+
+        template_ids = {p.template_id for p in current if p.pricing_mode == "TEMPLATE" and p.template_id}
+        tiers_by_template: Dict[int, list] = {}
+        if template_ids:
+            for t in db.execute(
+                select(template_tiers).where(template_tiers.c.template_id.in_(template_ids))
+                .order_by(template_tiers.c.position)
+            ):
+                tiers_by_template.setdefault(t.template_id, []).append(t)
+
+        def snapshot(p):
+            if p.pricing_mode == "TIERED":
+                return [
+                    {"min_quantity_kg": t.min_quantity_kg, "max_quantity_kg": t.max_quantity_kg,
+                     "price_per_kg": t.price_per_kg, "position": t.position}
+                    for t in old_tiers.get(p.id, [])
+                ]
+            if p.pricing_mode == "TEMPLATE" and p.template_id in tiers_by_template:
+                return [
+                    {"min_quantity_kg": t.min_quantity_kg, "max_quantity_kg": t.max_quantity_kg,
+                     "discount_percent": t.discount_percent,
+                     "computed_price": p.price_fob * (1 - t.discount_percent / 100), "position": t.position}
+                    for t in tiers_by_template[p.template_id]
+                ]
+            return None
+
+        db.execute(insert(PriceTierHistory.__table__), [
+            {"product_id": p.id, "pricing_mode": p.pricing_mode, "base_price_fob": p.price_fob,
+             "tiers_snapshot": snapshot(p), "template_id_snapshot": p.template_id,
+             "change_reason": change_reason, "changed_by": changed_by}
+            for p in current
+        ])
+
+        # Remplacement des paliers
+        for chunk in _chunks(product_ids):
+            db.execute(price_tiers.delete().where(price_tiers.c.product_id.in_(chunk)))
+        db.execute(insert(price_tiers), [
+            {"product_id": product_id, "min_quantity_kg": min_kg, "max_quantity_kg": max_kg,
+             "price_per_kg": price, "position": position}
+            for product_id, min_kg, max_kg, price, position in staged_rows
+        ])
+
+        # Projection tarifaire (le snapshot devient la référence de tendance)
+        db.execute(
+            products.update().where(products.c.id == bindparam("b_product_id")).values(
+                pricing_mode="TIERED",
+                template_id=None,
+                last_base_price=products.c.price_fob,
+                price_changed_at=func.now(),
+                price_trend_direction=None,
+                price_trend_percent=None,
+                effective_tier_count=bindparam("b_tier_count"),
+                min_price_per_kg=bindparam("b_min_price"),
+                max_price_per_kg=bindparam("b_max_price"),
+                pricing_version=products.c.pricing_version + 1,
+            ),
+            [
+                {"b_product_id": product_id, "b_tier_count": len(tiers),
+                 "b_min_price": min(t.price_per_kg for t in tiers), "b_max_price": max(t.price_per_kg for t in tiers)}
+                for product_id, tiers in tiers_by_product.items()
+            ]
+        )
+
+    def import_tiers(self, db: Session, stream: IO[bytes], fmt: str, producer_id: Optional[int] = None,
+                     dry_run: bool = False, changed_by: str = "Import") -> dict:
+        """Valide puis importe le fichier (sans commit: à la charge de l'appelant)"""
+        valid, errors, error_count = self.validate(db, self.iter_rows(stream, fmt), producer_id)
+        if not dry_run:
+            self.apply(db, valid, "Import en masse des paliers", changed_by)
+        return {
+            "products_imported": len(valid),
+            "tiers_imported": sum(len(tiers) for tiers in valid.values()),
+            "product_ids": list(valid),
+            "error_count": error_count,
+            "errors": errors,
+            "dry_run": dry_run,
+        }
+
+
+tier_import_service = TierImportService()
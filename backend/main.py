@@ -1,13 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db import base  # noqa: F401
+from app.services.outbox import outbox
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Post-commit side effects (trace events, notifications...) of this worker
+    outbox.start()
+    yield
+    outbox.stop()
+
 
 app = FastAPI(
     title="TeraVoo API",
     description="Backend for TeraVoo - The Agricultural Operating System",
     version="0.1.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 from app.api.v1.api import api_router
@@ -24,7 +36,21 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
-from fastapi.responses import RedirectResponse
+import math
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, RedirectResponse
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    # Same 422 body as FastAPI's default, but rejected NaN / Infinity inputs are echoed
+    # as strings (the default handler fails to serialize them and answers a 500)
+    encode_float = lambda value: value if math.isfinite(value) else str(value)
+    return JSONResponse(
+        status_code=422,
+        content={"detail": jsonable_encoder(exc.errors(), custom_encoder={float: encode_float})}
+    )
 
 @app.get("/", include_in_schema=False)
 async def docs_redirect():
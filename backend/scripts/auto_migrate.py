@@ -86,7 +86,15 @@ def auto_migrate():
                         default_clause = f" DEFAULT {default_val}"
                     elif isinstance(default_val, bool):
                         default_clause = f" DEFAULT {str(default_val).upper()}"
-                
+
+                # Fall back to the SQL default (e.g. server_default=func.now()) so existing rows get a value
+                if not default_clause and col.server_default is not None:
+                    server_default = col.server_default.arg
+                    if isinstance(server_default, str):
+                        default_clause = f" DEFAULT '{server_default}'"
+                    else:
+                        default_clause = f" DEFAULT {server_default.compile(dialect=engine.dialect)}"
+
                 # Nullable
                 nullable = "" if col.nullable else " NOT NULL"
                 
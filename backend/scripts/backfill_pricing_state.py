@@ -0,0 +1,91 @@
+"""
+Backfill of the denormalized product pricing state (see refresh_pricing_state in
+app/services/pricing_engine.py): last_base_price / price_changed_at from the latest
+price history snapshot, the price trend, and the effective tier stats
+(effective_tier_count, min/max_price_per_kg).
+Same backfill SQL as migration c3e8f5a0b612, for databases deployed without Alembic
+(auto_migrate.py adds these columns empty). Only products that were never filled are
+touched: pricing writes keep the others up to date.
+PostgreSQL only (no-op elsewhere). Idempotent: safe to run on every deploy.
+
+Usage: python scripts/backfill_pricing_state.py
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.db.session import engine
+
+BACKFILL_STEPS = {
+    "last base price": """
+        UPDATE product p
+        SET last_base_price = h.base_price_fob, price_changed_at = h.changed_at
+        FROM (
+            SELECT DISTINCT ON (product_id) product_id, base_price_fob, changed_at
+            FROM price_tier_history
+            ORDER BY product_id, changed_at DESC
+        ) h
+        WHERE h.product_id = p.id AND p.last_base_price IS NULL
+    """,
+    "price trend": """
+        UPDATE product
+        SET price_trend_percent = round(abs((price_fob - last_base_price) / last_base_price * 100)::numeric, 2),
+            price_trend_direction = CASE
+                WHEN round(((price_fob - last_base_price) / last_base_price * 100)::numeric, 2) < 0 THEN 'down'
+                WHEN round(((price_fob - last_base_price) / last_base_price * 100)::numeric, 2) > 0 THEN 'up'
+                ELSE 'stable' END
+        WHERE last_base_price IS NOT NULL AND last_base_price <> 0
+          AND price_fob IS NOT NULL AND price_fob <> last_base_price
+          AND price_trend_direction IS NULL
+    """,
+    "single-price tiers": """
+        UPDATE product
+        SET effective_tier_count = 1, min_price_per_kg = price_fob, max_price_per_kg = price_fob
+        WHERE (pricing_mode = 'SINGLE' OR pricing_mode IS NULL) AND min_price_per_kg IS NULL
+    """,
+    "custom tiers": """
+        UPDATE product p
+        SET effective_tier_count = t.n, min_price_per_kg = t.lo, max_price_per_kg = t.hi
+        FROM (
+            SELECT product_id, count(*) AS n, min(price_per_kg) AS lo, max(price_per_kg) AS hi
+            FROM price_tiers GROUP BY product_id
+        ) t
+        WHERE t.product_id = p.id AND p.pricing_mode = 'TIERED' AND p.min_price_per_kg IS NULL
+    """,
+    "template tiers": """
+        UPDATE product p
+        SET effective_tier_count = t.n,
+            min_price_per_kg = round((p.price_fob * (1 - t.max_discount / 100))::numeric, 2),
+            max_price_per_kg = round((p.price_fob * (1 - t.min_discount / 100))::numeric, 2)
+        FROM (
+            SELECT template_id, count(*) AS n,
+                   min(discount_percent) AS min_discount, max(discount_percent) AS max_discount
+            FROM template_tiers GROUP BY template_id
+        ) t
+        WHERE t.template_id = p.template_id AND p.pricing_mode = 'TEMPLATE' AND p.min_price_per_kg IS NULL
+    """,
+}
+
+
+def backfill():
+    print("=" * 60)
+    print("PRODUCT PRICING STATE BACKFILL")
+    print("=" * 60)
+
+    if engine.dialect.name != "postgresql":
+        print(f"\n⊗ {engine.dialect.name}: pricing state comes from pricing writes (nothing to do)")
+        return
+
+    with engine.begin() as conn:
+        for label, statement in BACKFILL_STEPS.items():
+            updated = conn.execute(text(statement)).rowcount
+            print(f"\n✓ {label}: {updated} products filled")
+
+    print("\n✅ Pricing trends and tier stats backfilled")
+
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,64 @@
+"""
+Backfill of the normalized Product.product_type column (see app/services/product_types.py).
+Fills products whose product_type is NULL (e.g. inserted by raw SQL seed scripts) and
+creates ix_product_producer_type_status when the column was added by auto_migrate.py.
+Idempotent: safe to run on every deploy.
+
+Usage: python scripts/backfill_product_types.py [--all]   (--all recomputes every product)
+"""
+import argparse
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import bindparam, select, update
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import engine
+from app.models.product import Product
+from app.services.product_types import normalize_product_type
+
+BATCH_SIZE = 1000
+
+
+def backfill(recompute_all: bool = False):
+    print("=" * 60)
+    print("PRODUCT TYPE BACKFILL")
+    print("=" * 60)
+
+    for index in Product.__table__.indexes:
+        if index.name == "ix_product_producer_type_status":
+            index.create(engine, checkfirst=True)
+            print(f"\n✓ Index {index.name} present")
+
+    query = select(Product.id, Product.name, Product.product_type)
+    if not recompute_all:
+        query = query.where(Product.product_type.is_(None))
+
+    stmt = update(Product.__table__).where(Product.__table__.c.id == bindparam("b_id")).values(
+        product_type=bindparam("b_type")
+    )
+    updated = unknown = 0
+    with engine.begin() as conn:
+        rows = conn.execute(query).all()
+        changes = []
+        for row in rows:
+            product_type = normalize_product_type(row.name)
+            if product_type is None:
+                unknown += 1
+            if product_type != row.product_type:
+                changes.append({"b_id": row.id, "b_type": product_type})
+        for start in range(0, len(changes), BATCH_SIZE):
+            conn.execute(stmt, changes[start:start + BATCH_SIZE])
+        updated = len(changes)
+
+    print(f"\n✅ {len(rows)} products checked, {updated} updated")
+    if unknown:
+        print(f"⚠️  {unknown} products without a recognized type (product_type stays NULL)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill Product.product_type from product names")
+    parser.add_argument("--all", action="store_true", help="Recompute every product, not only NULL ones")
+    backfill(parser.parse_args().all)
@@ -0,0 +1,138 @@
+"""
+Benchmark - All producer prices for a sourcing request
+Times GET /sourcing/requests/{id}/all-producer-prices (endpoint function) against the
+previous N+1 implementation, on a growing catalog with a constant number of matches.
+Runs inside a transaction that is rolled back (leaves the DB untouched).
+
+Usage: python scripts/bench_all_producer_prices.py [sizes...]   (default: 1000 10000 30000)
+"""
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, select, text
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.models.producer import ProducerProfile
+from app.models.pricing import PriceTier
+from app.models.sourcing import SourcingRequest
+from app.api.v1.endpoints.sourcing import (
+    get_all_producer_prices_for_request, get_product_effective_tiers, find_tier_for_quantity
+)
+
+RUNS = 5
+PRODUCERS = 50
+MATCHING_PRODUCTS = 200
+OTHER_NAMES = ["Clove", "Black Pepper", "Cinnamon", "Cocoa", "Lychee"]
+
+
+def seed_catalog(db, n_products: int) -> int:
+    db.execute(insert(ProducerProfile.__table__), [
+        {"name": f"Bench Producer {i}", "location_region": "Sava", "location_district": "Sambava", "trust_score": 80}
+        for i in range(PRODUCERS)
+    ])
+    producer_ids = db.execute(
+        select(ProducerProfile.id).where(ProducerProfile.name.like("Bench Producer %"))
+    ).scalars().all()
+
+    step = max(n_products // MATCHING_PRODUCTS, 1)
+    db.execute(insert(Product.__table__), [
+        {
+            "name": f"Bench Vanilla {i}" if i % step == 0 else f"Bench {OTHER_NAMES[i % len(OTHER_NAMES)]} {i}",
+            "price_fob": 200.0 + i % 50, "status": "PUBLISHED", "producer_id": producer_ids[i % PRODUCERS],
+            "pricing_mode": "TIERED" if i % 2 else "SINGLE", "moq_kg": 1.0, "quantity_available": 1000.0,
+        }
+        for i in range(n_products)
+    ])
+    tiered = db.execute(
+        select(Product.id, Product.price_fob).where(Product.name.like("Bench %"), Product.pricing_mode == "TIERED")
+    ).all()
+    db.execute(insert(PriceTier.__table__), [
+        {"product_id": p.id, "min_quantity_kg": min_kg, "max_quantity_kg": max_kg,
+         "price_per_kg": round(p.price_fob * factor, 2), "position": position}
+        for p in tiered
+        for position, (min_kg, max_kg, factor) in enumerate([(1, 99, 1.0), (100, 499, 0.95), (500, None, 0.9)])
+    ])
+
+    req = SourcingRequest(buyer_id=1, product_type="Vanilla", volume_target_kg=250, price_target_usd=210, grade_target="A")
+    db.add(req)
+    db.flush()
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("ANALYZE product"))
+    return req.id
+
+
+def legacy_all_producer_prices(db, request_id: int) -> int:
+    """Previous implementation: one producer query + lazy tier loads per matching product."""
+    req = db.query(SourcingRequest).filter(SourcingRequest.id == request_id).first()
+    products = db.query(Product).filter(
+        Product.status == "PUBLISHED", Product.name.ilike(f"%{req.product_type}%")
+    ).all()
+    count = 0
+    for product in products:
+        producer = db.query(ProducerProfile).filter(ProducerProfile.id == product.producer_id).first()
+        if producer and find_tier_for_quantity(get_product_effective_tiers(product), req.volume_target_kg):
+            count += 1
+    return count
+
+
+def measure(db, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    timings = []
+    for _ in range(RUNS):
+        db.expire_all()
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        start = time.perf_counter()
+        try:
+            result = fn()
+        finally:
+            timings.append(time.perf_counter() - start)
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return min(timings), len(statements), result
+
+
+def run(sizes):
+    print("=" * 60)
+    print("ALL PRODUCER PRICES BENCHMARK")
+    print("=" * 60)
+
+    for n_products in sizes:
+        db = SessionLocal()
+        try:
+            request_id = seed_catalog(db, n_products)
+            legacy_time, legacy_statements, legacy_count = measure(
+                db, lambda: legacy_all_producer_prices(db, request_id)
+            )
+            new_time, new_statements, result = measure(
+                db, lambda: get_all_producer_prices_for_request(request_id, db)
+            )
+            assert result["producer_count"] == legacy_count, (result["producer_count"], legacy_count)
+
+            print(f"\n📦 {n_products:>6} products, {result['producer_count']} offers returned")
+            print(f"  • N+1 (before):  {legacy_time * 1000:8.1f} ms  {legacy_statements:>4} statements")
+            print(f"  • Single join:   {new_time * 1000:8.1f} ms  {new_statements:>4} statements")
+
+            if db.get_bind().dialect.name == "postgresql":
+                plan = db.execute(text(
+                    "EXPLAIN SELECT id FROM product WHERE status = 'PUBLISHED' AND name ILIKE '%Vanilla%'"
+                )).scalars().all()
+                uses_index = any("ix_product_name_trgm" in line for line in plan)
+                print(f"  • ix_product_name_trgm used: {'✅' if uses_index else '❌'}")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 30000]
+    run(sizes)
@@ -0,0 +1,118 @@
+"""
+Benchmark - Volume allocation optimizer (POST /requests/{id}/optimize)
+Times the min-cost offer mix for one request with N offers spread over 200 producers
+(half with TIERED products, half with flat SINGLE prices): full endpoint (offers + tiers
+loading and solve) and the solver alone.
+Runs inside a transaction that is rolled back (leaves the DB untouched).
+
+Usage: python scripts/bench_allocation_optimizer.py [sizes...]   (default: 100 1000 10000)
+"""
+import os
+import random
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.api.v1.endpoints.sourcing import get_producers_effective_tiers, optimize_request_allocation
+from app.models.pricing import PriceTier
+from app.models.product import Product
+from app.models.producer import ProducerProfile
+from app.models.sourcing import SourcingOffer, SourcingRequest
+from app.schemas.sourcing import AllocationOptimizeRequest
+from app.services.allocation_optimizer import allocation_optimizer, OfferCandidate
+
+RUNS = 5
+PRODUCERS = 200
+VOLUME_TARGET_KG = 5000
+VOLUMES = [50, 100, 250, 500, 1000]
+
+
+def seed(db, size: int) -> int:
+    random.seed(size)
+    db.execute(insert(ProducerProfile.__table__), [
+        {"name": f"Bench Alloc Producer {i}", "location_region": "Sava", "location_district": "Sambava",
+         "badges": ["ORGANIC"] if i % 2 else [], "trust_score": 4.0}
+        for i in range(PRODUCERS)
+    ])
+    producer_ids = db.execute(
+        select(ProducerProfile.id).where(ProducerProfile.name.like("Bench Alloc Producer %"))
+    ).scalars().all()
+    db.execute(insert(Product.__table__), [
+        {"name": f"Bench Vanilla {i}", "product_type": "Vanilla", "status": "PUBLISHED", "producer_id": producer_id,
+         "price_fob": 250.0, "moq_kg": 10.0, "pricing_mode": "TIERED" if i % 2 else "SINGLE"}
+        for i, producer_id in enumerate(producer_ids)
+    ])
+    tiered = db.execute(
+        select(Product.id).where(Product.name.like("Bench Vanilla %"), Product.pricing_mode == "TIERED")
+    ).scalars().all()
+    db.execute(insert(PriceTier.__table__), [
+        {"product_id": product_id, "min_quantity_kg": low, "max_quantity_kg": high, "price_per_kg": price,
+         "position": position}
+        for product_id in tiered
+        for position, (low, high, price) in enumerate([(10, 99, 250.0), (100, 499, 235.0), (500, None, 220.0)])
+    ])
+    request_id = db.execute(insert(SourcingRequest.__table__).values(
+        buyer_id=1, product_type="Vanilla", grade_target="A", status="OPEN", accepts_partial=True,
+        volume_target_kg=VOLUME_TARGET_KG, price_target_usd=230, required_certs=[]
+    )).inserted_primary_key[0]
+    db.execute(insert(SourcingOffer.__table__), [
+        {"request_id": request_id, "facilitator_id": producer_ids[i % PRODUCERS], "status": "PENDING",
+         "volume_offered_kg": random.choice(VOLUMES), "price_offered_usd": round(random.uniform(200, 260), 2),
+         "trust_score_snapshot": round(random.uniform(3, 5), 1)}
+        for i in range(size)
+    ])
+    db.flush()
+    return request_id
+
+
+def solver_candidates(db, request_id: int):
+    offers = db.query(SourcingOffer).filter(SourcingOffer.request_id == request_id).all()
+    tiers = get_producers_effective_tiers(sorted({o.facilitator_id for o in offers}), "Vanilla", db)
+    return [
+        OfferCandidate(o.id, o.facilitator_id, o.volume_offered_kg, o.price_offered_usd,
+                       o.trust_score_snapshot, tiers.get(o.facilitator_id, []))
+        for o in offers
+    ]
+
+
+def run(sizes):
+    print("=" * 60)
+    print("VOLUME ALLOCATION OPTIMIZER BENCHMARK")
+    print("=" * 60)
+
+    for size in sizes:
+        db = SessionLocal()
+        try:
+            request_id = seed(db, size)
+
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                plan = optimize_request_allocation(request_id, AllocationOptimizeRequest(), db)
+                db.expire_all()
+            endpoint_time = (time.perf_counter() - start) / RUNS
+
+            candidates = solver_candidates(db, request_id)
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                allocation_optimizer.optimize(candidates, VOLUME_TARGET_KG)
+            solver_time = (time.perf_counter() - start) / RUNS
+
+            print(f"\n📦 {size} offers -> {len(plan['allocations'])} allocated "
+                  f"({plan['allocated_kg']:.0f} kg, ${plan['total_usd']:,.2f}, avg ${plan['average_price_per_kg']}/kg)")
+            print(f"  ✂️  {plan['dp_offer_count']} offers left after pruning, grid step {plan['grid_step_kg']} kg")
+            print(f"  ⏱️  endpoint (load + solve): {endpoint_time * 1000:.1f} ms")
+            print(f"  ⏱️  solver only:             {solver_time * 1000:.1f} ms")
+        finally:
+            db.rollback()
+            db.close()
+
+    print("\n" + "=" * 60)
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or [100, 1000, 10000])
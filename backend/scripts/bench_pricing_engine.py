@@ -0,0 +1,115 @@
+"""
+Microbenchmark - Pricing Engine
+Compares the legacy per-request tier resolution (rebuild dicts + double sort)
+with the compiled in-memory lookup used by calculate_price.
+No database needed: products are built in memory.
+
+Usage: python scripts/bench_pricing_engine.py [n_products] [n_quotes]
+"""
+import os
+import sys
+import random
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import base  # noqa: F401  (register all mappers)
+from app.models.product import Product
+from app.models.pricing import PriceTier
+from app.services.pricing_engine import PricingEngine, CompiledPricing, get_effective_tiers
+
+
+def legacy_find_applicable_tier(tiers, quantity_kg):
+    """Former find_applicable_tier (pricing.py) kept here as the baseline"""
+    sorted_tiers = sorted(tiers, key=lambda t: t["min_quantity_kg"], reverse=True)
+    for tier in sorted_tiers:
+        if quantity_kg >= tier["min_quantity_kg"]:
+            if tier["max_quantity_kg"] is None or quantity_kg <= tier["max_quantity_kg"]:
+                return tier
+    if tiers:
+        return sorted(tiers, key=lambda t: t["min_quantity_kg"])[0]
+    return None
+
+
+def legacy_quote(product, quantity_kg):
+    tiers = get_effective_tiers(product)
+    tier = legacy_find_applicable_tier(tiers, quantity_kg)
+    price_per_kg = tier["price_per_kg"]
+    sorted_tiers = sorted(tiers, key=lambda t: t["min_quantity_kg"])
+    current_idx = next((i for i, t in enumerate(sorted_tiers) if t["position"] == tier["position"]), -1)
+    next_tier = sorted_tiers[current_idx + 1] if current_idx < len(sorted_tiers) - 1 else None
+    return price_per_kg, round(price_per_kg * quantity_kg, 2), next_tier
+
+
+def build_products(n_products):
+    products = []
+    for pid in range(1, n_products + 1):
+        base_price = random.uniform(80, 320)
+        product = Product(id=pid, name=f"Vanilla {pid}", price_fob=base_price, moq_kg=1.0, pricing_mode="TIERED")
+        bounds = [1, 50, 200, 500, 1000]
+        product.price_tiers = [
+            PriceTier(
+                min_quantity_kg=bounds[i],
+                max_quantity_kg=bounds[i + 1] - 0.01 if i < len(bounds) - 1 else None,
+                price_per_kg=round(base_price * (1 - 0.04 * i), 2),
+                position=i,
+            )
+            for i in range(len(bounds))
+        ]
+        products.append(product)
+    return products
+
+
+def run(n_products: int = 1000, n_quotes: int = 200_000):
+    print("=" * 60)
+    print("PRICING ENGINE MICROBENCHMARK")
+    print("=" * 60)
+
+    random.seed(42)
+    products = build_products(n_products)
+    requests = [(random.choice(products), random.uniform(1, 1500)) for _ in range(n_quotes)]
+
+    # 1. Legacy path
+    start = time.perf_counter()
+    for product, qty in requests:
+        legacy_quote(product, qty)
+    legacy_s = time.perf_counter() - start
+
+    # 2. Compiled path (compile once, then pure lookups)
+    engine = PricingEngine(max_entries=n_products)
+    start = time.perf_counter()
+    for product in products:
+        engine._store(CompiledPricing(product))
+    compile_s = time.perf_counter() - start
+
+    compiled = {p.id: engine._entries[p.id] for p in products}
+    start = time.perf_counter()
+    for product, qty in requests:
+        engine.quote(compiled[product.id], qty)
+    engine_s = time.perf_counter() - start
+
+    # 3. Bare tier lookup (bisect only)
+    start = time.perf_counter()
+    for product, qty in requests:
+        compiled[product.id].find_tier_index(qty)
+    lookup_s = time.perf_counter() - start
+
+    # Sanity: both paths agree
+    for product, qty in requests[:1000]:
+        expected = legacy_quote(product, qty)[0]
+        assert engine.quote(compiled[product.id], qty).price_per_kg == expected
+
+    per_call = lambda seconds: seconds / n_quotes * 1e6
+    print(f"\n📦 {n_products} products x 5 tiers, {n_quotes} quotes")
+    print(f"  • Legacy (dicts + sorts):        {per_call(legacy_s):8.2f} µs/quote")
+    print(f"  • Compiled quote (full payload): {per_call(engine_s):8.2f} µs/quote")
+    print(f"  • Compiled tier lookup (bisect): {per_call(lookup_s):8.2f} µs/quote")
+    print(f"  • One-off compilation:           {compile_s * 1000:8.2f} ms total")
+    print(f"\n✓ Tier lookup speedup: x{legacy_s / lookup_s:.1f}")
+
+
+if __name__ == "__main__":
+    n_products = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_quotes = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    run(n_products, n_quotes)
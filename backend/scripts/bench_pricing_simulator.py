@@ -0,0 +1,94 @@
+"""
+Benchmark - Catalog-wide repricing simulator
+Times POST /pricing/producers/{id}/simulate (service call) for a producer with N
+products (a mix of SINGLE / TIERED / TEMPLATE) and 5 historical orders per product.
+Runs inside a transaction that is rolled back (leaves the DB untouched).
+
+Usage: python scripts/bench_pricing_simulator.py [sizes...]   (default: 1000 5000)
+"""
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.models.order import Order
+from app.models.product import Product
+from app.models.producer import ProducerProfile
+from app.models.pricing import PriceTierTemplate, TemplateTier, PriceTier
+from app.schemas.pricing import PricingSimulationRequest
+from app.services.pricing_simulator import pricing_simulator
+
+RUNS = 5
+
+
+def seed_catalog(db, n_products: int) -> int:
+    producer = ProducerProfile(name=f"Bench Producer {n_products}", location_region="Sava", location_district="Sambava")
+    db.add(producer)
+    db.flush()
+
+    template = PriceTierTemplate(producer_id=producer.id, name="Bench Template")
+    db.add(template)
+    db.flush()
+    for position, (min_kg, discount) in enumerate([(1, 0), (50, 3), (200, 6), (500, 9), (1000, 12)]):
+        db.add(TemplateTier(template_id=template.id, min_quantity_kg=min_kg, discount_percent=discount, position=position))
+
+    modes = ["SINGLE", "TIERED", "TEMPLATE"]
+    db.execute(insert(Product.__table__), [
+        {
+            "name": f"Bench Vanilla {i}", "price_fob": 200.0 + i % 50, "status": "PUBLISHED",
+            "producer_id": producer.id, "pricing_mode": modes[i % 3],
+            "template_id": template.id if modes[i % 3] == "TEMPLATE" else None, "moq_kg": 1.0,
+        }
+        for i in range(n_products)
+    ])
+    products = db.execute(
+        select(Product.id, Product.pricing_mode, Product.price_fob).where(Product.producer_id == producer.id)
+    ).all()
+
+    db.execute(insert(PriceTier.__table__), [
+        {"product_id": p.id, "min_quantity_kg": min_kg, "max_quantity_kg": max_kg,
+         "price_per_kg": round(p.price_fob * factor, 2), "position": position}
+        for p in products if p.pricing_mode == "TIERED"
+        for position, (min_kg, max_kg, factor) in enumerate([(1, 99, 1.0), (100, 499, 0.95), (500, None, 0.9)])
+    ])
+    db.execute(insert(Order.__table__), [
+        {"product_id": p.id, "product_name": "Bench", "amount": 0.0, "buyer_name": "Bench",
+         "quantity_kg": quantity, "status": "CONFIRMED"}
+        for p in products
+        for quantity in (10, 60, 150, 400, 1200)
+    ])
+    db.flush()
+    return producer.id
+
+
+def run(sizes):
+    print("=" * 60)
+    print("REPRICING SIMULATOR BENCHMARK")
+    print("=" * 60)
+
+    simulation_in = PricingSimulationRequest(base_price_change_percent=8, template_discount_delta=2)
+    for n_products in sizes:
+        db = SessionLocal()
+        try:
+            producer_id = seed_catalog(db, n_products)
+            timings = []
+            for _ in range(RUNS):
+                start = time.perf_counter()
+                result = pricing_simulator.simulate(db, producer_id, simulation_in)
+                timings.append(time.perf_counter() - start)
+            print(f"\n📦 {n_products:>6} products, {n_products * 5} orders")
+            print(f"  • Best of {RUNS}:  {min(timings) * 1000:8.1f} ms")
+            print(f"  • Revenue impact: {result['revenue_change_percent']}%")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 5000]
+    run(sizes)
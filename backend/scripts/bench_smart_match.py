@@ -0,0 +1,94 @@
+"""
+Benchmark - Smart Match index
+Times the full rebuild of the request -> producer candidate index and the incremental
+updates (new request, product update) for N open requests and N published products.
+Runs inside a transaction that is rolled back (leaves the DB untouched).
+
+Usage: python scripts/bench_smart_match.py [sizes...]   (default: 1000 10000)
+"""
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.models.producer import ProducerProfile
+from app.models.sourcing import SourcingRequest
+from app.services.smart_match import SmartMatchIndex
+
+RUNS = 200
+PRODUCERS = 200
+TYPES = ["Vanilla", "Clove", "Lychee", "Pepper"]
+GRADES = ["A", "B", "C"]
+CERTS = [[], ["Organic"], ["Fairtrade"], ["Organic", "Fairtrade"]]
+
+
+def seed(db, size: int):
+    db.execute(insert(ProducerProfile.__table__), [
+        {"name": f"Bench Match Producer {i}", "location_region": "Sava", "location_district": "Sambava",
+         "badges": CERTS[i % len(CERTS)], "trust_score": 4.0}
+        for i in range(PRODUCERS)
+    ])
+    producer_ids = db.execute(
+        select(ProducerProfile.id).where(ProducerProfile.name.like("Bench Match Producer %"))
+    ).scalars().all()
+    db.execute(insert(Product.__table__), [
+        {"name": f"Bench {TYPES[i % 4]} {i}", "product_type": TYPES[i % 4], "grade": GRADES[i % 3],
+         "status": "PUBLISHED", "producer_id": producer_ids[i % PRODUCERS], "price_fob": 200.0}
+        for i in range(size)
+    ])
+    db.execute(insert(SourcingRequest.__table__), [
+        {"buyer_id": 1, "product_type": TYPES[i % 4], "grade_target": GRADES[i % 3], "status": "OPEN",
+         "required_certs": CERTS[i % len(CERTS)], "volume_target_kg": 500, "price_target_usd": 220}
+        for i in range(size)
+    ])
+    db.flush()
+
+
+def run(sizes):
+    print("=" * 60)
+    print("SMART MATCH INDEX BENCHMARK")
+    print("=" * 60)
+
+    for size in sizes:
+        db = SessionLocal()
+        try:
+            seed(db, size)
+            index = SmartMatchIndex()
+            start = time.perf_counter()
+            index.rebuild(db)
+            rebuild_time = time.perf_counter() - start
+            links = sum(len(c) for c in index._candidates.values())
+
+            req = SourcingRequest(id=10**9, buyer_id=1, product_type="Vanilla", grade_target="A",
+                                  status="OPEN", required_certs=["Organic"])
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                index.upsert_request(req)
+            request_time = (time.perf_counter() - start) / RUNS
+
+            # Regradé à chaque tour: quitte une clé et en rejoint une autre
+            product = db.query(Product).filter(Product.name.like("Bench %")).first()
+            start = time.perf_counter()
+            for i in range(RUNS):
+                product.grade = GRADES[i % 3]
+                index.upsert_product(product)
+            product_time = (time.perf_counter() - start) / RUNS
+
+            print(f"\n📦 {size:>6} open requests × {size} products ({size * size:,} pairs), {links:,} candidate links")
+            print(f"  • Full rebuild:         {rebuild_time * 1000:8.1f} ms")
+            print(f"  • New/updated request:  {request_time * 1000:8.3f} ms")
+            print(f"  • Regraded product:     {product_time * 1000:8.3f} ms")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    run(sizes)
@@ -0,0 +1,125 @@
+"""
+Benchmark - Concurrent stock reservation (POST /orders)
+Fires N parallel orders against one product whose stock covers only half of them,
+through create_order (atomic conditional UPDATE), then through the former
+read-check-write logic for comparison. Checks that the stock never oversells
+(sold kg == initial stock - final stock, final stock >= 0) and reports throughput.
+Orders are committed by concurrent sessions: their outbox events are drained, then the
+bench product, its orders and traceability events are deleted at the end.
+
+Usage: python scripts/bench_stock_reservation.py [orders...] [--workers N]   (default: 200 500, 32 workers)
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db import base  # noqa: F401  (register all mappers)
+from app.api.v1.endpoints.orders import create_order
+from app.models.order import Order
+from app.models.product import Product
+from app.models.producer import TraceabilityEvent
+from app.schemas.order import OrderCreate
+from app.services.outbox import outbox
+
+QUANTITY_KG = 10
+
+
+def legacy_create_order(order_in: OrderCreate, db, idempotency_key=None):
+    """Former create_order: SELECT, check in Python, write the decremented value"""
+    product = db.query(Product).filter(Product.id == order_in.product_id).first()
+    if product.quantity_available < order_in.quantity_kg:
+        raise HTTPException(status_code=400, detail="Product Sold Out or Insufficient Stock")
+    db.add(Order(product_id=product.id, product_name=product.name, amount=order_in.offer_price_total,
+                 quantity_kg=order_in.quantity_kg, status="PENDING", buyer_name=order_in.buyer_name))
+    product.quantity_available -= int(order_in.quantity_kg)
+    db.commit()
+
+
+def place_order(Session, handler, product_id: int, index: int) -> bool:
+    db = Session()
+    try:
+        handler(OrderCreate(product_id=product_id, quantity_kg=QUANTITY_KG,
+                            offer_price_total=QUANTITY_KG * 250.0, buyer_name=f"Bench Buyer {index}"), db, None)
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+def run_case(Session, handler, orders: int, workers: int) -> dict:
+    stock = orders * QUANTITY_KG // 2
+    db = Session()
+    try:
+        product_id = db.execute(insert(Product.__table__).values(
+            name="Bench Stock Vanilla", product_type="Vanilla", status="PUBLISHED",
+            price_fob=250.0, quantity_available=stock
+        )).inserted_primary_key[0]
+        db.commit()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            accepted = sum(pool.map(lambda i: place_order(Session, handler, product_id, i), range(orders)))
+        elapsed = time.perf_counter() - start
+
+        final_stock = db.execute(select(Product.quantity_available).where(Product.id == product_id)).scalar()
+        order_kg = db.execute(select(Order.quantity_kg).where(Order.product_id == product_id)).scalars().all()
+        return {
+            "stock": stock,
+            "accepted": accepted,
+            "final_stock": final_stock,
+            "ordered_kg": sum(order_kg),
+            "oversold_kg": max(0, sum(order_kg) - stock),
+            "consistent": final_stock >= 0 and sum(order_kg) == stock - final_stock,
+            "throughput": orders / elapsed,
+            "elapsed": elapsed,
+        }
+    finally:
+        db.rollback()
+        outbox.drain_all()
+        db.execute(delete(TraceabilityEvent.__table__).where(TraceabilityEvent.product_id.in_(
+            select(Product.id).where(Product.name == "Bench Stock Vanilla")
+        )))
+        db.execute(delete(Order.__table__).where(Order.product_name == "Bench Stock Vanilla"))
+        db.execute(delete(Product.__table__).where(Product.name == "Bench Stock Vanilla"))
+        db.commit()
+        db.close()
+
+
+def run(sizes, workers: int):
+    engine = create_engine(settings.DATABASE_URL, pool_size=workers, max_overflow=0, pool_pre_ping=True)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print("=" * 60)
+    print(f"CONCURRENT STOCK RESERVATION BENCHMARK ({engine.dialect.name}, {workers} workers)")
+    print("=" * 60)
+
+    for size in sizes:
+        print(f"\n🛒 {size} parallel orders of {QUANTITY_KG} kg, stock for {size // 2}")
+        for label, handler in (("atomic UPDATE", create_order), ("read-check-write", legacy_create_order)):
+            result = run_case(Session, handler, size, workers)
+            status = "✅ no oversell" if result["consistent"] and not result["oversold_kg"] else "❌ OVERSOLD"
+            print(f"  {label:<17} {status}: {result['accepted']} accepted, {result['ordered_kg']:.0f} kg ordered "
+                  f"for {result['stock']} kg, final stock {result['final_stock']} "
+                  f"(oversold {result['oversold_kg']:.0f} kg)")
+            print(f"  {'':<17} ⏱️  {result['elapsed'] * 1000:.0f} ms, {result['throughput']:.0f} orders/s")
+
+    print("\n" + "=" * 60)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("orders", nargs="*", type=int, default=[200, 500])
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+    run(args.orders, args.workers)
@@ -0,0 +1,86 @@
+"""
+Benchmark - Template update history snapshots
+Times the snapshot step of update_price_template for a template linked to
+N products: legacy per-product ORM loop vs the single set-based statement.
+Runs inside a transaction that is rolled back (leaves the DB untouched).
+
+Usage: python scripts/bench_template_snapshots.py [sizes...]   (default: 100 1000 10000)
+"""
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.models.producer import ProducerProfile
+from app.models.pricing import PriceTierTemplate, TemplateTier
+from app.api.v1.endpoints.pricing import create_price_history_snapshot, create_template_history_snapshots
+
+
+def seed_template(db, n_products: int) -> int:
+    producer = ProducerProfile(name=f"Bench Producer {n_products}", location_region="Sava", location_district="Sambava")
+    db.add(producer)
+    db.flush()
+
+    template = PriceTierTemplate(producer_id=producer.id, name="Bench Template")
+    db.add(template)
+    db.flush()
+    for position, (min_kg, discount) in enumerate([(1, 0), (50, 3), (200, 6), (500, 9), (1000, 12)]):
+        db.add(TemplateTier(template_id=template.id, min_quantity_kg=min_kg, discount_percent=discount, position=position))
+
+    db.execute(insert(Product.__table__), [
+        {
+            "name": f"Bench Vanilla {i}", "price_fob": 200.0 + i % 50, "status": "PUBLISHED",
+            "producer_id": producer.id, "pricing_mode": "TEMPLATE", "template_id": template.id, "moq_kg": 1.0,
+        }
+        for i in range(n_products)
+    ])
+    db.flush()
+    return template.id
+
+
+def time_legacy(db, template_id: int) -> float:
+    db.expire_all()
+    start = time.perf_counter()
+    template = db.query(PriceTierTemplate).filter(PriceTierTemplate.id == template_id).first()
+    for product in template.products:
+        create_price_history_snapshot(db, product, "Bench legacy", "Bench")
+    db.flush()
+    return time.perf_counter() - start
+
+
+def time_bulk(db, template_id: int) -> float:
+    db.expire_all()
+    start = time.perf_counter()
+    create_template_history_snapshots(db, template_id, "Bench bulk", "Bench")
+    db.flush()
+    return time.perf_counter() - start
+
+
+def run(sizes):
+    print("=" * 60)
+    print("TEMPLATE UPDATE SNAPSHOT BENCHMARK")
+    print("=" * 60)
+
+    for n_products in sizes:
+        db = SessionLocal()
+        try:
+            template_id = seed_template(db, n_products)
+            legacy_s = time_legacy(db, template_id)
+            bulk_s = time_bulk(db, template_id)
+            print(f"\n📦 {n_products:>6} linked products")
+            print(f"  • Legacy ORM loop:      {legacy_s * 1000:10.1f} ms")
+            print(f"  • Set-based statement:  {bulk_s * 1000:10.1f} ms  (x{legacy_s / bulk_s:.1f})")
+        finally:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]
+    run(sizes)
@@ -0,0 +1,80 @@
+"""
+Converts the filterable JSON columns to JSONB and creates their GIN / expression indexes
+(same DDL as migrations 1c4e7a9b2d60 and 2f6b8d4e1a75, for databases deployed without Alembic).
+Spec expression indexes created before 2f6b8d4e1a75 cast without a type check: they are rebuilt.
+PostgreSQL only (no-op elsewhere). Idempotent: safe to run on every deploy.
+
+Usage: python scripts/ensure_jsonb_columns.py
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.db.session import engine
+
+JSONB_COLUMNS = [
+    ("sourcing_requests", "specs_json"),
+    ("sourcing_requests", "required_certs"),
+    ("sourcing_offers", "cert_proofs_urls"),
+    ("producer_profiles", "badges"),
+]
+
+INDEXES = {
+    "ix_sourcing_requests_required_certs_gin":
+        "ON sourcing_requests USING gin (required_certs jsonb_path_ops)",
+    "ix_producer_profiles_badges_gin":
+        "ON producer_profiles USING gin (badges jsonb_path_ops)",
+    "ix_sourcing_requests_specs_gin":
+        "ON sourcing_requests USING gin (specs_json)",
+}
+
+# Numeric spec bounds (app/db/jsonb.py json_number): non-numeric values index as NULL
+SPEC_INDEXES = {
+    f"ix_sourcing_requests_spec_{key}":
+        f"ON sourcing_requests ((CASE WHEN jsonb_typeof(specs_json -> '{key}') = 'number' "
+        f"THEN (specs_json ->> '{key}')::float END))"
+    for key in ("vanillin_content_min", "moisture_max")
+}
+
+
+def ensure_jsonb():
+    print("=" * 60)
+    print("JSONB COLUMNS & INDEXES")
+    print("=" * 60)
+
+    if engine.dialect.name != "postgresql":
+        print(f"\n⊗ {engine.dialect.name}: JSON columns stay JSON (nothing to do)")
+        return
+
+    with engine.begin() as conn:
+        for table, column in JSONB_COLUMNS:
+            data_type = conn.execute(text(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = :table AND column_name = :column"
+            ), {"table": table, "column": column}).scalar()
+            if data_type is None:
+                print(f"\n⚠️  {table}.{column} missing (run auto_migrate.py first)")
+            elif data_type == "jsonb":
+                print(f"\n✓ {table}.{column} already JSONB")
+            else:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"))
+                print(f"\n→ {table}.{column}: {data_type} -> JSONB")
+
+        for name in SPEC_INDEXES:
+            indexdef = conn.execute(text("SELECT indexdef FROM pg_indexes WHERE indexname = :name"), {"name": name}).scalar()
+            if indexdef is not None and "jsonb_typeof" not in indexdef:
+                conn.execute(text(f"DROP INDEX {name}"))
+                print(f"→ Index {name}: rebuilt with a numeric type check")
+
+        for name, definition in {**INDEXES, **SPEC_INDEXES}.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition}"))
+            print(f"✓ Index {name} present")
+
+    print("\n✅ JSONB filters are index-served")
+
+
+if __name__ == "__main__":
+    ensure_jsonb()
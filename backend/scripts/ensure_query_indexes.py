@@ -0,0 +1,57 @@
+"""
+Creates the query indexes that only Alembic migrations create, for databases deployed
+without Alembic (auto_migrate.py adds columns, not indexes):
+- ix_sourcing_offers_request_rank (a7d3e9f1c582): per-request offer ranking
+- ix_product_name_trgm + pg_trgm (e4b1c7d2f905): product name search
+- ix_sourcing_requests_status_created (b5e2f8c1d493): request listing
+- ix_price_tier_history_product_changed_at (b7c41e2d9a53): as-of price history
+PostgreSQL only (no-op elsewhere). Idempotent: safe to run on every deploy.
+
+Usage: python scripts/ensure_query_indexes.py
+"""
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.db.session import engine
+
+EXTENSIONS = ["pg_trgm"]
+
+INDEXES = {
+    "ix_sourcing_offers_request_rank":
+        "ON sourcing_offers (request_id, coalesce(trust_score_snapshot, 0) DESC, price_offered_usd, id)",
+    "ix_product_name_trgm":
+        "ON product USING gin (name gin_trgm_ops) WHERE status = 'PUBLISHED'",
+    "ix_sourcing_requests_status_created":
+        "ON sourcing_requests (status, created_at, id)",
+    "ix_price_tier_history_product_changed_at":
+        "ON price_tier_history (product_id, changed_at DESC) INCLUDE (base_price_fob)",
+}
+
+
+def ensure_indexes():
+    print("=" * 60)
+    print("QUERY INDEXES")
+    print("=" * 60)
+
+    if engine.dialect.name != "postgresql":
+        print(f"\n⊗ {engine.dialect.name}: indexes come from the models (nothing to do)")
+        return
+
+    with engine.begin() as conn:
+        for extension in EXTENSIONS:
+            conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+            print(f"\n✓ Extension {extension} present")
+
+        for name, definition in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition}"))
+            print(f"✓ Index {name} present")
+
+    print("\n✅ Ranking, search and history queries are index-served")
+
+
+if __name__ == "__main__":
+    ensure_indexes()
@@ -0,0 +1,69 @@
+"""
+Bulk import of custom price tiers from a CSV or NDJSON file.
+Same validation and set-based apply as POST /pricing/producers/{id}/price-tiers/import.
+
+Columns / keys: product_id, min_kg, max_kg, price_per_kg (max_kg empty = unlimited)
+
+Usage: python scripts/import_price_tiers.py FILE [--producer-id ID] [--format csv|ndjson] [--dry-run]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.services.tier_import_service import tier_import_service, SUPPORTED_FORMATS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import of custom price tiers")
+    parser.add_argument("file")
+    parser.add_argument("--producer-id", type=int, default=None, help="Only accept products of this producer")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default=None, help="Defaults to the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="Validate without importing")
+    args = parser.parse_args()
+
+    fmt = args.format or tier_import_service.detect_format(args.file)
+    if fmt not in SUPPORTED_FORMATS:
+        parser.error("cannot detect the format, use --format csv|ndjson")
+
+    print("=" * 60)
+    print("PRICE TIERS BULK IMPORT" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 60)
+
+    db = SessionLocal()
+    start = time.perf_counter()
+    try:
+        with open(args.file, "rb") as stream:
+            result = tier_import_service.import_tiers(
+                db, stream, fmt, producer_id=args.producer_id, dry_run=args.dry_run, changed_by="CLI Import"
+            )
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"\n✅ {result['products_imported']} products, {result['tiers_imported']} tiers "
+          f"{'valid' if args.dry_run else 'imported'} in {time.perf_counter() - start:.2f}s")
+    if result["error_count"]:
+        print(f"⚠️  {result['error_count']} rejected:")
+        for error in result["errors"][:20]:
+            print(f"  • line {error['line']} product {error['product_id']}: {error['detail']}")
+        if result["error_count"] > 20:
+            print(f"  ... {result['error_count'] - 20} more")
+
+    # Note: running API processes keep their compiled pricing cache until restarted
+    sys.exit(1 if result["error_count"] and not result["products_imported"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Reconciliation of the SourcingRequest coverage counters (see app/services/request_coverage.py).
+Recomputes offer_count / covered_kg_* / covered_value_usd / best_price / weighted_avg_price
+from sourcing_offers and fixes any request whose stored counters drifted (e.g. offers written
+by raw SQL seed scripts, or columns just added by auto_migrate.py with their 0 default).
+Idempotent: safe to run on every deploy.
+
+Usage: python scripts/reconcile_request_coverage.py [--dry-run] [--request-id ID ...]
+"""
+import argparse
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal
+from app.services.request_coverage import request_coverage
+
+
+def reconcile(dry_run: bool = False, request_ids=None):
+    print("=" * 60)
+    print("SOURCING REQUEST COVERAGE RECONCILIATION" + (" (DRY RUN)" if dry_run else ""))
+    print("=" * 60)
+
+    db = SessionLocal()
+    try:
+        drifted = request_coverage.reconcile(db, request_ids=request_ids, dry_run=dry_run)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    if not drifted:
+        print("\n✅ All coverage counters match their offers")
+    elif dry_run:
+        print(f"\n⚠️  {len(drifted)} requests with drifted counters: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+    else:
+        print(f"\n✅ {len(drifted)} requests fixed: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute SourcingRequest coverage counters from offers")
+    parser.add_argument("--dry-run", action="store_true", help="Report drifted requests without fixing them")
+    parser.add_argument("--request-id", type=int, nargs="+", dest="request_ids", help="Only check these requests")
+    args = parser.parse_args()
+    reconcile(args.dry_run, args.request_ids)
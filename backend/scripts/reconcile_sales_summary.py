@@ -0,0 +1,122 @@
+"""
+Reconciliation of the producer sales summary (see app/services/sales_summary.py).
+Recomputes order_count / quantity_kg / amount per (producer, product, month, status)
+from orders and fixes any row that drifted (e.g. orders written by raw SQL seed scripts,
+or the producer_sales_summary table just created empty by create_all).
+First fills orders.producer_id from the order's product where it is missing (orders
+created before the column, or by seed scripts) and dates orders without created_at
+(keyset listings need it). On PostgreSQL, also ensures the orders.product_id foreign
+key, created_at NOT NULL and indexes (same DDL as migrations 7c3f9a1e5b28,
+9d1b4e7a2c63, 6c1d9e3a7f52 and 8d2f6a4c1e07, for databases deployed without Alembic).
+Idempotent: safe to run on every deploy.
+
+Usage: python scripts/reconcile_sales_summary.py [--dry-run] [--producer-id ID ...]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text, update
+from app.db import base  # noqa: F401  (register all mappers)
+from app.db.session import SessionLocal, engine
+from app.models.order import Order
+from app.models.product import Product
+from app.services.sales_summary import sales_summary
+
+INDEXES = {
+    "ix_orders_created_id": "ON orders (created_at, id)",
+    "ix_orders_status_created": "ON orders (status, created_at, id)",
+    "ix_orders_product_created": "ON orders (product_id, created_at, id)",
+    "ix_orders_producer_created": "ON orders (producer_id, created_at, id)",
+}
+
+
+def backfill_order_producers(conn) -> int:
+    orders = Order.__table__
+    producer = select(Product.producer_id).where(Product.id == orders.c.product_id).scalar_subquery()
+    return conn.execute(
+        update(orders)
+        .where(orders.c.producer_id.is_(None), producer.is_not(None))
+        .values(producer_id=producer)
+    ).rowcount
+
+
+def backfill_order_dates(conn) -> int:
+    orders = Order.__table__
+    return conn.execute(
+        update(orders).where(orders.c.created_at.is_(None)).values(created_at=datetime.utcnow())
+    ).rowcount
+
+
+def ensure_order_keys():
+    if engine.dialect.name != "postgresql":
+        print(f"\n⊗ {engine.dialect.name}: orders keys come from create_all (nothing to do)")
+        return
+
+    with engine.begin() as conn:
+        has_fk = conn.execute(text(
+            "SELECT 1 FROM information_schema.table_constraints "
+            "WHERE table_name = 'orders' AND constraint_name = 'orders_product_id_fkey'"
+        )).scalar()
+        if has_fk:
+            print("\n✓ orders.product_id foreign key present")
+        else:
+            detached = conn.execute(text(
+                "UPDATE orders SET product_id = NULL WHERE product_id IS NOT NULL "
+                "AND NOT EXISTS (SELECT 1 FROM product WHERE product.id = orders.product_id)"
+            )).rowcount
+            conn.execute(text(
+                "ALTER TABLE orders ADD CONSTRAINT orders_product_id_fkey "
+                "FOREIGN KEY (product_id) REFERENCES product (id) ON DELETE SET NULL"
+            ))
+            print(f"\n→ orders.product_id foreign key added ({detached} orders of deleted products detached)")
+
+        conn.execute(text("ALTER TABLE orders ALTER COLUMN created_at SET NOT NULL"))
+        print("✓ orders.created_at NOT NULL")
+
+        for name, definition in INDEXES.items():
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} {definition}"))
+            print(f"✓ Index {name} present")
+
+
+def reconcile(dry_run: bool = False, producer_ids=None):
+    print("=" * 60)
+    print("PRODUCER SALES SUMMARY RECONCILIATION" + (" (DRY RUN)" if dry_run else ""))
+    print("=" * 60)
+
+    if not dry_run:
+        with engine.begin() as conn:
+            filled = backfill_order_producers(conn)
+            dated = backfill_order_dates(conn)
+        print(f"\n✓ orders.producer_id filled for {filled} orders")
+        print(f"✓ orders.created_at filled for {dated} orders")
+        ensure_order_keys()
+
+    db = SessionLocal()
+    try:
+        drifted = sales_summary.reconcile(db, producer_ids=producer_ids, dry_run=dry_run)
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    finally:
+        db.close()
+
+    if not drifted:
+        print("\n✅ All sales summaries match their orders")
+    elif dry_run:
+        print(f"\n⚠️  {len(drifted)} producers with drifted summaries: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+    else:
+        print(f"\n✅ {len(drifted)} producers fixed: {drifted[:20]}{' ...' if len(drifted) > 20 else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the producer sales summary from orders")
+    parser.add_argument("--dry-run", action="store_true", help="Report drifted producers without fixing them")
+    parser.add_argument("--producer-id", type=int, nargs="+", dest="producer_ids", help="Only check these producers")
+    args = parser.parse_args()
+    reconcile(args.dry_run, args.producer_ids)
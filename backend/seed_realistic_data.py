@@ -187,6 +187,7 @@ def seed_realistic_data():
         qty = random.randint(10, 50)
         orders_data.append({
             "product_id": product.id,
+            "producer_id": product.producer_id,
             "product_name": product.name,
             "buyer_name": random.choice(buyer_names),
             "quantity_kg": float(qty),
@@ -201,6 +202,7 @@ def seed_realistic_data():
         qty = random.randint(20, 80)
         orders_data.append({
             "product_id": product.id,
+            "producer_id": product.producer_id,
             "product_name": product.name,
             "buyer_name": random.choice(buyer_names),
             "quantity_kg": float(qty),
@@ -215,6 +217,7 @@ def seed_realistic_data():
         qty = random.randint(15, 60)
         orders_data.append({
             "product_id": product.id,
+            "producer_id": product.producer_id,
             "product_name": product.name,
             "buyer_name": random.choice(buyer_names),
             "quantity_kg": float(qty),
@@ -0,0 +1,122 @@
+import sys
+import os
+
+# Self-contained: in-memory SQLite, no running backend needed
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from app.api import deps
+from app.db.base import Base
+from app.models.producer import ProducerProfile
+from app.models.product import Product
+
+# Live-server scripts (run by hand against a running backend), not pytest modules
+collect_ignore = ["test_advanced_flow.py", "test_auth_changes.py", "test_sourcing_flow.py"]
+
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture(scope="session")
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[deps.get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(deps.get_db, None)
+
+
+@pytest.fixture
+def count_statements(engine):
+    """count_statements() -> context manager collecting the SQL sent to the test database"""
+    @contextmanager
+    def count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return count
+
+
+@pytest.fixture
+def seed_product(client, session_factory):
+    """seed_product() -> (product_id, template_id): a new producer, a 250 USD/kg product and a volume template"""
+    def seed():
+        db = session_factory()
+        producer = ProducerProfile(name="Query Count Producer", location_region="Sava", location_district="Sambava")
+        db.add(producer)
+        db.commit()
+        producer_id = producer.id
+        db.close()
+
+        r = client.post("/api/v1/products/upload", json={
+            "name": "Vanilla Grade A", "price_fob": 250.0, "image_url": "x", "producer_id": producer_id
+        })
+        assert r.status_code == 200, r.text
+        product_id = r.json()["id"]
+
+        r = client.post(f"/api/v1/pricing/producers/{producer_id}/price-templates", json={
+            "name": "Volume", "tiers": [
+                {"min_quantity_kg": 1, "max_quantity_kg": 99, "discount_percent": 0},
+                {"min_quantity_kg": 100, "discount_percent": 10},
+            ]
+        })
+        assert r.status_code == 200, r.text
+        return product_id, r.json()["id"]
+
+    return seed
+
+
+@pytest.fixture
+def order_body():
+    """order_body(product_id, quantity_kg=10, amount=2500) -> POST /orders payload"""
+    def body(product_id, quantity_kg=10, amount=2500):
+        return {"product_id": product_id, "quantity_kg": quantity_kg, "offer_price_total": amount, "buyer_name": "Test Buyer"}
+
+    return body
+
+
+@pytest.fixture
+def stock(session_factory):
+    """stock(product_id) -> quantity_available as stored"""
+    def read(product_id):
+        db = session_factory()
+        try:
+            return db.get(Product, product_id).quantity_available
+        finally:
+            db.close()
+
+    return read
@@ -137,16 +137,61 @@ class ApiClient {
   }
 
   // Sales Dashboard
+  // Orders of the logged-in producer's products, or every order in demo mode
+  String get _salesPath => currentProducerId != null
+      ? '/producers/$currentProducerId/sales'
+      : '/producers/me/sales';
+
   Future<List<dynamic>> getMySales() async {
     try {
-      final response = await _dio.get('/producers/me/sales');
-      return response.data;
+      // Newest page only (keyset pagination: next_cursor for more)
+      final response = await _dio.get(_salesPath, queryParameters: {'limit': 100});
+      return response.data['orders'];
     } catch (e) {
        print("API Error (getMySales): $e");
        return [];
     }
   }
 
+  /// Every order still waiting on the producer (PENDING, SECURED), however old:
+  /// one status at a time, following next_cursor to the last page
+  Future<List<dynamic>> getMyInbox() async {
+    final orders = <dynamic>[];
+    try {
+      for (final status in ['PENDING', 'SECURED']) {
+        String? cursor;
+        do {
+          final response = await _dio.get(_salesPath, queryParameters: {
+            'status': status,
+            'limit': 100,
+            if (cursor != null) 'cursor': cursor,
+          });
+          orders.addAll(response.data['orders']);
+          cursor = response.data['next_cursor'];
+        } while (cursor != null);
+      }
+    } catch (e) {
+      print("API Error (getMyInbox): $e");
+    }
+    // Newest first, both statuses mixed
+    orders.sort((a, b) => (b['created_at'] ?? '').compareTo(a['created_at'] ?? ''));
+    return orders;
+  }
+
+  /// Sales totals by status / month / product of the logged-in producer
+  Future<Map<String, dynamic>?> getMySalesSummary() async {
+    final id = currentProducerId;
+    if (id == null) return null;
+
+    try {
+      final response = await _dio.get('/producers/$id/sales/summary');
+      return response.data;
+    } catch (e) {
+      print("API Error (getMySalesSummary): $e");
+      return null;
+    }
+  }
+
   // Sales Actions
   Future<void> acceptOrder(int orderId) async {
     try {
@@ -194,6 +239,19 @@ class ApiClient {
     }
   }
 
+  /// Price curve over a quantity range (one call for a whole slider)
+  Future<Map<String, dynamic>?> getPriceCurve(int productId, double fromKg, double toKg, {double step = 1.0}) async {
+    try {
+      final response = await _dio.get('/pricing/products/$productId/price-curve',
+        queryParameters: {'from': fromKg, 'to': toKg, 'step': step}
+      );
+      return response.data;
+    } catch (e) {
+      print("API Error (getPriceCurve): $e");
+      return null;
+    }
+  }
+
   /// Set price tiers for a product (Producer side)
   Future<List<dynamic>?> setProductPriceTiers(int productId, List<Map<String, dynamic>> tiers) async {
     try {
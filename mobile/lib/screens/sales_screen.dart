@@ -14,6 +14,8 @@ class SalesScreen extends StatefulWidget {
 
 class _SalesScreenState extends State<SalesScreen> with SingleTickerProviderStateMixin {
   List<dynamic> _orders = [];
+  List<dynamic> _inbox = [];
+  Map<String, dynamic>? _summary;
   bool _loading = true;
   late TabController _tabController;
 
@@ -26,9 +28,15 @@ class _SalesScreenState extends State<SalesScreen> with SingleTickerProviderStat
 
   Future<void> _fetchSales() async {
     try {
-      final orders = await widget.apiClient.getMySales();
+      final results = await Future.wait([
+        widget.apiClient.getMySales(),
+        widget.apiClient.getMySalesSummary(),
+        widget.apiClient.getMyInbox(),
+      ]);
       setState(() {
-        _orders = orders;
+        _orders = results[0] as List<dynamic>;
+        _summary = results[1] as Map<String, dynamic>?;
+        _inbox = results[2] as List<dynamic>;
         _loading = false;
       });
     } catch (e) {
@@ -43,8 +51,8 @@ class _SalesScreenState extends State<SalesScreen> with SingleTickerProviderStat
 
   @override
   Widget build(BuildContext context) {
-    // Split orders
-    final pendingOrders = _orders.where((o) => ['PENDING', 'SECURED'].contains(o['status'])).toList();
+    // Inbox: every waiting order (own query); history: newest page of the others
+    final pendingOrders = _inbox;
     final historyOrders = _orders.where((o) => !['PENDING', 'SECURED'].contains(o['status'])).toList();
 
     return Scaffold(
@@ -77,16 +85,59 @@ class _SalesScreenState extends State<SalesScreen> with SingleTickerProviderStat
       ),
       body: _loading
           ? const Center(child: CircularProgressIndicator())
-          : TabBarView(
-              controller: _tabController,
+          : Column(
               children: [
-                _buildInboxList(pendingOrders),
-                _buildHistoryList(historyOrders),
+                if (_summary != null) _buildSummaryHeader(_summary!),
+                Expanded(
+                  child: TabBarView(
+                    controller: _tabController,
+                    children: [
+                      _buildInboxList(pendingOrders),
+                      _buildHistoryList(historyOrders),
+                    ],
+                  ),
+                ),
               ],
             ),
     );
   }
 
+  Widget _buildSummaryHeader(Map<String, dynamic> summary) {
+    final totals = summary['totals'] ?? {};
+    final byStatus = {
+      for (final row in (summary['by_status'] as List<dynamic>? ?? [])) row['status']: row['order_count']
+    };
+    final months = summary['by_month'] as List<dynamic>? ?? [];
+    final thisMonth = months.isNotEmpty ? months.first : null;
+
+    return Container(
+      color: Colors.white,
+      padding: const EdgeInsets.fromLTRB(16, 12, 16, 12),
+      child: Row(
+        mainAxisAlignment: MainAxisAlignment.spaceAround,
+        children: [
+          _buildSummaryTile("Total Sales", "\$${(totals['amount'] ?? 0).toStringAsFixed(0)}"),
+          _buildSummaryTile(
+            thisMonth != null ? thisMonth['month'] : "This Month",
+            "\$${(thisMonth?['amount'] ?? 0).toStringAsFixed(0)}",
+          ),
+          _buildSummaryTile("Volume", "${(totals['quantity_kg'] ?? 0).toStringAsFixed(0)} kg"),
+          _buildSummaryTile("Confirmed", "${byStatus['CONFIRMED'] ?? 0}"),
+        ],
+      ),
+    );
+  }
+
+  Widget _buildSummaryTile(String label, String value) {
+    return Column(
+      children: [
+        Text(value, style: const TextStyle(fontWeight: FontWeight.bold, fontSize: 16, color: Color(0xFF1B5E20))),
+        const SizedBox(height: 2),
+        Text(label, style: TextStyle(color: Colors.grey[600], fontSize: 11)),
+      ],
+    );
+  }
+
   Widget _buildInboxList(List<dynamic> orders) {
     if (orders.isEmpty) {
       return Center(
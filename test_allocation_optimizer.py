@@ -0,0 +1,105 @@
+import random
+
+from app.services.allocation_optimizer import (
+    COST_TOLERANCE, GRID_UNITS, OfferCandidate, allocation_optimizer, price_segments
+)
+
+RANDOM_CASES = 300
+
+
+def random_candidates(rng, count):
+    candidates = []
+    for offer_id in range(1, count + 1):
+        volume = rng.randint(1, 40)
+        price = rng.randint(180, 320)
+        tiers = None
+        if rng.random() < 0.6:
+            # Decreasing tiers, MOQ sometimes above the offered volume
+            tiers, tier_price = [], price + rng.randint(0, 40)
+            for min_kg in sorted(rng.sample(range(1, 50), rng.randint(1, 3))):
+                tiers.append({"min_quantity_kg": min_kg, "price_per_kg": tier_price})
+                tier_price -= rng.randint(1, 30)
+        candidates.append(OfferCandidate(offer_id, offer_id, volume, price, rng.choice([None, 3.5, 4.8]), tiers))
+    return candidates
+
+
+def exhaustive(candidates, volume_kg):
+    """
+    Reference: exact DP over (volume, cost), each offer taken at 0 or at every volume of
+    each of its segments. Returns (max reachable volume, min cost at that volume).
+    """
+    units = int(volume_kg)
+    best = {0: 0.0}
+    for candidate in candidates:
+        options = [
+            (taken, taken * segment.price_per_kg)
+            for segment in price_segments(candidate, 1.0, units)
+            for taken in range(segment.lo, segment.hi + 1)
+        ]
+        new = dict(best)
+        for k, cost in best.items():
+            for taken, extra in options:
+                if k + taken <= units and cost + extra < new.get(k + taken, float("inf")):
+                    new[k + taken] = cost + extra
+        best = new
+    k = max(best)
+    return k, best[k]
+
+
+def assert_consistent(candidates, result):
+    by_id = {candidate.offer_id: candidate for candidate in candidates}
+    seen = set()
+    for line in result["allocations"]:
+        assert line["offer_id"] not in seen, result
+        seen.add(line["offer_id"])
+        candidate = by_id[line["offer_id"]]
+        segments = price_segments(candidate, 1.0, GRID_UNITS)
+        assert any(s.lo <= line["volume_kg"] <= s.hi and round(s.price_per_kg, 2) == line["price_per_kg"]
+                   for s in segments), (line, segments)
+    assert abs(sum(line["volume_kg"] for line in result["allocations"]) - result["allocated_kg"]) < 1e-6, result
+
+
+def test_optimizer_matches_exhaustive_dp():
+    rng = random.Random(17)
+    pruned = 0
+    for case in range(RANDOM_CASES):
+        candidates = random_candidates(rng, rng.randint(1, 6))
+        volume = rng.randint(1, 120)
+        result = allocation_optimizer.optimize(candidates, volume)
+        expected_kg, expected_cost = exhaustive(candidates, volume)
+
+        assert_consistent(candidates, result)
+        assert result["allocated_kg"] == expected_kg, (case, result, expected_kg)
+        assert abs(result["total_usd"] - round(expected_cost, 2)) <= 0.01 + COST_TOLERANCE * expected_cost, \
+            (case, candidates, volume, result, expected_cost)
+        assert result["shortfall_kg"] == volume - expected_kg, result
+        pruned += result["dp_offer_count"] < result["candidate_count"]
+    # Pruned cases are the ones where the bound must stay exact
+    assert pruned > 0
+
+
+def test_single_offer_without_partial():
+    rng = random.Random(42)
+    for _ in range(100):
+        candidates = random_candidates(rng, rng.randint(1, 6))
+        volume = rng.randint(1, 40)
+        result = allocation_optimizer.optimize(candidates, volume, accepts_partial=False)
+        costs = [
+            volume * segment.price_per_kg
+            for candidate in candidates
+            for segment in price_segments(candidate, 1.0, volume) if segment.lo <= volume <= segment.hi
+        ]
+        if not costs:
+            assert result["allocations"] == [] and result["shortfall_kg"] == volume, result
+        else:
+            assert len(result["allocations"]) == 1 and result["allocated_kg"] == volume, result
+            assert abs(result["total_usd"] - round(min(costs), 2)) <= 0.01, (result, min(costs))
+
+
+def test_coarse_grid_above_grid_units():
+    # Above GRID_UNITS kg the grid step grows: allocations stay on the grid
+    candidates = [OfferCandidate(i, i, 900.0 + 100 * i, 250.0 - i, 4.0, None) for i in range(1, 4)]
+    result = allocation_optimizer.optimize(candidates, 2500.0)
+    assert result["grid_step_kg"] == 2.5 and result["allocated_kg"] == 2500.0, result
+    allocated = [(line["offer_id"], line["volume_kg"]) for line in result["allocations"]]
+    assert allocated == [(3, 1200.0), (2, 1100.0), (1, 200.0)], result
@@ -0,0 +1,133 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api import idempotency as idempotency_module
+from app.api.idempotency import REPLAYED_HEADER, idempotency
+from app.models.idempotency import IdempotencyKey
+from app.models.order import Order
+from app.schemas.order import OrderCreate
+
+
+@pytest.fixture(autouse=True)
+def key_sessions(monkeypatch, session_factory):
+    # Key reservations and releases open their own sessions (SessionLocal): same test database
+    monkeypatch.setattr(idempotency_module, "SessionLocal", session_factory)
+
+
+@pytest.fixture
+def order_count(session_factory):
+    def count(product_id):
+        db = session_factory()
+        try:
+            return db.scalar(select(func.count(Order.id)).where(Order.product_id == product_id))
+        finally:
+            db.close()
+
+    return count
+
+
+def test_idempotent_replay(client, seed_product, order_body, order_count, stock):
+    product_id, _ = seed_product()
+    initial_stock = stock(product_id)
+    headers = {"Idempotency-Key": "replay-1"}
+
+    first = client.post("/api/v1/orders/", json=order_body(product_id), headers=headers)
+    assert first.status_code == 200, first.text
+    assert REPLAYED_HEADER.lower() not in first.headers
+
+    replay = client.post("/api/v1/orders/", json=order_body(product_id), headers=headers)
+    assert replay.status_code == 200 and replay.json() == first.json(), replay.text
+    assert replay.headers.get(REPLAYED_HEADER) == "true"
+
+    # Process cache lost (other worker, restart): the stored response is replayed
+    idempotency.cache._entries.clear()
+    replay = client.post("/api/v1/orders/", json=order_body(product_id), headers=headers)
+    assert replay.json() == first.json() and replay.headers.get(REPLAYED_HEADER) == "true", replay.text
+
+    assert order_count(product_id) == 1
+    assert stock(product_id) == initial_stock - 10
+
+    # Without a key, every request creates an order
+    assert client.post("/api/v1/orders/", json=order_body(product_id)).json()["id"] != first.json()["id"]
+    assert order_count(product_id) == 2
+
+
+def test_idempotency_key_mismatch_and_errors(client, session_factory, seed_product, order_body, order_count):
+    product_id, _ = seed_product()
+    headers = {"Idempotency-Key": "mismatch-1"}
+    assert client.post("/api/v1/orders/", json=order_body(product_id), headers=headers).status_code == 200
+
+    r = client.post("/api/v1/orders/", json=order_body(product_id, quantity_kg=5), headers=headers)
+    assert r.status_code == 422, r.text
+    idempotency.cache._entries.clear()
+    r = client.post("/api/v1/orders/", json=order_body(product_id, quantity_kg=5), headers=headers)
+    assert r.status_code == 422, r.text
+    assert order_count(product_id) == 1
+
+    # Errors are not stored: the key is released and the request can be retried
+    headers = {"Idempotency-Key": "error-1"}
+    r = client.post("/api/v1/orders/", json=order_body(product_id, quantity_kg=10 ** 6), headers=headers)
+    assert r.status_code == 400, r.text
+    db = session_factory()
+    assert db.get(IdempotencyKey, ("orders.create", "error-1")) is None
+    db.close()
+    r = client.post("/api/v1/orders/", json=order_body(product_id), headers=headers)
+    assert r.status_code == 200 and REPLAYED_HEADER.lower() not in r.headers, r.text
+
+    r = client.post("/api/v1/orders/", json=order_body(product_id), headers={"Idempotency-Key": "k" * 256})
+    assert r.status_code == 400, r.text
+
+
+def test_concurrent_duplicates_coalesced(client, seed_product, order_body, order_count, stock):
+    product_id, _ = seed_product()
+    initial_stock = stock(product_id)
+    results = []
+
+    def place():
+        r = client.post("/api/v1/orders/", json=order_body(product_id), headers={"Idempotency-Key": "burst-1"})
+        results.append((r.status_code, r.json()["id"]))
+
+    threads = [threading.Thread(target=place) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8 and {status for status, _ in results} == {200}, results
+    assert len({order_id for _, order_id in results}) == 1, results
+    assert order_count(product_id) == 1
+    assert stock(product_id) == initial_stock - 10
+
+
+def test_duplicate_in_progress_elsewhere(client, session_factory, seed_product, order_body, order_count):
+    product_id, _ = seed_product()
+    body = order_body(product_id)
+    fingerprint = idempotency_module.request_fingerprint(OrderCreate(**body))
+    now = idempotency_module._utcnow()
+    db = session_factory()
+    # Reservation abandoned by a stopped worker, and one still in progress
+    db.add(IdempotencyKey(
+        scope="orders.create", key="stale-1", fingerprint=fingerprint, state="PENDING",
+        locked_until=now - timedelta(seconds=1), expires_at=now + idempotency_module.RESPONSE_TTL
+    ))
+    db.add(IdempotencyKey(
+        scope="orders.create", key="busy-1", fingerprint=fingerprint, state="PENDING",
+        locked_until=now + idempotency_module.RESPONSE_TTL, expires_at=now + idempotency_module.RESPONSE_TTL
+    ))
+    db.commit()
+    db.close()
+
+    r = client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": "stale-1"})
+    assert r.status_code == 200 and REPLAYED_HEADER.lower() not in r.headers, r.text
+
+    wait_seconds = idempotency_module.WAIT_SECONDS
+    idempotency_module.WAIT_SECONDS = 0.3
+    try:
+        r = client.post("/api/v1/orders/", json=body, headers={"Idempotency-Key": "busy-1"})
+    finally:
+        idempotency_module.WAIT_SECONDS = wait_seconds
+    assert r.status_code == 409 and r.headers.get("Retry-After") == "1", r.text
+    assert order_count(product_id) == 1
@@ -0,0 +1,26 @@
+from sqlalchemy import func, select
+
+from app.models.outbox import OutboxEvent
+from app.models.producer import TraceabilityEvent
+from app.services.outbox import outbox
+
+
+def test_trace_events_of_deleted_products_are_dropped(client, session_factory, seed_product, order_body):
+    kept, _ = seed_product()
+    deleted, _ = seed_product()
+    assert client.post("/api/v1/orders/", json=order_body(kept)).status_code == 200
+    assert client.post("/api/v1/orders/", json=order_body(deleted)).status_code == 200
+    # Deleted before the dispatcher ran: its queued DEAL event has no product left
+    assert client.delete(f"/api/v1/products/{deleted}").status_code == 200
+
+    db = session_factory()
+    try:
+        while outbox.drain(db):
+            pass
+        assert db.scalar(select(func.count(OutboxEvent.id))) == 0
+        deals = db.scalars(select(TraceabilityEvent.product_id).where(
+            TraceabilityEvent.stage == "DEAL", TraceabilityEvent.product_id.in_([kept, deleted])
+        )).all()
+        assert deals == [kept], deals
+    finally:
+        db.close()
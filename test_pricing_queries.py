@@ -0,0 +1,180 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.pricing import PriceTierHistory
+from app.models.product import Product
+from app.services.pricing_engine import pricing_engine
+
+MAX_READ_STATEMENTS = 2
+
+
+@pytest.fixture
+def assert_read_statements(client, count_statements):
+    def check(label, url):
+        pricing_engine.clear()
+        with count_statements() as statements:
+            r = client.get(url)
+        assert r.status_code == 200, r.text
+        assert len(statements) <= MAX_READ_STATEMENTS, f"{label}: {len(statements)} statements\n" + "\n".join(statements)
+        return r.json()
+
+    return check
+
+
+def test_pricing_read_queries(client, count_statements, seed_product, assert_read_statements):
+    product_id, template_id = seed_product()
+
+    # Mode TIERED puis TEMPLATE: les deux relations doivent être chargées d'avance
+    r = client.post(f"/api/v1/pricing/products/{product_id}/price-tiers", json={"tiers": [
+        {"min_quantity_kg": 1, "max_quantity_kg": 49, "price_per_kg": 250},
+        {"min_quantity_kg": 50, "price_per_kg": 230},
+    ]})
+    assert r.status_code == 200, r.text
+
+    tiers = assert_read_statements("price-tiers (TIERED)", f"/api/v1/pricing/products/{product_id}/price-tiers")
+    assert [t["price_per_kg"] for t in tiers["tiers"]] == [250, 230]
+
+    pricing_engine.clear()
+    with count_statements() as statements:
+        r = client.put(f"/api/v1/pricing/products/{product_id}/pricing-mode",
+                       json={"mode": "TEMPLATE", "template_id": template_id})
+    assert r.status_code == 200, r.text
+    assert [t["price_per_kg"] for t in r.json()["effective_tiers"]] == [250.0, 225.0]
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) <= MAX_READ_STATEMENTS, f"pricing-mode: {len(selects)} SELECTs\n" + "\n".join(selects)
+
+    tiers = assert_read_statements("price-tiers (TEMPLATE)", f"/api/v1/pricing/products/{product_id}/price-tiers")
+    assert tiers["template_id"] == template_id
+
+    quote = assert_read_statements("calculate-price", f"/api/v1/pricing/products/{product_id}/calculate-price?quantity_kg=150")
+    assert quote["price_per_kg"] == 225.0
+
+    # Cache chaud: seule la pricing_version est lue
+    with count_statements() as statements:
+        client.get(f"/api/v1/pricing/products/{product_id}/calculate-price?quantity_kg=150")
+    assert len(statements) == 1 and "pricing_version" in statements[0], statements
+
+    assert_read_statements("price-history", f"/api/v1/pricing/products/{product_id}/price-history")
+
+
+def test_pricing_etag(client, count_statements, session_factory, seed_product):
+    product_id, template_id = seed_product()
+    urls = [
+        f"/api/v1/pricing/products/{product_id}/price-tiers",
+        f"/api/v1/pricing/products/{product_id}/calculate-price?quantity_kg=150",
+        f"/api/v1/pricing/products/{product_id}/price-history",
+    ]
+
+    etags = {}
+    for url in urls:
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+        etags[url] = r.headers["etag"]
+
+        # Même version: 304 sur la seule lecture de pricing_version
+        with count_statements() as statements:
+            r = client.get(url, headers={"If-None-Match": etags[url]})
+        assert r.status_code == 304, r.status_code
+        assert len(statements) == 1 and "pricing_version" in statements[0], statements
+
+    # Une écriture de prix change l'ETag
+    r = client.put(f"/api/v1/products/{product_id}", json={"price_fob": 240.0})
+    assert r.status_code == 200, r.text
+    for url in urls:
+        r = client.get(url, headers={"If-None-Match": etags[url]})
+        assert r.status_code == 200, r.status_code
+        assert r.headers["etag"] != etags[url]
+        etags[url] = r.headers["etag"]
+
+    # Une modification du template aussi, pour tous les produits liés
+    client.put(f"/api/v1/pricing/products/{product_id}/pricing-mode", json={"mode": "TEMPLATE", "template_id": template_id})
+    tiers_url = urls[0]
+    etag = client.get(tiers_url).headers["etag"]
+    r = client.put(f"/api/v1/pricing/price-templates/{template_id}", json={"tiers": [
+        {"min_quantity_kg": 1, "discount_percent": 0},
+        {"min_quantity_kg": 20, "discount_percent": 5},
+    ]})
+    assert r.status_code == 200, r.text
+    r = client.get(tiers_url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+    assert [t["price_per_kg"] for t in r.json()["tiers"]] == [240.0, 228.0]
+
+    # Écriture hors de ce process (script, autre worker): le cache ne l'a pas vue,
+    # l'ETag suit quand même la version en base
+    etag = client.get(tiers_url).headers["etag"]
+    db = session_factory()
+    db.execute(Product.__table__.update().where(Product.__table__.c.id == product_id).values(
+        pricing_version=Product.__table__.c.pricing_version + 1
+    ))
+    db.commit()
+    db.close()
+    r = client.get(tiers_url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["etag"] != etag
+
+
+def test_pricing_cache_versions(client, session_factory, seed_product):
+    product_id, _ = seed_product()
+    url = f"/api/v1/pricing/products/{product_id}/calculate-price?quantity_kg=150"
+    assert client.get(url).json()["price_per_kg"] == 250.0
+
+    # Écriture hors de ce process (import CLI, seed, autre worker): aucune invalidation locale
+    db = session_factory()
+    products = Product.__table__
+    db.execute(products.update().where(products.c.id == product_id).values(
+        price_fob=200.0, pricing_version=products.c.pricing_version + 1
+    ))
+    db.commit()
+    db.close()
+    assert client.get(url).json()["price_per_kg"] == 200.0
+
+    # Chargement lent terminé après une écriture: la grille plus ancienne ne remplace pas la récente
+    db = session_factory()
+    current = pricing_engine.get(db, product_id)
+    stale = pricing_engine._load(db, [product_id])[0]
+    stale.version = current.version - 1
+    pricing_engine._store(stale)
+    assert pricing_engine.get(db, product_id) is current
+    db.close()
+
+
+def test_batch_quote_rejects_non_finite_quantity(client, seed_product):
+    product_id, _ = seed_product()
+    for quantity in ("NaN", "Infinity", -1):
+        r = client.post("/api/v1/pricing/quotes", content=f'{{"items": [{{"product_id": {product_id}, "quantity_kg": {quantity}}}]}}',
+                        headers={"Content-Type": "application/json"})
+        assert r.status_code == 422, (quantity, r.status_code, r.text)
+    r = client.post("/api/v1/pricing/quotes", json={"items": [{"product_id": product_id, "quantity_kg": 150}]})
+    assert r.status_code == 200 and r.json()["quotes"][0]["total"] == 37500.0, r.text
+
+
+def test_price_curve_rejects_non_finite_range(client, seed_product):
+    product_id, _ = seed_product()
+    url = f"/api/v1/pricing/products/{product_id}/price-curve"
+    for params in ({"from": 1, "to": "inf"}, {"from": "inf", "to": "inf"}, {"from": 1, "to": 10, "step": "inf"},
+                   {"from": 1, "to": 10, "step": 1e-320}):
+        r = client.get(url, params=params)
+        assert r.status_code == 400, (params, r.status_code, r.text)
+    r = client.get(url, params={"from": 1, "to": "nan"})
+    assert r.status_code == 422, r.text
+    r = client.get(url, params={"from": 1, "to": 10, "step": 3})
+    assert r.status_code == 200 and r.json()["quantities"] == [1.0, 4.0, 7.0, 10.0], r.text
+
+
+def test_price_compare_skips_zero_base_price(client, session_factory, seed_product):
+    priced, _ = seed_product()
+    free, _ = seed_product()
+    db = session_factory()
+    for product_id, base_price in ((priced, 200.0), (free, 0.0)):
+        db.add(PriceTierHistory(product_id=product_id, pricing_mode="SINGLE", base_price_fob=base_price,
+                                changed_at=datetime(2001, 1, 1, tzinfo=timezone.utc)))
+    db.commit()
+    db.close()
+
+    r = client.post("/api/v1/pricing/price-history/compare", json={"product_ids": [priced, free], "from_date": "2001-06-01T00:00:00Z"})
+    assert r.status_code == 200, r.text
+    assert [c["price_change_percent"] for c in r.json()["comparisons"]] == [25.0], r.text
+    assert r.json()["missing_product_ids"] == [free], r.text
+
+    r = client.get(f"/api/v1/pricing/products/{free}/price-history/compare", params={"from_date": "2001-06-01T00:00:00Z"})
+    assert r.status_code == 404, r.text
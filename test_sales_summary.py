@@ -0,0 +1,155 @@
+import pytest
+
+from app.models.order import Order
+from app.models.product import Product
+from app.models.sales_summary import ProducerSalesSummary
+from app.services.sales_summary import DELETED_PRODUCT_ID, sales_summary
+
+
+@pytest.fixture
+def place_order(client, order_body):
+    def place(product_id, quantity_kg, amount):
+        r = client.post("/api/v1/orders/", json=order_body(product_id, quantity_kg, amount))
+        assert r.status_code == 200, r.text
+        return r.json()["id"]
+
+    return place
+
+
+@pytest.fixture
+def producer_products(session_factory, seed_product):
+    """(producer_id, vanilla_id, clove_id): one producer with two products"""
+    product_id, _ = seed_product()
+    db = session_factory()
+    producer_id = db.get(Product, product_id).producer_id
+    second = Product(
+        name="Clove", price_fob=12.0, quantity_available=500, producer_id=producer_id,
+        image_url_raw="x", image_url_ai="x"
+    )
+    db.add(second)
+    db.commit()
+    second_id = second.id
+    db.close()
+    return producer_id, product_id, second_id
+
+
+@pytest.fixture
+def summary(client):
+    def read(producer_id):
+        r = client.get(f"/api/v1/producers/{producer_id}/sales/summary")
+        assert r.status_code == 200, r.text
+        return r.json()
+
+    return read
+
+
+@pytest.fixture
+def reconcile(session_factory):
+    def run(producer_id, dry_run=False):
+        db = session_factory()
+        try:
+            drifted = sales_summary.reconcile(db, producer_ids=[producer_id], dry_run=dry_run)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            return drifted
+        finally:
+            db.close()
+
+    return run
+
+
+def by_status(data):
+    return {row["status"]: (row["order_count"], row["quantity_kg"], row["amount"]) for row in data["by_status"]}
+
+
+def test_summary_deltas(client, session_factory, producer_products, place_order, summary, reconcile):
+    producer_id, vanilla, clove = producer_products
+    first = place_order(vanilla, 10, 2500)
+    second = place_order(clove, 20, 200)
+    third = place_order(vanilla, 5, 1300)
+
+    data = summary(producer_id)
+    assert by_status(data) == {"PENDING": (3, 35.0, 4000.0)}, data
+    assert data["totals"] == {"order_count": 3, "quantity_kg": 35.0, "amount": 4000.0}, data
+
+    assert client.post(f"/api/v1/orders/{first}/accept").status_code == 200
+    assert client.post(f"/api/v1/orders/{third}/reject").status_code == 200
+    # Accepting twice moves nothing
+    assert client.post(f"/api/v1/orders/{first}/accept").status_code == 200
+
+    data = summary(producer_id)
+    assert by_status(data) == {
+        "CONFIRMED": (1, 10.0, 2500.0), "PENDING": (1, 20.0, 200.0), "REJECTED": (1, 5.0, 1300.0)
+    }, data
+    # Rejected orders stay out of the sales totals, months and products
+    assert data["totals"] == {"order_count": 2, "quantity_kg": 30.0, "amount": 2700.0}, data
+    assert [(p["product_id"], p["amount"]) for p in data["by_product"]] == [(vanilla, 2500.0), (clove, 200.0)], data
+    assert sum(month["order_count"] for month in data["by_month"]) == 2, data
+
+    # A stale order object (status read before a concurrent transition) is not counted twice
+    db = session_factory()
+    order = db.get(Order, second)
+    db.execute(Order.__table__.update().where(Order.__table__.c.id == second).values(status="CONFIRMED"))
+    assert sales_summary.set_order_status(db, order, "CONFIRMED") == "CONFIRMED"
+    db.rollback()
+    db.close()
+
+    assert reconcile(producer_id) == []
+    assert client.get("/api/v1/producers/999999/sales/summary").status_code == 404
+
+
+def test_product_delete_keeps_sales(client, producer_products, place_order, summary, reconcile):
+    producer_id, vanilla, clove = producer_products
+    place_order(vanilla, 10, 2500)
+    clove_order = place_order(clove, 20, 200)
+    before = summary(producer_id)
+    listed = client.get(f"/api/v1/producers/{producer_id}/sales").json()["orders"]
+
+    assert client.delete(f"/api/v1/products/{clove}").status_code == 200
+
+    data = summary(producer_id)
+    assert data["totals"] == before["totals"] and data["by_status"] == before["by_status"], (data, before)
+    assert [(p["product_id"], p["product_name"]) for p in data["by_product"]] == [
+        (vanilla, "Vanilla Grade A"), (DELETED_PRODUCT_ID, None)
+    ], data
+    after = client.get(f"/api/v1/producers/{producer_id}/sales").json()["orders"]
+    assert [o["id"] for o in after] == [o["id"] for o in listed], after
+    assert reconcile(producer_id) == []
+
+    # The deleted product's orders still move their summary row
+    assert client.post(f"/api/v1/orders/{clove_order}/reject").status_code == 200
+    assert by_status(summary(producer_id))["REJECTED"] == (1, 20.0, 200.0)
+    assert reconcile(producer_id) == []
+
+
+def test_reconcile_repairs_drift(client, session_factory, producer_products, place_order, summary, reconcile):
+    producer_id, vanilla, clove = producer_products
+    place_order(vanilla, 10, 2500)
+    accepted = place_order(clove, 20, 200)
+    assert client.post(f"/api/v1/orders/{accepted}/accept").status_code == 200
+    expected = summary(producer_id)
+
+    # Lost rows, a wrong amount and a stale zero row
+    db = session_factory()
+    table = ProducerSalesSummary.__table__
+    db.execute(table.delete().where(table.c.producer_id == producer_id, table.c.product_id == vanilla))
+    db.execute(table.update().where(table.c.producer_id == producer_id).values(amount=table.c.amount + 1))
+    db.execute(table.insert().values(
+        producer_id=producer_id, product_id=clove, month="2001-01", status="PENDING",
+        order_count=0, quantity_kg=0.0, amount=0.0
+    ))
+    db.commit()
+    db.close()
+    assert summary(producer_id) != expected
+
+    assert reconcile(producer_id, dry_run=True) == [producer_id]
+    assert summary(producer_id) != expected
+    assert reconcile(producer_id) == [producer_id]
+    assert summary(producer_id) == expected
+    assert reconcile(producer_id) == []
+
+    db = session_factory()
+    assert db.query(ProducerSalesSummary).filter_by(producer_id=producer_id, month="2001-01").count() == 0
+    db.close()
@@ -0,0 +1,43 @@
+import pytest
+
+from app.api.v1.endpoints.sourcing import get_producers_effective_tiers
+from app.models.pricing import PriceTierTemplate
+from app.models.product import Product
+
+
+@pytest.fixture
+def turmeric_producer(session_factory, seed_product):
+    """(producer_id, turmeric_id): a producer with a default template and a published product outside the type vocabulary"""
+    vanilla_id, template_id = seed_product()
+    db = session_factory()
+    vanilla = db.get(Product, vanilla_id)
+    vanilla.status = "PUBLISHED"
+    db.get(PriceTierTemplate, template_id).is_default = True
+    turmeric = Product(
+        name="Turmeric Powder", price_fob=40.0, quantity_available=500, producer_id=vanilla.producer_id,
+        status="PUBLISHED", pricing_mode="SINGLE", image_url_raw="x", image_url_ai="x"
+    )
+    db.add(turmeric)
+    db.commit()
+    ids = vanilla.producer_id, turmeric.id
+    db.close()
+    return ids
+
+
+def test_unknown_type_matches_product_name(client, session_factory, turmeric_producer):
+    producer_id, turmeric_id = turmeric_producer
+    r = client.post("/api/v1/requests/", json={
+        "product_type": "Turmeric", "volume_target_kg": 50, "price_target_usd": 45, "grade_target": "A", "buyer_id": 1
+    })
+    assert r.status_code == 200, r.text
+    request_id = r.json()["id"]
+
+    # No canonical type for "Turmeric": the producer's product is found by name, not the 250 USD default template
+    r = client.get(f"/api/v1/requests/{request_id}/suggested-price", params={"producer_id": producer_id})
+    assert r.status_code == 200, r.text
+    assert r.json()["matching_product_id"] == turmeric_id and r.json()["suggested_price_per_kg"] == 40.0, r.json()
+
+    db = session_factory()
+    tiers = get_producers_effective_tiers([producer_id], "turmeric", db)
+    db.close()
+    assert [t["price_per_kg"] for t in tiers[producer_id]] == [40.0], tiers
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.order import Order
+from app.models.product import Product
+from app.services.stock_reservation import reserved_units, stock_reservation
+
+
+@pytest.fixture
+def set_stock(session_factory):
+    def write(product_id, quantity):
+        db = session_factory()
+        db.get(Product, product_id).quantity_available = quantity
+        db.commit()
+        db.close()
+
+    return write
+
+
+def test_conditional_reserve(client, seed_product, order_body, set_stock, stock):
+    product_id, _ = seed_product()
+    set_stock(product_id, 30)
+
+    r = client.post("/api/v1/orders/", json=order_body(product_id, 10.5))
+    assert r.status_code == 200, r.text
+    assert stock(product_id) == 19  # rounded up to the next kg
+
+    # More than the stock: refused, stock untouched
+    r = client.post("/api/v1/orders/", json=order_body(product_id, 20))
+    assert r.status_code == 400, r.text
+    assert stock(product_id) == 19
+
+    # Exactly the stock: accepted
+    r = client.post("/api/v1/orders/", json=order_body(product_id, 19))
+    assert r.status_code == 200, r.text
+    assert stock(product_id) == 0
+
+    assert client.post("/api/v1/orders/", json=order_body(product_id, 1)).status_code == 400
+    assert client.post("/api/v1/orders/", json=order_body(10 ** 6, 1)).status_code == 404
+    assert client.post("/api/v1/orders/", json=order_body(product_id, -5)).status_code == 400
+    assert [reserved_units(q) for q in (None, 0, -1, 0.2, 1, 10.5)] == [0, 0, 0, 1, 1, 11]
+
+
+def test_reject_refunds_once(client, session_factory, seed_product, order_body, set_stock, stock):
+    product_id, _ = seed_product()
+    set_stock(product_id, 50)
+    order = client.post("/api/v1/orders/", json=order_body(product_id, 12.5)).json()
+    assert stock(product_id) == 37
+    db = session_factory()
+    assert db.get(Order, order["id"]).reserved_units == 13
+    db.close()
+
+    r = client.post(f"/api/v1/orders/{order['id']}/reject")
+    assert r.status_code == 200 and r.json()["status"] == "REJECTED", r.text
+    assert stock(product_id) == 50
+
+    # A second reject does not refund twice
+    assert client.post(f"/api/v1/orders/{order['id']}/reject").status_code == 400
+    assert stock(product_id) == 50
+
+    db = session_factory()
+    assert stock_reservation.release(db, 10 ** 6, 5) is None  # deleted product
+    db.rollback()
+    db.close()
+
+
+def test_reject_refunds_pre_existing_orders(client, session_factory, seed_product, set_stock, stock):
+    # Orders placed before reserved_units took int(quantity_kg) from stock: the same is given back
+    product_id, _ = seed_product()
+    set_stock(product_id, 38)
+    db = session_factory()
+    order = Order(product_id=product_id, product_name="Vanilla Grade A", amount=2500, quantity_kg=12.5,
+                  status="PENDING", buyer_name="Legacy Buyer")
+    db.add(order)
+    db.commit()
+    order_id = order.id
+    db.close()
+
+    assert client.post(f"/api/v1/orders/{order_id}/reject").status_code == 200
+    assert stock(product_id) == 50
+
+
+def test_concurrent_reservations_never_oversell():
+    # Separate connections (SQLite file): concurrent UPDATEs see the current row
+    path = os.path.join(tempfile.mkdtemp(), "stock.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    product = Product(name="Vanilla Grade A", price_fob=250.0, quantity_available=50)
+    db.add(product)
+    db.commit()
+    product_id = product.id
+    db.close()
+
+    results = []
+    barrier = threading.Barrier(12)
+
+    def reserve():
+        session = Session()
+        try:
+            barrier.wait()
+            reserved = stock_reservation.reserve(session, product_id, 10)
+            session.commit()
+            results.append(reserved is not None)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=reserve) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = Session()
+    remaining = db.get(Product, product_id).quantity_available
+    db.close()
+    engine.dispose()
+    assert results.count(True) == 5 and results.count(False) == 7, results
+    assert remaining == 0, remaining
@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useRouter } from "next/navigation";
-import { getRequests, SourcingRequest } from "@/lib/api";
+import { getRequests, SourcingRequest, subscribeBuyerEvents, applyRequestEvent } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
@@ -16,6 +16,17 @@ export default function RequestsDashboard() {
         getRequests().then(setRequests);
     }, []);
 
+    // Live coverage updates for all of the buyer's requests
+    useEffect(() => {
+        return subscribeBuyerEvents(1, (event) => { // Mock buyer (see createRequest)
+            if (event.type === 'resync') {
+                getRequests().then(setRequests);
+            } else {
+                setRequests(prev => prev.map(req => applyRequestEvent(req, event)));
+            }
+        });
+    }, []);
+
     return (
         <div className="min-h-screen bg-background font-sans text-foreground">
             <main className="container mx-auto px-6 py-12">
@@ -32,8 +43,8 @@ export default function RequestsDashboard() {
                 ) : (
                     <div className="grid gap-6">
                         {requests.map((req) => {
-                            // Calculate coverage logic (mock for list view if offers not populated deeply)
-                            const coveredKg = req.offers ? req.offers.reduce((acc, o) => acc + o.volume_offered_kg, 0) : 0;
+                            // Coverage counters are maintained server-side (no need to walk the offers)
+                            const coveredKg = (req.covered_kg_pending ?? 0) + (req.covered_kg_accepted ?? 0);
                             const percent = Math.min(100, Math.round((coveredKg / req.volume_target_kg) * 100));
 
                             return (
@@ -60,11 +71,11 @@ export default function RequestsDashboard() {
                                             <Progress value={percent} className="h-2" />
                                             <div className="flex justify-between items-center mt-4">
                                                 <div className="flex gap-2 text-xs text-muted-foreground">
-                                                    <span>{req.offers ? req.offers.length : 0} Offers received</span>
+                                                    <span>{req.offer_count ?? 0} Offers received</span>
                                                 </div>
 
                                                 {/* Only show Delete if no accepted offers and logistics in PREPARING */}
-                                                {(!req.offers?.some(o => o.status === 'ACCEPTED') && (!req.logistics_status || req.logistics_status === 'PREPARING')) && (
+                                                {(!(req.covered_kg_accepted > 0) && (!req.logistics_status || req.logistics_status === 'PREPARING')) && (
                                                     <Button
                                                         size="sm"
                                                         variant="ghost"
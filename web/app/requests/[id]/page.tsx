@@ -2,7 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useParams, useRouter } from "next/navigation";
-import { getRequestDetail, SourcingRequest, updateOfferStatus, getAiInsight, generateSourcingContract, updateLogisticsStatus } from "@/lib/api";
+import { getRequestDetail, SourcingRequest, updateOfferStatus, getRequestInsights, OfferInsight, generateSourcingContract, updateLogisticsStatus, subscribeRequestEvents, applyRequestEvent } from "@/lib/api";
 import { getRequestTimeline, TraceabilityEvent } from "@/lib/traceability";
 import { Button } from "@/components/ui/button";
 import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui/card";
@@ -23,7 +23,7 @@ export default function RequestDetailPage() {
     const params = useParams();
     const router = useRouter();
     const [req, setReq] = useState<SourcingRequest | null>(null);
-    const [insight, setInsight] = useState<any>(null); // Quick storage for AI insight
+    const [insights, setInsights] = useState<Record<number, OfferInsight> | null>(null); // All offers, scored in one call
     const [viewingOfferId, setViewingOfferId] = useState<number | null>(null);
     const [contractUrl, setContractUrl] = useState<string | null>(null);
     const [timelineEvents, setTimelineEvents] = useState<TraceabilityEvent[]>([]);
@@ -36,9 +36,22 @@ export default function RequestDetailPage() {
         }
     }, [params.id]);
 
+    // Live updates (new offers, status and logistics changes) instead of reloading the request
+    useEffect(() => {
+        if (!params.id) return;
+        const rid = Number(params.id);
+        return subscribeRequestEvents(rid, (event) => {
+            if (event.type === 'resync') {
+                getRequestDetail(rid).then(setReq);
+            } else {
+                setReq(prev => prev && applyRequestEvent(prev, event));
+            }
+        });
+    }, [params.id]);
+
     const handleAction = async (offerId: number, status: string) => {
         await updateOfferStatus(offerId, status);
-        // Refresh
+        // Refresh (the offer_updated event may already have; covers a dropped stream)
         getRequestDetail(Number(params.id)).then(setReq);
     };
 
@@ -57,20 +70,22 @@ export default function RequestDetailPage() {
     const handleLogisticsUpdate = async (status: string) => {
         if (!req) return;
         await updateLogisticsStatus(req.id, status);
+        // Refresh (the logistics_updated event may already have; covers a dropped stream)
         getRequestDetail(Number(params.id)).then(setReq);
     }
 
     const loadInsight = async (offerId: number) => {
         setViewingOfferId(offerId);
-        const data = await getAiInsight(offerId);
-        setInsight(data);
+        if (!req) return;
+        const data = await getRequestInsights(req.id);
+        setInsights(Object.fromEntries(data.offers.map(o => [o.offer_id, o])));
     };
 
     if (!req) return <div className="p-10 text-center">Loading Request...</div>;
 
     // Calc stats
-    const acceptedKg = req.offers.filter(o => o.status === 'ACCEPTED').reduce((acc, o) => acc + o.volume_offered_kg, 0);
-    const pendingKg = req.offers.filter(o => o.status === 'PENDING' || o.status === 'NEGOTIATING').reduce((acc, o) => acc + o.volume_offered_kg, 0);
+    const acceptedKg = req.covered_kg_accepted ?? 0;
+    const pendingKg = req.covered_kg_pending ?? 0;
 
     // Percentages
     const acceptedPct = (acceptedKg / req.volume_target_kg) * 100;
@@ -203,7 +218,7 @@ export default function RequestDetailPage() {
                                             <TableCell>
                                                 {viewingOfferId === offer.id ? (
                                                     <div className="text-xs max-w-[200px] bg-blue-50 p-2 rounded border border-blue-100">
-                                                        {insight ? insight.ai_advice : "Analyzing..."}
+                                                        {insights?.[offer.id] ? insights[offer.id].advice : "Analyzing..."}
                                                     </div>
                                                 ) : (
                                                     <Button variant="link" size="sm" onClick={() => loadInsight(offer.id)}>
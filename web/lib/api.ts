@@ -84,11 +84,17 @@ export type CalculatedPrice = {
 
 export type Order = {
   id: number;
-  product_id: number;
+  product_id: number | null; // null once the product is deleted
   product_name: string;
   amount: number;
   status: string;
   contract_url?: string;
+  created_at?: string;
+};
+
+export type OrderPage = {
+  orders: Order[];
+  next_cursor: string | null; // null = last page
 };
 
 // --- Sourcing Types ---
@@ -113,7 +119,121 @@ export type SourcingRequest = {
   status: string;
   logistics_status: string; // Feature 8
   required_certs?: string[]; // Feature 7
+  created_at?: string;
+  // Coverage counters maintained by the backend on every offer write
+  offer_count: number;
+  covered_kg_pending: number; // PENDING + NEGOTIATING
+  covered_kg_accepted: number;
+  best_price: number | null; // lowest non-rejected offer
+  weighted_avg_price: number | null; // volume-weighted, non-rejected offers
+  offers: SourcingOffer[];
+}
+
+export type SourcingRequestSummary = Omit<SourcingRequest, 'offers'> & {
+  buyer_id: number;
+  accepts_partial: boolean;
+  created_at: string;
+}
+
+export type SourcingRequestFeedPage = {
+  requests: SourcingRequestSummary[];
+  next_cursor: string | null; // null = last page
+}
+
+export type SourcingOfferPage = {
+  request_id: number;
   offers: SourcingOffer[];
+  next_cursor: string | null; // null = last page
+}
+
+export type OfferCoverageSummary = {
+  request_id: number;
+  volume_target_kg: number;
+  offer_count: number;
+  status_counts: Record<string, number>;
+  offered_kg: number;
+  accepted_kg: number;
+  pending_kg: number;
+  coverage_percent: number;
+  top_offers: SourcingOffer[];
+}
+
+export type OfferAllocation = {
+  offer_id: number;
+  facilitator_id: number | null;
+  volume_kg: number;
+  offered_kg: number;
+  is_partial: boolean;
+  price_per_kg: number; // tier price for the allocated volume
+  tier_min_kg: number | null;
+  trust_score: number | null;
+  total_usd: number;
+}
+
+export type AllocationPlan = {
+  request_id: number;
+  accepts_partial: boolean;
+  volume_target_kg: number;
+  allocated_kg: number;
+  shortfall_kg: number; // > 0 when eligible offers cannot cover the volume
+  total_usd: number;
+  average_price_per_kg: number | null;
+  allocations: OfferAllocation[];
+  candidate_count: number;
+  excluded_offer_count: number; // filtered out by trust score or certs
+  dp_offer_count: number;
+  grid_step_kg: number;
+}
+
+export type MarketStats = {
+  product_type: string;
+  grade: string | null; // null = all grades (not enough deals for the grade)
+  sample_count: number;
+  mean: number;
+  median: number;
+  p25: number;
+  p75: number;
+  min: number;
+  max: number;
+  volatility: number | null; // stdev / mean
+}
+
+export type OfferInsight = {
+  offer_id: number;
+  facilitator_id: number | null;
+  status: string | null;
+  volume_kg: number | null;
+  price_per_kg: number | null;
+  trust_score: number | null;
+  market_percentile: number | null; // % of recent deals priced below this offer
+  delta_vs_median_pct: number | null;
+  delta_vs_target_usd: number | null;
+  z_score: number | null;
+  score: number; // 0-100, higher = better deal for the buyer
+  recommendation: 'ACCEPT' | 'NEGOTIATE' | 'DECLINE';
+  counter_price_usd: number | null;
+  advice: string;
+}
+
+export type RequestInsights = {
+  request_id: number;
+  product_type: string;
+  grade_target: string | null;
+  price_target_usd: number | null;
+  market: MarketStats | null;
+  offers: OfferInsight[];
+}
+
+// Live events pushed by GET /requests/{id}/events and /requests/events?buyer_id=
+export type RequestEvent = {
+  type: 'offer_created' | 'offer_updated' | 'logistics_updated' | 'resync'; // resync = reload once
+  request_id: number;
+  buyer_id: number | null;
+  request: Pick<SourcingRequest, 'status' | 'logistics_status' | 'offer_count' | 'covered_kg_pending'
+    | 'covered_kg_accepted' | 'best_price' | 'weighted_avg_price'>;
+  offer?: Pick<SourcingOffer, 'id' | 'request_id' | 'facilitator_id' | 'status' | 'volume_offered_kg'
+    | 'price_offered_usd' | 'trust_score_snapshot'>;
+  at: string;
 }
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000/api/v1';
@@ -131,11 +251,17 @@ export async function getProducts(): Promise<Product[]> {
   }
 }
 
-export async function getOrders(): Promise<Order[]> {
+export async function getOrders(
+  options: { status?: string; limit?: number; cursor?: string } = {}
+): Promise<Order[]> {
+  const params = new URLSearchParams({ limit: String(options.limit ?? 100) });
+  if (options.status) params.set('status', options.status);
+  if (options.cursor) params.set('cursor', options.cursor);
   try {
-    const res = await fetch(`${API_URL}/orders/`, { cache: 'no-store' });
+    const res = await fetch(`${API_URL}/orders/?${params}`, { cache: 'no-store' });
     if (!res.ok) throw new Error('Failed to fetch orders');
-    return res.json();
+    const page: OrderPage = await res.json();
+    return page.orders;
   } catch (error) {
     console.error(error);
     return [];
@@ -189,12 +315,68 @@ export async function getRequests(): Promise<SourcingRequest[]> {
   }
 }
 
+export async function getRequestFeed(
+  filters: {
+    product_type?: string; grade?: string; certs?: string[]; min_volume_kg?: number;
+    has_certs?: string[]; // request requires all of these
+    spec_min?: Record<string, number>; // e.g. { vanillin_content_min: 1.4 } -> spec value >= 1.4
+    spec_max?: Record<string, number>;
+    limit?: number; cursor?: string
+  } = {}
+): Promise<SourcingRequestFeedPage> {
+  const params = new URLSearchParams();
+  if (filters.product_type) params.set('product_type', filters.product_type);
+  if (filters.grade) params.set('grade', filters.grade);
+  filters.certs?.forEach((cert) => params.append('certs', cert));
+  if (filters.min_volume_kg !== undefined) params.set('min_volume_kg', String(filters.min_volume_kg));
+  filters.has_certs?.forEach((cert) => params.append('has_certs', cert));
+  Object.entries(filters.spec_min ?? {}).forEach(([key, value]) => params.append('spec_min', `${key}:${value}`));
+  Object.entries(filters.spec_max ?? {}).forEach(([key, value]) => params.append('spec_max', `${key}:${value}`));
+  if (filters.limit) params.set('limit', String(filters.limit));
+  if (filters.cursor) params.set('cursor', filters.cursor);
+  const res = await fetch(`${API_URL}/requests/feed?${params}`, { cache: 'no-store' });
+  if (!res.ok) throw new Error('Failed to fetch request feed');
+  return res.json();
+}
+
 export async function getRequestDetail(id: number): Promise<SourcingRequest> {
   const res = await fetch(`${API_URL}/requests/${id}`, { cache: 'no-store' });
   if (!res.ok) throw new Error('Request not found');
   return res.json();
 }
 
+export async function getRequestOffers(
+  id: number,
+  options: { status?: string; limit?: number; cursor?: string } = {}
+): Promise<SourcingOfferPage> {
+  const params = new URLSearchParams();
+  if (options.status) params.set('status', options.status);
+  if (options.limit) params.set('limit', String(options.limit));
+  if (options.cursor) params.set('cursor', options.cursor);
+  const res = await fetch(`${API_URL}/requests/${id}/offers?${params}`, { cache: 'no-store' });
+  if (!res.ok) throw new Error('Failed to fetch offers');
+  return res.json();
+}
+
+export async function getRequestOffersSummary(id: number, top = 5): Promise<OfferCoverageSummary> {
+  const res = await fetch(`${API_URL}/requests/${id}/offers/summary?top=${top}`, { cache: 'no-store' });
+  if (!res.ok) throw new Error('Failed to fetch offers summary');
+  return res.json();
+}
+
+export async function optimizeRequestAllocation(
+  id: number,
+  options: { min_trust_score?: number; required_certs?: string[]; volume_kg?: number } = {}
+): Promise<AllocationPlan> {
+  const res = await fetch(`${API_URL}/requests/${id}/optimize`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(options),
+  });
+  if (!res.ok) throw new Error('Failed to optimize allocation');
+  return res.json();
+}
+
 export async function createRequest(data: any): Promise<SourcingRequest> {
   const res = await fetch(`${API_URL}/requests/`, {
     method: 'POST',
@@ -222,6 +404,12 @@ export async function getAiInsight(offerId: number) {
   return res.json();
 }
 
+export async function getRequestInsights(requestId: number): Promise<RequestInsights> {
+  const res = await fetch(`${API_URL}/requests/${requestId}/insights`, { cache: 'no-store' });
+  if (!res.ok) throw new Error('Failed to fetch insights');
+  return res.json();
+}
+
 export async function generateSourcingContract(requestId: number): Promise<{ contract_url: string }> {
   const res = await fetch(`${API_URL}/requests/${requestId}/contract`, { method: 'POST' });
   if (!res.ok) throw new Error('Failed to generate contract');
@@ -232,6 +420,46 @@ export async function updateLogisticsStatus(requestId: number, status: string) {
   const res = await fetch(`${API_URL}/requests/${requestId}/logistics?status=${status}`, { method: 'PUT' });
   return res.json();
 }
+const REQUEST_EVENT_TYPES = ['offer_created', 'offer_updated', 'logistics_updated', 'resync'];
+
+function subscribeEvents(url: string, onEvent: (event: RequestEvent) => void): () => void {
+  const source = new EventSource(url);
+  for (const type of REQUEST_EVENT_TYPES) {
+    source.addEventListener(type, (message) => {
+      onEvent(type === 'resync' ? ({ type } as RequestEvent) : JSON.parse((message as MessageEvent).data));
+    });
+  }
+  // EventSource reconnects by itself, but events sent while disconnected are lost
+  let connected = false;
+  source.addEventListener('ready', () => {
+    if (connected) onEvent({ type: 'resync' } as RequestEvent);
+    connected = true;
+  });
+  return () => source.close();
+}
+
+export function subscribeRequestEvents(requestId: number, onEvent: (event: RequestEvent) => void) {
+  return subscribeEvents(`${API_URL}/requests/${requestId}/events`, onEvent);
+}
+
+export function subscribeBuyerEvents(buyerId: number, onEvent: (event: RequestEvent) => void) {
+  return subscribeEvents(`${API_URL}/requests/events?buyer_id=${buyerId}`, onEvent);
+}
+
+// Merges a live event into a loaded request (counters, logistics and the changed offer)
+export function applyRequestEvent(req: SourcingRequest, event: RequestEvent): SourcingRequest {
+  if (event.type === 'resync' || event.request_id !== req.id) return req;
+  const updated = { ...req, ...event.request };
+  const offer = event.offer;
+  if (offer && req.offers) {
+    const exists = req.offers.some(o => o.id === offer.id);
+    updated.offers = exists
+      ? req.offers.map(o => (o.id === offer.id ? { ...o, ...offer } : o))
+      : [...req.offers, offer as SourcingOffer];
+  }
+  return updated;
+}
+
 export async function deleteRequest(requestId: number) {
   const res = await fetch(`${API_URL}/requests/${requestId}`, { method: 'DELETE' });
   if (!res.ok) throw new Error('Failed to delete request');
@@ -253,7 +481,8 @@ export async function getProductTraceability(productId: number) {
 
 export async function getProductPriceTiers(productId: number): Promise<ProductPricingInfo | null> {
   try {
-    const res = await fetch(`${API_URL}/pricing/products/${productId}/price-tiers`, { cache: 'no-store' });
+    // no-cache: revalidated with If-None-Match (ETag = pricing version), 304 when unchanged
+    const res = await fetch(`${API_URL}/pricing/products/${productId}/price-tiers`, { cache: 'no-cache' });
     if (!res.ok) return null;
     return res.json();
   } catch (e) {
@@ -265,7 +494,33 @@ export async function getProductPriceTiers(productId: number): Promise<ProductPr
 export async function calculatePrice(productId: number, quantityKg: number): Promise<CalculatedPrice | null> {
   try {
     const res = await fetch(`${API_URL}/pricing/products/${productId}/calculate-price?quantity_kg=${quantityKg}`, {
-      cache: 'no-store'
+      cache: 'no-cache'
+    });
+    if (!res.ok) return null;
+    return res.json();
+  } catch (e) {
+    console.error(e);
+    return null;
+  }
+}
+
+export type BatchQuoteResponse = {
+  quotes: CalculatedPrice[];
+  errors: {
+    index: number;
+    product_id: number;
+    quantity_kg: number;
+    status_code: number;
+    detail: string;
+  }[];
+};
+
+export async function calculatePrices(items: { product_id: number; quantity_kg: number }[]): Promise<BatchQuoteResponse | null> {
+  try {
+    const res = await fetch(`${API_URL}/pricing/quotes`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ items }),
     });
     if (!res.ok) return null;
     return res.json();